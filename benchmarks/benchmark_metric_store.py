@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""Measures merging the metrics of the summarization for growing run counts.
+
+Compares MetricStore, which merges dense arrays, with the previous
+implementation of SimpleSummarization that merged one Metric object per
+dataset, parameter file and metric. Both summarize the same runs over all
+datasets; counts, means, minima and maxima are checked to be equal. The
+standard deviations differ because the previous merge used the already
+updated mean.
+
+Usage: benchmark_metric_store.py [--runs 1000 10000 100000] [--metrics 20]
+           [--datasets 10]
+"""
+
+from __future__ import print_function
+
+import argparse
+from collections import defaultdict
+from math import sqrt
+import time
+
+import numpy as np
+
+from evaluation_tools.metric_store import MetricStore
+
+
+class _Metric(object):
+    """Previous per-object metric of the summarization."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0
+        self.stddev = 0
+        self.var = 0
+        self.min = float('nan')
+        self.max = float('nan')
+
+    def mergeMetric(self, other):
+        if self.count == 0:
+            self.mean = other.mean
+            self.var = other.var
+            self.stddev = other.stddev
+            self.min = other.min
+            self.max = other.max
+
+        elif other.count != 0:
+            self.mean = (self.mean * self.count + other.mean * other.count) \
+                / (self.count + other.count)
+
+            self.var = (((self.count - 1) * self.var +
+                         (other.count - 1) * other.var +
+                         (self.count * other.count) /
+                         (self.count + other.count) *
+                         (self.mean * self.mean + other.mean * other.mean -
+                          2 * self.mean * other.mean)) /
+                        (self.count + other.count - 1))
+            self.stddev = sqrt(self.var)
+
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+        self.count += other.count
+
+
+def _summarizeWithObjects(runs):
+    """Previous merging of SimpleSummarization, see
+    summarizeMetricsFromDatasets()."""
+    metrics = defaultdict(lambda: defaultdict(_Metric))
+    for dataset, parameter_file, run_metrics in runs:
+        for name, sample in run_metrics.items():
+            metric = _Metric()
+            metric.count, metric.mean, metric.stddev, metric.min, \
+                metric.max = sample
+            metric.var = metric.stddev * metric.stddev
+            metrics[(dataset, parameter_file)][name].mergeMetric(metric)
+
+    merged = defaultdict(dict)
+    for (_, parameter_file), cell_metrics in metrics.items():
+        for name, metric in cell_metrics.items():
+            if name not in merged[parameter_file]:
+                merged[parameter_file][name] = _Metric()
+            merged[parameter_file][name].mergeMetric(metric)
+    return {(parameter_file, name): (metric.count, metric.mean, metric.min,
+                                     metric.max)
+            for parameter_file, cell_metrics in merged.items()
+            for name, metric in cell_metrics.items()}
+
+
+def _summarizeWithStore(runs):
+    store = MetricStore.fromRuns(runs).mergeAxis('dataset')
+    parameter_files, names = store.labels
+    return {(parameter_files[i], names[j]):
+            (store.count[i, j], store.mean[i, j], store.minimum[i, j],
+             store.maximum[i, j])
+            for i, j in zip(*np.nonzero(store.has_data))}
+
+
+def _createRuns(num_runs, num_metrics, num_datasets):
+    rng = np.random.RandomState(0)
+    runs = []
+    for run_index in range(num_runs):
+        metrics = {}
+        for metric_index in range(num_metrics):
+            mean = rng.rand()
+            # Some runs have no samples, their minimum and maximum are
+            # ignored.
+            count = rng.randint(1, 1000) if rng.rand() > 0.1 else 0
+            metrics['metric_' + str(metric_index)] = [
+                count, mean,
+                rng.rand(), mean - rng.rand(), mean + rng.rand()
+            ]
+        runs.append(('dataset_' + str(run_index % num_datasets),
+                     'parameters_' + str(run_index // num_datasets), metrics))
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--runs', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--metrics', type=int, default=20)
+    parser.add_argument('--datasets', type=int, default=10)
+    args = parser.parse_args()
+
+    print('%10s %10s %12s %12s %8s' % ('runs', 'cells', 'objects [s]',
+                                       'store [s]', 'speedup'))
+    for num_runs in args.runs:
+        runs = _createRuns(num_runs, args.metrics, args.datasets)
+
+        start_time = time.time()
+        object_result = _summarizeWithObjects(runs)
+        object_time = time.time() - start_time
+        start_time = time.time()
+        store_result = _summarizeWithStore(runs)
+        store_time = time.time() - start_time
+
+        assert sorted(object_result) == sorted(store_result)
+        for key, values in object_result.items():
+            np.testing.assert_allclose(values, store_result[key])
+        print('%10i %10i %12.3f %12.3f %7.1fx' %
+              (num_runs, num_runs * args.metrics, object_time, store_time,
+               object_time / store_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""Measures the bootstrap comparison of parameter files for growing sizes.
+
+Creates a MetricStore with random means for every dataset, parameter file and
+metric and times compareParameterFiles() on all pairs of parameter files. As
+the means don't depend on the parameter file, the fraction of significant
+comparisons should be close to 1 - confidence.
+
+Usage: benchmark_parameter_comparison.py [--parameter_files 10 20 30]
+           [--metrics 100] [--datasets 30] [--resamples 2000]
+"""
+
+from __future__ import print_function
+
+import argparse
+import time
+
+import numpy as np
+
+from evaluation_tools.metric_store import MetricStore
+from evaluation_tools.parameter_comparison import compareParameterFiles
+
+
+def _createStore(num_parameter_files, num_metrics, num_datasets):
+    rng = np.random.RandomState(0)
+    runs = []
+    for dataset_index in range(num_datasets):
+        for parameter_file_index in range(num_parameter_files):
+            metrics = {}
+            for metric_index in range(num_metrics):
+                mean = dataset_index + rng.rand()
+                metrics['metric_' + str(metric_index)] = [
+                    10, mean, 0.1, mean - 1., mean + 1.
+                ]
+            runs.append(('dataset_' + str(dataset_index),
+                         'parameters_' + str(parameter_file_index), metrics))
+    return MetricStore.fromRuns(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--parameter_files', type=int, nargs='+', default=[10, 20, 30])
+    parser.add_argument('--metrics', type=int, default=100)
+    parser.add_argument('--datasets', type=int, default=30)
+    parser.add_argument('--resamples', type=int, default=2000)
+    args = parser.parse_args()
+
+    print('%16s %12s %10s %12s' % ('parameter files', 'comparisons',
+                                   'time [s]', 'significant'))
+    for num_parameter_files in args.parameter_files:
+        store = _createStore(num_parameter_files, args.metrics, args.datasets)
+        start_time = time.time()
+        comparisons = compareParameterFiles(
+            store, num_resamples=args.resamples)
+        elapsed_time = time.time() - start_time
+        num_significant = sum(
+            comparison['significant'] for comparison in comparisons)
+        print('%16i %12i %10.2f %11.1f%%' %
+              (num_parameter_files, len(comparisons), elapsed_time,
+               100. * num_significant / len(comparisons)))
+
+
+if __name__ == '__main__':
+    main()
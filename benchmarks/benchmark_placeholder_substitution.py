@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""Measures the placeholder substitution of a job for growing dataset counts.
+
+Compares Job.replacePlaceholdersInString() with the previous implementation
+that called str.replace() once per placeholder and dataset index. Every job
+replaces the placeholders in all string parameters for every dataset, like
+Job.createJob() does.
+
+Usage: benchmark_placeholder_substitution.py [--datasets 1 10 50]
+           [--parameters 200] [--repetitions 3]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import re
+import timeit
+
+from evaluation_tools.job import Job
+
+
+def _createJob(num_datasets):
+    job = Job()
+    job.job_path = '/tmp/results/experiment/job'
+    job.sensors_file = '/tmp/calibrations/sensors.yaml'
+    job.localization_map = '/tmp/maps/localization_map'
+    job._parseDatasetsDict([{
+        'name': '/tmp/datasets/dataset_' + str(i) + '.bag',
+        'additional_parameters': {
+            'start_time': str(i)
+        }
+    } for i in range(num_datasets)])
+    job._addAdditionalPlaceholders()
+    return job
+
+
+def _createParameters(num_parameters):
+    templates = [
+        '<BAG_FILENAME>', '<DATASET_LOG_DIR>/output.csv',
+        '<OUTPUT_MAP_FOLDER_0> <OUTPUT_MAP_FOLDER>', '<start_time>',
+        'no_placeholder', '<JOB_DIR>/<DATASET_NAME>.yaml'
+    ]
+    return [
+        templates[i % len(templates)] for i in range(num_parameters)
+    ]
+
+
+def _replaceChained(job, string, dataset_index=0):
+    """Previous implementation of Job.replacePlaceholdersInString(), with
+    <BAG_FILENAME_#> and <BAG_FOLDER_#> referring to the dataset path."""
+    dataset_names = job.dataset_names
+    output_map_folders = job.output_map_folders
+    dataset_log_dirs = job.dataset_log_dirs
+    string = string.replace('<BAG_FILENAME>',
+                            job.dataset_paths[dataset_index])
+    string = string.replace('<BAG_FOLDER>',
+                            os.path.dirname(job.dataset_paths[dataset_index]))
+    for i in range(0, len(dataset_names)):
+        string = string.replace('<BAG_FILENAME_' + str(i) + '>',
+                                job.dataset_paths[i])
+        string = string.replace('<BAG_FOLDER_' + str(i) + '>',
+                                os.path.dirname(job.dataset_paths[i]))
+    string = string.replace('<SENSORS_YAML>', job.sensors_file)
+    string = string.replace('<LOCALIZATION_MAP>', job.localization_map)
+    string = string.replace('<OUTPUT_MAP_FOLDER>',
+                            output_map_folders[dataset_index])
+    for i in range(0, len(output_map_folders)):
+        string = string.replace('<OUTPUT_MAP_FOLDER_' + str(i) + '>',
+                                output_map_folders[i])
+    string = string.replace('<DATASET_NAME>', dataset_names[dataset_index])
+    for i in range(0, len(dataset_names)):
+        string = string.replace('<DATASET_NAME_' + str(i) + '>',
+                                dataset_names[i])
+    string = string.replace('<OUTPUT_MAP_KEY>', dataset_names[dataset_index])
+    for i in range(0, len(dataset_names)):
+        string = string.replace('<OUTPUT_MAP_KEY_' + str(i) + '>',
+                                dataset_names[i])
+    string = string.replace('<JOB_DIR>', job.job_path)
+    string = string.replace('<DATASET_LOG_DIR>',
+                            dataset_log_dirs[dataset_index])
+    for original, replacement in job.additional_placeholders[
+            dataset_index].items():
+        string = string.replace(original, replacement)
+    if re.search('<.*>', string):
+        raise Exception('Replacing of placeholders did not complete.')
+    return string
+
+
+def _replaceAll(replace_function, job, parameters):
+    for dataset_index in range(len(job.dataset_paths)):
+        for parameter in parameters:
+            replace_function(parameter, dataset_index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--datasets', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--parameters', type=int, default=200)
+    parser.add_argument('--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    parameters = _createParameters(args.parameters)
+    print('%10s %14s %14s %10s' % ('datasets', 'chained [s]', 'compiled [s]',
+                                   'speedup'))
+    for num_datasets in args.datasets:
+        job = _createJob(num_datasets)
+        for dataset_index in range(num_datasets):
+            for parameter in parameters:
+                assert _replaceChained(job, parameter, dataset_index) == \
+                    job.replacePlaceholdersInString(parameter, dataset_index)
+
+        chained_time = min(
+            timeit.repeat(
+                lambda: _replaceAll(
+                    lambda string, index: _replaceChained(job, string, index),
+                    job, parameters),
+                number=1,
+                repeat=args.repetitions))
+        # A new job per repetition to include the creation of the table.
+        compiled_time = min(
+            timeit.repeat(
+                lambda: _replaceAll(
+                    _createJob(num_datasets).replacePlaceholdersInString, job,
+                    parameters),
+                number=1,
+                repeat=args.repetitions))
+        print('%10i %14.4f %14.4f %9.1fx' %
+              (num_datasets, chained_time, compiled_time,
+               chained_time / compiled_time))
+
+
+if __name__ == '__main__':
+    main()
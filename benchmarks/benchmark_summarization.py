@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Measures loading the statistics of a results folder for the summarization.
+
+Creates results folders with one formatted_stats.yaml and its binary copy
+(see evaluation_tools.binary_stats) per job and times SimpleSummarization
+reading the yaml files and reading the binary files, each with a single
+process and with a process pool. The summarized metrics of all runs are
+checked to be identical.
+
+Usage: benchmark_summarization.py [--jobs 100 1000 10000] [--metrics 20]
+           [--workers <number of processes>] [--results_folder <folder>]
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from evaluation_tools.binary_stats import getBinaryStatsPath, writeBinaryStats
+from evaluation_tools.simple_summarization import SimpleSummarization
+from evaluation_tools.yaml_io import dumpYaml
+
+
+def _createResultsFolder(results_folder, num_jobs, num_metrics):
+    rng = random.Random(0)
+    stats_files = []
+    for job_index in range(num_jobs):
+        job_folder = os.path.join(results_folder, 'job_' + str(job_index))
+        os.makedirs(job_folder)
+        metrics = {}
+        for metric_index in range(num_metrics):
+            mean = rng.random()
+            metrics['metric_' + str(metric_index)] = {
+                'samples': rng.randint(1, 1000),
+                'mean': mean,
+                'stddev': rng.random(),
+                'min': mean - rng.random(),
+                'max': mean + rng.random()
+            }
+        formatted_stats = {
+            'dataset': 'dataset_' + str(job_index % 10),
+            'parameter_file': 'parameters_' + str(job_index // 10),
+            'metrics': metrics
+        }
+        stats_file = os.path.join(job_folder, 'formatted_stats.yaml')
+        dumpYaml(formatted_stats, stats_file)
+        writeBinaryStats(getBinaryStatsPath(stats_file), formatted_stats)
+        stats_files.append(stats_file)
+    return stats_files
+
+
+def _timeSummarization(stats_files, num_workers):
+    start_time = time.time()
+    summarization = SimpleSummarization(stats_files, num_workers=num_workers)
+    metrics = summarization.summarizeMetricsFromDatasets()
+    return time.time() - start_time, json.dumps(metrics, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--jobs', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--metrics', type=int, default=20)
+    parser.add_argument(
+        '--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument(
+        '--results_folder',
+        help='folder for the generated results, removed afterwards '
+        '(default: a temporary folder)')
+    args = parser.parse_args()
+    logging.getLogger('evaluation_tools').setLevel(logging.WARNING)
+
+    print('%i metrics per job, %i workers' % (args.metrics, args.workers))
+    print('%8s %8s %12s %12s %8s' % ('jobs', 'format', 'serial [s]',
+                                     'parallel [s]', 'speedup'))
+    for num_jobs in args.jobs:
+        results_folder = args.results_folder or tempfile.mkdtemp()
+        try:
+            stats_files = _createResultsFolder(results_folder, num_jobs,
+                                               args.metrics)
+            for stats_format in ['binary', 'yaml']:
+                if stats_format == 'yaml':
+                    for stats_file in stats_files:
+                        os.remove(getBinaryStatsPath(stats_file))
+                serial_time, serial_metrics = _timeSummarization(
+                    stats_files, 1)
+                parallel_time, parallel_metrics = _timeSummarization(
+                    stats_files, args.workers)
+                assert serial_metrics == parallel_metrics
+                print('%8i %8s %12.3f %12.3f %7.1fx' %
+                      (num_jobs, stats_format, serial_time, parallel_time,
+                       serial_time / parallel_time))
+        finally:
+            shutil.rmtree(results_folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
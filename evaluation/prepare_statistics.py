@@ -3,7 +3,11 @@
 import argparse
 import logging
 import os
-import yaml
+
+from evaluation_tools.binary_stats import (getBinaryStatsPath,
+                                           writeBinaryStats)
+from evaluation_tools.quantile_sketch import getSketchFromMetric
+from evaluation_tools.yaml_io import dumpYaml, loadStatistics
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG)
@@ -12,11 +16,15 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="""Format a statistics file
         to be used in the standard evaluation.""")
     parser.add_argument('--data_dir', help='directory of the job')
+    # Name of the argument that is passed by evaluation.py.
+    parser.add_argument('--job_dir', help='directory of the job')
     parser.add_argument('--dataset', help='dataset used in the job')
     parser.add_argument(
         '--parameter_file', help='parameter file used in the job')
 
     args, unknown = parser.parse_known_args()
+    if args.data_dir is None:
+        args.data_dir = args.job_dir
 
     logger.info("Formatting statistics in %s", args.data_dir)
 
@@ -24,7 +32,17 @@ if __name__ == '__main__':
     if not os.path.isfile(statistics_path):
         raise ValueError(
             'Could not open statistics file in {}'.format(statistics_path))
-    statistics = yaml.safe_load(open(statistics_path))
+    statistics = loadStatistics(statistics_path)
+
+    # Keep a compact quantile sketch instead of the raw values or histograms
+    # of the metrics.
+    for metric in statistics.values():
+        if isinstance(metric, dict):
+            sketch = getSketchFromMetric(metric)
+            if sketch is not None:
+                metric.pop('values', None)
+                metric.pop('histogram', None)
+                metric['sketch'] = sketch.toDict()
 
     formatted_stats = {}
     formatted_stats['dataset'] = args.dataset
@@ -33,7 +51,10 @@ if __name__ == '__main__':
 
     output_path = args.data_dir + '/formatted_stats.yaml'
     logger.info("Formatting complete. New file in %s", output_path)
-    out_file_stream = open(output_path, "w")
-
-    yaml.dump(
-        formatted_stats, stream=out_file_stream, default_flow_style=False)
+    dumpYaml(formatted_stats, output_path)
+    binary_output_path = getBinaryStatsPath(output_path)
+    if writeBinaryStats(binary_output_path, formatted_stats):
+        logger.info("Binary copy of the statistics in %s", binary_output_path)
+    elif os.path.isfile(binary_output_path):
+        # Don't keep an outdated copy of a previous run.
+        os.remove(binary_output_path)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+import logging
+import math
+import os
+import yaml
+
+from evaluation_tools.yaml_io import loadFormattedStats
+
+FORMATTED_STATS_FILENAME = 'formatted_stats.yaml'
+
+
+class AdaptiveSweep(object):
+    """Successive halving over the parameter of a parameter sweep.
+
+    Instead of running the full linear grid of a parameter sweep, a coarse set
+    of values is first evaluated with a small budget. After each round, only
+    the best 1/reduction_factor of the values are kept, new values are added
+    at half the spacing around them and the budget is increased. The values
+    are scored with a metric from the formatted_stats.yaml of the jobs.
+
+    The sweep is enabled by an 'adaptive' entry in the parameter_sweep of a
+    parameter file:
+      parameter_sweep:
+        name: <parameter name>
+        min: <minimum value>
+        max: <maximum value>
+        step_size: <finest spacing between two values>
+        adaptive:
+          metric: <name of a metric in formatted_stats.yaml>
+          statistic: <entry of the metric to use> (default: mean)
+          objective: minimize or maximize (default: minimize)
+          initial_points: <number of values in the first round> (default: 9)
+          rounds: <number of rounds> (default: 3)
+          reduction_factor: <fraction of values dropped per round> (default: 3)
+          datasets_per_round: <list with the number of datasets (or dataset
+              groups if create_job_for_each_dataset is false) used in each
+              round> (default: all datasets in every round)
+          budget_parameter: <name of a parameter that limits the processed
+              data, e.g. the end time in the bag> (optional)
+          budget_values: <list with the value of budget_parameter in each
+              round> (required if budget_parameter is set)
+
+    Lists that are shorter than the number of rounds are extended with their
+    last entry. Every value that is kept adds up to 3 values to the next
+    round, so a round has at most 3 * ceil(n / reduction_factor) values if the
+    previous round had n values.
+    """
+
+    def __init__(self, sweep_dict):
+        logging.basicConfig(level=logging.DEBUG)
+        self.logger = logging.getLogger(__name__)
+        adaptive_dict = sweep_dict['adaptive']
+        if 'metric' not in adaptive_dict:
+            raise ValueError('The adaptive parameter sweep of "' +
+                             str(sweep_dict['name']) + '" needs a metric.')
+        self.name = sweep_dict['name']
+        self.min = sweep_dict['min']
+        self.max = sweep_dict['max']
+        self.step_size = sweep_dict['step_size']
+        self.metric = adaptive_dict['metric']
+        self.statistic = adaptive_dict.get('statistic', 'mean')
+        self.objective = adaptive_dict.get('objective', 'minimize')
+        if self.objective not in ['minimize', 'maximize']:
+            raise ValueError('Unknown objective "' + str(self.objective) +
+                             '", valid objectives are minimize and maximize.')
+        self.initial_points = int(adaptive_dict.get('initial_points', 9))
+        self.rounds = int(adaptive_dict.get('rounds', 3))
+        self.reduction_factor = float(
+            adaptive_dict.get('reduction_factor', 3))
+        if self.initial_points < 2 or self.rounds < 1 or \
+                self.reduction_factor <= 1:
+            raise ValueError('The adaptive parameter sweep of "' +
+                             str(self.name) + '" needs at least 2 initial '
+                             'points, 1 round and a reduction factor > 1.')
+        self.datasets_per_round = adaptive_dict.get('datasets_per_round')
+        self.budget_parameter = adaptive_dict.get('budget_parameter')
+        self.budget_values = adaptive_dict.get('budget_values')
+        if self.budget_parameter is not None and not self.budget_values:
+            raise ValueError('budget_values are required for the '
+                             'budget_parameter ' + str(self.budget_parameter))
+        self._integer_values = all(
+            isinstance(value, int)
+            for value in [self.min, self.max, self.step_size])
+
+        self.round_index = 0
+        self.spacing = float(self.max - self.min) / (self.initial_points - 1)
+        self.values = self._uniqueValues([
+            self.min + index * self.spacing
+            for index in range(self.initial_points)
+        ])
+        self._eliminated_values = set()
+        # Scores of every round: list of {value: score}.
+        self.scores = []
+
+    def isFinished(self):
+        return self.round_index >= self.rounds or not self.values
+
+    def getNumDatasets(self, num_available_datasets):
+        """Returns how many datasets are used in the current round."""
+        if not self.datasets_per_round:
+            return num_available_datasets
+        return max(
+            1,
+            min(
+                num_available_datasets,
+                int(self._getRoundEntry(self.datasets_per_round))))
+
+    def getParameters(self, params, value):
+        """Returns a copy of the parameter dict with the swept parameter and
+        the budget parameter of the current round set."""
+        params = dict(params)
+        params[self.name] = value
+        if self.budget_parameter is not None:
+            params[self.budget_parameter] = self._getRoundEntry(
+                self.budget_values)
+        return params
+
+    def getScore(self, job_paths):
+        """Returns the score of a value from the jobs that evaluated it, i.e.
+        the average of the metric over all jobs. Returns None if the metric is
+        missing for any of the jobs, e.g. because a job failed."""
+        scores = []
+        for job_path in job_paths:
+            stats_file = os.path.join(job_path, FORMATTED_STATS_FILENAME)
+            try:
+                metric = loadFormattedStats(stats_file)['metrics'][
+                    self.metric]
+                if isinstance(metric, dict):
+                    metric = metric[self.statistic]
+                scores.append(float(metric))
+            except (IOError, KeyError, TypeError, ValueError,
+                    yaml.YAMLError):
+                self.logger.warning('Metric "%s" not found in %s.',
+                                    self.metric, stats_file)
+                return None
+        if not scores:
+            return None
+        return sum(scores) / len(scores)
+
+    def finishRound(self, scores):
+        """Selects the best values of the current round and creates the
+        values of the next round around them.
+
+        Input:
+        - scores: dictionary {value: score} for all values of the current
+              round. Values with a score of None are treated as the worst
+              values.
+        """
+        self.scores.append(dict(scores))
+        sign = 1. if self.objective == 'minimize' else -1.
+        ranked_values = sorted(
+            self.values,
+            key=lambda value: (scores.get(value) is None,
+                               sign * (scores.get(value) or 0.)))
+        num_survivors = int(
+            math.ceil(len(ranked_values) / self.reduction_factor))
+        survivors = [
+            value for value in ranked_values[:num_survivors]
+            if scores.get(value) is not None
+        ]
+        self._eliminated_values.update(
+            value for value in ranked_values if value not in survivors)
+        self.logger.info('Adaptive sweep of %s, round %i: best value %s, %i '
+                         'of %i values kept.', self.name, self.round_index,
+                         survivors[0] if survivors else None, len(survivors),
+                         len(ranked_values))
+
+        self.spacing = max(self.spacing / 2., float(self.step_size))
+        refined_values = []
+        for value in survivors:
+            refined_values.extend(
+                [value - self.spacing, value, value + self.spacing])
+        self.values = [
+            value for value in self._uniqueValues(refined_values)
+            if value not in self._eliminated_values
+        ]
+        self.round_index += 1
+
+    def getBestValue(self):
+        """Returns (value, score) of the best value of the last finished
+        round or None if no value could be scored."""
+        if not self.scores:
+            return None
+        scored_values = [(score, value)
+                         for value, score in self.scores[-1].items()
+                         if score is not None]
+        if not scored_values:
+            return None
+        if self.objective == 'minimize':
+            score, value = min(scored_values)
+        else:
+            score, value = max(scored_values)
+        return value, score
+
+    def _getRoundEntry(self, entries):
+        if not isinstance(entries, list):
+            return entries
+        return entries[min(self.round_index, len(entries) - 1)]
+
+    def _quantize(self, value):
+        """Rounds a value to the step_size grid within [min, max]."""
+        num_steps = int(round((value - self.min) / float(self.step_size)))
+        value = min(self.max,
+                    max(self.min, self.min + num_steps * self.step_size))
+        if self._integer_values:
+            return int(value)
+        # Avoid values like 0.30000000000000004 in the job names.
+        return round(value, 12)
+
+    def _uniqueValues(self, values):
+        unique_values = []
+        for value in values:
+            value = self._quantize(value)
+            if value not in unique_values:
+                unique_values.append(value)
+        return sorted(unique_values)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+import json
+import numbers
+import os
+
+import numpy as np
+
+from evaluation_tools.quantile_sketch import getSketchFromMetric
+from evaluation_tools.yaml_io import loadFormattedStats
+
+# Entries of a metric in formatted_stats.yaml, stored as one column each.
+STATS_COLUMNS = ['samples', 'mean', 'stddev', 'min', 'max']
+
+_FILE_HEADER_PREFIX = '# formatted_stats v1 '
+
+
+def getBinaryStatsPath(formatted_stats_path):
+    """Returns the path of the binary copy of a formatted_stats.yaml, i.e.
+    formatted_stats.bin in the same folder."""
+    return os.path.splitext(formatted_stats_path)[0] + '.bin'
+
+
+def writeBinaryStats(output_path, formatted_stats):
+    """Writes the content of a formatted_stats.yaml to a binary file.
+
+    The file starts with a text header line that contains the dataset, the
+    parameter file, the columns (see STATS_COLUMNS), the metric names and the
+    quantile sketches of the metrics that have one (see
+    quantile_sketch.getSketchFromMetric()) as JSON, followed by one row of
+    native float64 values per metric. Reading it is much faster than parsing
+    the yaml, see loadBinaryStats().
+
+    Input:
+    - output_path: path of the binary file.
+    - formatted_stats: dictionary with the entries 'dataset', 'parameter_file'
+          and 'metrics' like in formatted_stats.yaml.
+
+    Return value: True if the file was written, False if a metric is not a
+    dictionary with a number for each of the STATS_COLUMNS.
+    """
+    metrics = formatted_stats['metrics']
+    metric_names = sorted(metrics)
+    rows = []
+    sketches = {}
+    for metric_name in metric_names:
+        metric = metrics[metric_name]
+        if not isinstance(metric_name, str) or not isinstance(metric, dict):
+            return False
+        row = [metric.get(column) for column in STATS_COLUMNS]
+        if not all(isinstance(value, numbers.Real) for value in row):
+            return False
+        rows.append(row)
+        sketch = getSketchFromMetric(metric)
+        if sketch is not None:
+            sketches[metric_name] = sketch.toDict()
+
+    header = json.dumps({
+        'dataset': formatted_stats['dataset'],
+        'parameter_file': formatted_stats['parameter_file'],
+        'columns': STATS_COLUMNS,
+        'metrics': metric_names,
+        'sketches': sketches
+    })
+    # Write to a temporary file first so that a partially written file is
+    # never read.
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as out_file_stream:
+        out_file_stream.write(
+            (_FILE_HEADER_PREFIX + header + '\n').encode('utf-8'))
+        out_file_stream.write(
+            np.array(rows, dtype=np.float64).reshape(
+                len(rows), len(STATS_COLUMNS)).tobytes())
+    os.rename(temp_path, output_path)
+    return True
+
+
+def loadBinaryStats(path):
+    """Loads a file written by writeBinaryStats().
+
+    Return value: dictionary with the same content as the formatted_stats.yaml
+    it was created from.
+    """
+    with open(path, 'rb') as in_file_stream:
+        header = in_file_stream.readline().decode('utf-8')
+        if not header.startswith(_FILE_HEADER_PREFIX):
+            raise ValueError('Not a binary statistics file: ' + path)
+        header = json.loads(header[len(_FILE_HEADER_PREFIX):])
+        data = in_file_stream.read()
+    columns = header['columns']
+    metric_names = header['metrics']
+    values = np.frombuffer(
+        data, dtype=np.float64).reshape(len(metric_names), len(columns))
+
+    sketches = header.get('sketches', {})
+    metrics = {}
+    for metric_name, row in zip(metric_names, values.tolist()):
+        metric = dict(zip(columns, row))
+        metric['samples'] = int(metric['samples'])
+        if metric_name in sketches:
+            metric['sketch'] = sketches[metric_name]
+        metrics[str(metric_name)] = metric
+    return {
+        'dataset': header['dataset'],
+        'parameter_file': header['parameter_file'],
+        'metrics': metrics
+    }
+
+
+def loadFormattedStatsPreferBinary(formatted_stats_path):
+    """Loads a formatted_stats.yaml from its binary copy if there is one that
+    is at least as new as the yaml, otherwise from the yaml."""
+    binary_path = getBinaryStatsPath(formatted_stats_path)
+    try:
+        binary_mtime = os.path.getmtime(binary_path)
+    except OSError:
+        return loadFormattedStats(formatted_stats_path)
+    try:
+        yaml_mtime = os.path.getmtime(formatted_stats_path)
+    except OSError:
+        yaml_mtime = None
+    if yaml_mtime is not None and yaml_mtime > binary_mtime:
+        return loadFormattedStats(formatted_stats_path)
+    return loadBinaryStats(binary_path)
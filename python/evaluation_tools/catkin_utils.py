@@ -2,10 +2,22 @@
 
 from __future__ import print_function
 
+import logging
 import os
 import subprocess
+import threading
 import yaml
 
+from evaluation_tools.yaml_io import dumpYaml, loadYaml
+
+# If this environment variable is set to a file path, the results of
+# catkin_find are additionally cached in this file across processes, see
+# catkinFind().
+CATKIN_FIND_CACHE_ENV = 'EVALUATION_TOOLS_CATKIN_CACHE'
+
+_catkin_find_results = {}
+_catkin_find_lock = threading.Lock()
+
 
 def getCatkinConfig(profile="default"):
     print("TODO: this may fail if you are not inside a catkin package!")
@@ -20,15 +32,93 @@ def getCatkinConfig(profile="default"):
     if not os.path.exists(config_yaml_path):
         raise ValueError(
             "config_yaml_path does not exist: '{}'".format(config_yaml_path))
-    in_file = open(config_yaml_path)
-    config = yaml.safe_load(in_file)
-    in_file.close()
-    return config
+    return loadYaml(config_yaml_path)
+
+
+def _getWorkspaceKey():
+    """Returns a string that changes whenever packages are added to or
+    removed from the workspaces in the environment.
+
+    It contains the workspace paths from the environment and the modification
+    times of the folders that catkin_find searches.
+    """
+    key_parts = []
+    for env_name in ['CMAKE_PREFIX_PATH', 'ROS_PACKAGE_PATH']:
+        for path in os.environ.get(env_name, '').split(os.pathsep):
+            if not path:
+                continue
+            for folder in [path, os.path.join(path, 'lib'),
+                           os.path.join(path, 'share')]:
+                try:
+                    mtime = os.stat(folder).st_mtime
+                except OSError:
+                    mtime = None
+                key_parts.append(folder + '@' + repr(mtime))
+    return ':'.join(key_parts)
+
+
+def _loadCatkinFindCacheFile(cache_file, workspace_key):
+    try:
+        cache = loadYaml(cache_file)
+    except (IOError, OSError, yaml.YAMLError):
+        return {}
+    if not isinstance(cache, dict) or \
+            cache.get('workspace_key') != workspace_key:
+        return {}
+    return cache.get('packages') or {}
+
+
+def _writeCatkinFindCacheFile(cache_file, workspace_key, packages):
+    # Write to a temporary file first so that other processes never read a
+    # partially written cache.
+    temp_file = cache_file + '.' + str(os.getpid()) + '.tmp'
+    try:
+        dumpYaml({
+            'workspace_key': workspace_key,
+            'packages': packages
+        }, temp_file)
+        os.rename(temp_file, cache_file)
+    except (IOError, OSError) as ex:
+        logging.getLogger(__name__).warning(
+            "Could not write catkin_find cache %s: %s", cache_file, ex)
 
 
 def catkinFind(package_name):
-    return subprocess.check_output(["catkin_find",
-                                    package_name]).decode('ascii').split()
+    """Returns the folders of a package as found by catkin_find.
+
+    The result is memoized, so catkin_find is only run once per package and
+    process. If the environment variable EVALUATION_TOOLS_CATKIN_CACHE is set
+    to a file path, the results are also stored in this file and reused by
+    other processes until a workspace of the environment changes.
+    """
+    with _catkin_find_lock:
+        if package_name in _catkin_find_results:
+            return list(_catkin_find_results[package_name])
+
+        cache_file = os.environ.get(CATKIN_FIND_CACHE_ENV)
+        workspace_key = None
+        cached_packages = {}
+        if cache_file:
+            workspace_key = _getWorkspaceKey()
+            cached_packages = _loadCatkinFindCacheFile(
+                cache_file, workspace_key)
+        if package_name in cached_packages:
+            folders = cached_packages[package_name]
+        else:
+            folders = subprocess.check_output(
+                ["catkin_find", package_name]).decode('ascii').split()
+            if cache_file:
+                cached_packages[package_name] = folders
+                _writeCatkinFindCacheFile(cache_file, workspace_key,
+                                          cached_packages)
+        _catkin_find_results[package_name] = folders
+        return list(folders)
+
+
+def clearCatkinFindCache():
+    """Forgets the memoized catkin_find results of this process."""
+    with _catkin_find_lock:
+        _catkin_find_results.clear()
 
 
 def catkinFindSubfolder(package_name, req_sub_folder):
@@ -78,7 +168,88 @@ def catkinFindExperimentsFolder():
     return ''
 
 
+def _findGitDir(folder):
+    """Returns the git directory of the repository that contains folder or
+    None."""
+    folder = os.path.abspath(folder)
+    while True:
+        git_path = os.path.join(folder, '.git')
+        if os.path.isdir(git_path):
+            return git_path
+        if os.path.isfile(git_path):
+            # Submodules and worktrees: '.git' is a file with the path of the
+            # git directory.
+            with open(git_path, 'r') as in_file_stream:
+                content = in_file_stream.read().strip()
+            if not content.startswith('gitdir:'):
+                return None
+            return os.path.normpath(
+                os.path.join(folder, content[len('gitdir:'):].strip()))
+        parent_folder = os.path.dirname(folder)
+        if parent_folder == folder:
+            return None
+        folder = parent_folder
+
+
+def _resolveGitRef(git_dir, ref):
+    """Returns the commit hash of a ref like 'refs/heads/master' or None."""
+    # Worktrees store their HEAD in git_dir, but the refs in the common dir.
+    ref_dirs = [git_dir]
+    common_dir_file = os.path.join(git_dir, 'commondir')
+    if os.path.isfile(common_dir_file):
+        with open(common_dir_file, 'r') as in_file_stream:
+            ref_dirs.append(
+                os.path.normpath(
+                    os.path.join(git_dir, in_file_stream.read().strip())))
+
+    for ref_dir in ref_dirs:
+        ref_file = os.path.join(ref_dir, ref)
+        if os.path.isfile(ref_file):
+            with open(ref_file, 'r') as in_file_stream:
+                content = in_file_stream.read().strip()
+            if content.startswith('ref:'):
+                return _resolveGitRef(git_dir, content[len('ref:'):].strip())
+            return content
+    for ref_dir in ref_dirs:
+        packed_refs_file = os.path.join(ref_dir, 'packed-refs')
+        if not os.path.isfile(packed_refs_file):
+            continue
+        with open(packed_refs_file, 'r') as in_file_stream:
+            for line in in_file_stream:
+                if line.startswith('#') or line.startswith('^'):
+                    continue
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    return None
+
+
+def _readGitRevision(folder):
+    """Returns the commit hash of HEAD of the repository that contains folder
+    by reading the files in the git directory or None if it can't be read."""
+    git_dir = _findGitDir(folder)
+    if git_dir is None:
+        return None
+    try:
+        with open(os.path.join(git_dir, 'HEAD'), 'r') as in_file_stream:
+            head = in_file_stream.read().strip()
+        if head.startswith('ref:'):
+            return _resolveGitRef(git_dir, head[len('ref:'):].strip())
+        return head
+    except (IOError, OSError):
+        return None
+
+
 def getRevString(cwd_folder):
+    """Returns the commit hash of HEAD of the git repository that contains
+    cwd_folder.
+
+    The hash is read directly from the git directory. git is only run if this
+    fails, e.g. for repositories that use a different ref storage.
+    """
+    revision = _readGitRevision(cwd_folder)
+    if revision is not None and len(revision) in [40, 64]:
+        return revision
     rev_cmd = ["git", "rev-parse", "HEAD"]
     out_lines = subprocess.check_output(
         rev_cmd, cwd=cwd_folder).decode('ascii').split()
@@ -1,22 +1,114 @@
 #!/usr/bin/env python
 
+from collections import namedtuple
+import errno
 import logging
 import os
+import shlex
+import signal
+import subprocess
+import time
+
+from evaluation_tools.process_sampler import (getProcessTree,
+                                              getProcessTreeStats)
+
+try:
+    from shlex import quote
+except ImportError:
+    from pipes import quote
+
+# Result of a finished command.
+# - command: list of arguments of the command.
+# - exit_code: exit code of the command. If the command was terminated by a
+#       signal, this is 128 + <signal number> like in a shell.
+# - signal: number of the signal that terminated the command or None.
+# - wall_time: wall time in seconds between starting the command and
+#       detecting its termination.
+# - log_file: file that contains stdout and stderr of the command or None if
+#       the output was not redirected.
+# - user_time, system_time: CPU time in seconds spent in user and system mode
+#       by the command and all its child processes that it waited for.
+# - max_rss_kb: peak resident set size in kilobytes of the command or its
+#       largest child process. Since the command is forked from this Python
+#       process, this is never smaller than the size of the forked process
+#       before it executed the command.
+# - voluntary_context_switches, involuntary_context_switches: number of
+#       context switches of the command and its child processes.
+# - termination_reason: TERMINATION_TIMEOUT or TERMINATION_STALLED if the
+#       command was killed by RunningCommand.wait(), otherwise None.
+CommandResult = namedtuple(
+    'CommandResult', 'command exit_code signal wall_time log_file user_time '
+    'system_time max_rss_kb voluntary_context_switches '
+    'involuntary_context_switches termination_reason')
+
+TERMINATION_TIMEOUT = 'timeout'
+TERMINATION_STALLED = 'stalled'
+
+# Time in seconds a killed command gets to exit after SIGTERM before it is
+# killed with SIGKILL.
+KILL_GRACE_PERIOD_S = 10.
+
+
+def getResourceUsageDict(result):
+    """Returns the resource usage of a CommandResult as a dictionary that
+    can be written to yaml."""
+    resource_usage = {
+        'exit_code': result.exit_code,
+        'wall_time_s': round(result.wall_time, 3),
+        'user_time_s': round(result.user_time, 3),
+        'system_time_s': round(result.system_time, 3),
+        'max_rss_kb': result.max_rss_kb,
+        'voluntary_context_switches': result.voluntary_context_switches,
+        'involuntary_context_switches': result.involuntary_context_switches
+    }
+    if result.termination_reason is not None:
+        resource_usage['termination_reason'] = result.termination_reason
+    return resource_usage
 
 
 class CommandRunnerException(BaseException):
-    def __init__(self, command, return_value):
+    def __init__(self, command, return_value, log_file=None, result=None):
         BaseException.__init__(self)
         self.command = command
         self.return_value = return_value
+        self.log_file = log_file
+        # CommandResult of the command if it was started.
+        self.result = result
+
+    @property
+    def termination_reason(self):
+        if self.result is None:
+            return None
+        return self.result.termination_reason
+
+    def getStatus(self):
+        """Returns the termination reason if the command was killed because it
+        timed out or stalled, otherwise the exit code."""
+        if self.termination_reason is not None:
+            return self.termination_reason
+        return self.return_value
 
     def __str__(self):
-        return 'Command "' + self.command + \
-            '" returned with a non-zero exit code: ' + str(self.return_value)
+        if self.termination_reason == TERMINATION_TIMEOUT:
+            message = 'Command "' + self.command + '" timed out'
+        elif self.termination_reason == TERMINATION_STALLED:
+            message = 'Command "' + self.command + '" stalled and was killed'
+        else:
+            message = 'Command "' + self.command + \
+                '" returned with a non-zero exit code: ' + \
+                str(self.return_value)
+        if self.log_file is not None:
+            message += ' (see ' + self.log_file + ')'
+        return message
 
 
-def runCommand(exec_path, params_dict=None):
-    """Runs a system command with parameters coming from a python dictionary.
+def quoteCommand(command):
+    """Returns the argument list of a command as a shell-quoted string."""
+    return ' '.join(quote(arg) for arg in command)
+
+
+def buildCommand(exec_path, params_dict=None):
+    """Builds the argument list of a command.
 
     Input:
     - exec_path: path to the executable. Can optionally be of the form
@@ -25,45 +117,257 @@ def runCommand(exec_path, params_dict=None):
         additional arguments for the command.
 
     Assuming params_dict contains {key1: value1, key2: value2, ...}, the
-    command that is executed will be of the form:
-      <exec_path> --<key1>=<value1> --<key2>=<value2> ...
+    argument list will be of the form:
+      [<exec_path>, --<key1>=<value1>, --<key2>=<value2>, ...]
 
-    Note: if <value> contains a space, the key-value pair will be appended as
-    '--<key> <value>'. This is to support the nargs option of Python's
-    argparse.
+    Note: if <value> contains a space, it is split like a shell would split it
+    and the key-value pair is appended as '--<key>', <value parts>. If <value>
+    is a list, every element is passed as a separate argument after '--<key>'.
+    This is to support the nargs option of Python's argparse.
 
-    If no file under exec_path can be found or the command returns a non-zero
-    exit code, an exception will be raised.
+    If no file under exec_path can be found, a ValueError is raised.
     """
     if params_dict is None:
         params_dict = {}
-    cmd_seq = []
-    if exec_path and (os.path.isfile(exec_path)
-                      or exec_path.startswith('rosrun')):
-        cmd_seq.append(exec_path)
+    if exec_path and exec_path.startswith('rosrun'):
+        command = shlex.split(exec_path)
+    elif exec_path and os.path.isfile(exec_path):
+        command = [exec_path]
     else:
-        raise ValueError("No file under " + exec_path + " exists.")
+        raise ValueError("No file under " + str(exec_path) + " exists.")
 
     for param in params_dict:
-        param_value = str(params_dict[param])
+        param_value = params_dict[param]
+        if isinstance(param_value, (list, tuple)):
+            command.append("--" + param)
+            command.extend(str(value) for value in param_value)
+            continue
+        param_value = str(param_value)
         if ' ' not in param_value:
             # Use '--name=value' per default because gflags does not recognize
             # spaces (as in '--name value') in some cases (bool flags).
-            separator = '='
+            command.append("--" + param + "=" + param_value)
         else:
             # Do not use '=' as separator if the value contains spaces to
             # support Python argparse's nargs option.
-            separator = ' '
-        cmd_seq.append("--" + param + separator + param_value)
+            command.append("--" + param)
+            command.extend(shlex.split(param_value))
+    return command
+
+
+class RunningCommand(object):
+    """A command that runs in a child process, see launchCommand().
+
+    If log_file is set, stdout and stderr of the command are appended to this
+    file. The output is written directly by the child process, so no output is
+    buffered in this process.
+    """
+
+    def __init__(self, command, log_file=None):
+        self.command = command
+        self.log_file = log_file
+        self.result = None
+        self._termination_reason = None
+
+        log_file_stream = None
+        if log_file is not None:
+            log_folder = os.path.dirname(log_file)
+            if log_folder and not os.path.isdir(log_folder):
+                os.makedirs(log_folder)
+            log_file_stream = open(log_file, 'ab')
+            log_file_stream.write(
+                ('$ ' + quoteCommand(command) + '\n').encode('utf-8'))
+            log_file_stream.flush()
+
+        self.start_time = time.time()
+        try:
+            self.process = subprocess.Popen(
+                command,
+                stdout=log_file_stream,
+                stderr=subprocess.STDOUT if log_file_stream else None,
+                close_fds=True)
+        except OSError as ex:
+            logging.getLogger(__name__).error(
+                "Failed to start command %s: %s", quoteCommand(command), ex)
+            # Same exit code as a shell that can't execute the command.
+            raise CommandRunnerException(quoteCommand(command), 127, log_file)
+        finally:
+            if log_file_stream is not None:
+                # The child process holds its own copy of the file descriptor.
+                log_file_stream.close()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def poll(self):
+        """Returns the CommandResult if the command finished, otherwise
+        None."""
+        if self.result is None:
+            self._wait(os.WNOHANG)
+        return self.result
+
+    def wait(self, timeout_s=None, stall_timeout_s=None):
+        """Blocks until the command finished and returns its CommandResult.
+
+        Input:
+        - timeout_s: if set, the command and all its child processes are
+              killed once the command ran longer than this many seconds.
+        - stall_timeout_s: if set, the command and all its child processes are
+              killed if neither the log file grew nor the processes used any
+              CPU time for this many seconds.
 
+        The termination_reason of the result tells if the command was killed.
+        """
+        if timeout_s is None and stall_timeout_s is None:
+            while self.result is None:
+                self._wait(0)
+            return self.result
+
+        check_period_s = min(1., 0.1 * min(
+            limit for limit in [timeout_s, stall_timeout_s]
+            if limit is not None))
+        last_progress = None
+        last_progress_time = time.time()
+        while self.poll() is None:
+            now = time.time()
+            if timeout_s is not None and now - self.start_time > timeout_s:
+                self.kill(TERMINATION_TIMEOUT)
+                break
+            if stall_timeout_s is not None:
+                progress = self._getProgress()
+                if progress != last_progress:
+                    last_progress = progress
+                    last_progress_time = now
+                elif now - last_progress_time > stall_timeout_s:
+                    self.kill(TERMINATION_STALLED)
+                    break
+            time.sleep(check_period_s)
+        return self.wait()
+
+    def kill(self, termination_reason):
+        """Terminates the command and all its child processes.
+
+        The processes are first sent SIGTERM and then SIGKILL if they did not
+        exit within KILL_GRACE_PERIOD_S.
+        """
+        if self.poll() is not None:
+            return
+        logging.getLogger(__name__).warning(
+            "Killing command %s (%s) after %.1fs.", quoteCommand(self.command),
+            termination_reason, time.time() - self.start_time)
+        self._termination_reason = termination_reason
+        # The process tree is collected before sending any signal, because
+        # the children are re-parented once the command exited.
+        pids = getProcessTree(self.process.pid)
+        self._sendSignal(pids, signal.SIGTERM)
+        kill_time = time.time() + KILL_GRACE_PERIOD_S
+        while self.poll() is None and time.time() < kill_time:
+            time.sleep(0.1)
+        self._sendSignal(pids, signal.SIGKILL)
+
+    def _sendSignal(self, pids, signal_number):
+        for pid in pids:
+            if pid == self.process.pid and self.result is not None:
+                # Already reaped, the pid might have been reused.
+                continue
+            try:
+                os.kill(pid, signal_number)
+            except OSError:
+                # The process already exited.
+                pass
+
+    def _getProgress(self):
+        """Returns the size of the log file and the CPU time used by the
+        process tree of the command. These stop changing if the command
+        stalls."""
+        log_size = None
+        if self.log_file is not None:
+            try:
+                log_size = os.path.getsize(self.log_file)
+            except OSError:
+                pass
+        stats = getProcessTreeStats(self.process.pid)
+        return log_size, stats[0] if stats is not None else None
+
+    def _wait(self, options):
+        """Reaps the child process with wait4 to obtain its resource usage."""
+        try:
+            pid, status, rusage = os.wait4(self.process.pid, options)
+        except OSError as ex:
+            if ex.errno == errno.EINTR:
+                return
+            raise
+        if pid == 0:
+            return
+        wall_time = time.time() - self.start_time
+
+        if os.WIFSIGNALED(status):
+            signal_number = os.WTERMSIG(status)
+            exit_code = 128 + signal_number
+            self.process.returncode = -signal_number
+        else:
+            signal_number = None
+            exit_code = os.WEXITSTATUS(status)
+            self.process.returncode = exit_code
+        self.result = CommandResult(
+            command=self.command,
+            exit_code=exit_code,
+            signal=signal_number,
+            wall_time=wall_time,
+            log_file=self.log_file,
+            user_time=rusage.ru_utime,
+            system_time=rusage.ru_stime,
+            max_rss_kb=rusage.ru_maxrss,
+            voluntary_context_switches=rusage.ru_nvcsw,
+            involuntary_context_switches=rusage.ru_nivcsw,
+            termination_reason=self._termination_reason)
+
+
+def launchCommand(exec_path, params_dict=None, log_file=None):
+    """Starts a command without waiting for it to finish.
+
+    See buildCommand() for the description of exec_path and params_dict.
+
+    Returns a RunningCommand that can be polled or waited for, which allows
+    supervising many commands from one process.
+    """
+    command = buildCommand(exec_path, params_dict)
     logging.basicConfig(level=logging.DEBUG)
     logger = logging.getLogger(__name__)
-    logger.info("Executing command %s", cmd_seq)
-    cmd_string = ""
-    for cmd in cmd_seq:
-        cmd_string = cmd_string + cmd + " "
-    logger.info("Executing command %s", cmd_string)
-
-    return_value = os.system(cmd_string)
-    if return_value != 0:
-        raise CommandRunnerException(cmd_string, return_value)
+    logger.info("Executing command %s", quoteCommand(command))
+    if log_file is not None:
+        logger.info("Writing output of command to %s", log_file)
+    return RunningCommand(command, log_file)
+
+
+def runCommand(exec_path,
+               params_dict=None,
+               log_file=None,
+               timeout_s=None,
+               stall_timeout_s=None):
+    """Runs a system command with parameters coming from a python dictionary.
+
+    Input:
+    - exec_path: path to the executable. Can optionally be of the form
+        `rosrun package app`.
+    - params_dict: dictionary in the form {key: value} which contains the
+        additional arguments for the command. See buildCommand() for how the
+        arguments are formed.
+    - log_file: if set, stdout and stderr of the command are appended to this
+        file instead of being printed to the terminal.
+    - timeout_s, stall_timeout_s: limits after which the command is killed,
+        see RunningCommand.wait().
+
+    Return value: CommandResult of the command.
+
+    If no file under exec_path can be found, a ValueError is raised. If the
+    command returns a non-zero exit code or is killed, a CommandRunnerException
+    is raised.
+    """
+    result = launchCommand(exec_path, params_dict, log_file).wait(
+        timeout_s, stall_timeout_s)
+    if result.exit_code != 0:
+        raise CommandRunnerException(
+            quoteCommand(result.command), result.exit_code, log_file, result)
+    return result
@@ -12,10 +12,10 @@ import sys
 import tarfile
 import time
 import urllib
-import yaml
 
 import evaluation_tools.catkin_utils as catkin_utils
 from evaluation_tools.utils import findFileOrDir
+from evaluation_tools.yaml_io import loadDatasetList
 
 enable_download_progress_bar = True
 root_folder = ''
@@ -27,7 +27,7 @@ def getDatasetList():
     datasets_yaml = os.path.join(datasets_folder, 'datasets.yaml')
 
     if os.path.exists(datasets_yaml):
-        dataset_list = yaml.load(open(datasets_yaml, 'r'))
+        dataset_list = loadDatasetList(datasets_yaml)
 
         # Create dictonary of datasets and check if they are well formatted.
         datasets = dict()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import yaml
+
+from evaluation_tools.yaml_io import dumpYaml, loadYaml
+
+_HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+_file_hashes = {}
+_file_hashes_lock = threading.Lock()
+
+
+def getPathHash(path):
+    """Returns the sha1 of a file, or of all files inside a folder.
+
+    The hash is memoized per process, keyed by the path, size and modification
+    time of the file, so that large datasets are only read once.
+    """
+    if os.path.isdir(path):
+        sha1 = hashlib.sha1()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file_name in sorted(files):
+                file_path = os.path.join(root, file_name)
+                sha1.update(os.path.relpath(file_path, path).encode('utf-8'))
+                sha1.update(getPathHash(file_path).encode('ascii'))
+        return sha1.hexdigest()
+
+    if not os.path.isfile(path):
+        raise ValueError("File does not exist: " + path)
+    stat = os.stat(path)
+    memo_key = (os.path.realpath(path), stat.st_size, stat.st_mtime)
+    with _file_hashes_lock:
+        if memo_key in _file_hashes:
+            return _file_hashes[memo_key]
+
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as in_file_stream:
+        chunk = in_file_stream.read(_HASH_CHUNK_SIZE)
+        while chunk:
+            sha1.update(chunk)
+            chunk = in_file_stream.read(_HASH_CHUNK_SIZE)
+    file_hash = sha1.hexdigest()
+    with _file_hashes_lock:
+        _file_hashes[memo_key] = file_hash
+    return file_hash
+
+
+def _getFolderSize(folder):
+    size = 0
+    for root, _, files in os.walk(folder):
+        for file_name in files:
+            file_path = os.path.join(root, file_name)
+            if not os.path.islink(file_path):
+                size += os.path.getsize(file_path)
+    return size
+
+
+class EstimatorOutputCache(object):
+    """Cache of estimator output folders shared across experiments.
+
+    An entry is keyed by a fingerprint of everything that determines the
+    output of an estimator run: the executable, the parameters, the dataset and
+    the sensors file. On a hit, the cached output folder is copied (or
+    hardlinked) into the job instead of running the estimator again.
+
+    Layout of the cache folder:
+      <cache_folder>/<key>/output/     copy of the estimator output folder.
+      <cache_folder>/<key>/entry.yaml  description of the entry. Its
+                                       modification time is the last access
+                                       time used for the LRU eviction.
+
+    Input:
+    - cache_folder: folder in which the entries are stored.
+    - max_size_bytes: if set, the least recently used entries are removed
+          after storing a new entry until the cache is smaller than this.
+    - mode: 'copy' or 'hardlink'. With 'hardlink', restored files share their
+          data with the cache, so they must not be modified in place.
+    """
+
+    ENTRY_FILENAME = 'entry.yaml'
+    OUTPUT_FOLDER = 'output'
+
+    def __init__(self, cache_folder, max_size_bytes=None, mode='copy'):
+        logging.basicConfig(level=logging.DEBUG)
+        self.logger = logging.getLogger(__name__)
+        if mode not in ['copy', 'hardlink']:
+            raise ValueError('Unknown estimator cache mode "' + str(mode) +
+                             '", valid modes are "copy" and "hardlink".')
+        self.cache_folder = cache_folder
+        self.max_size_bytes = max_size_bytes
+        self.mode = mode
+        self._lock = threading.Lock()
+        if not os.path.isdir(self.cache_folder):
+            os.makedirs(self.cache_folder)
+
+    def computeKey(self, exec_path, params_dict, dataset_path, sensors_file):
+        """Computes the key of an estimator run.
+
+        Input:
+        - exec_path: path to the estimator executable. The content of the
+              executable is part of the key.
+        - params_dict: parameters of the estimator run. Values that depend on
+              the location of the job (e.g. <JOB_DIR>) need to be replaced by
+              their placeholders before calling this function.
+        - dataset_path: path to the dataset. Only its content is part of the
+              key.
+        - sensors_file: path to the sensors file or ''. Only its content is
+              part of the key.
+        """
+        sha1 = hashlib.sha1()
+        if os.path.isfile(exec_path):
+            sha1.update(getPathHash(exec_path).encode('ascii'))
+        else:
+            # E.g. 'rosrun package app'.
+            sha1.update(exec_path.encode('utf-8'))
+        sha1.update(
+            yaml.safe_dump(params_dict, default_flow_style=True,
+                           width=1000000).encode('utf-8'))
+        sha1.update(getPathHash(dataset_path).encode('ascii'))
+        if sensors_file:
+            sha1.update(getPathHash(sensors_file).encode('ascii'))
+        return sha1.hexdigest()
+
+    def restore(self, key, output_folder):
+        """Copies the cached output for key into output_folder.
+
+        Returns True on a cache hit and False otherwise.
+        """
+        entry_folder = os.path.join(self.cache_folder, key)
+        entry_file = os.path.join(entry_folder, self.ENTRY_FILENAME)
+        if not os.path.isfile(entry_file):
+            return False
+        try:
+            # Mark the entry as recently used.
+            os.utime(entry_file, None)
+            self._copyTree(
+                os.path.join(entry_folder, self.OUTPUT_FOLDER), output_folder,
+                self.mode == 'hardlink')
+        except (IOError, OSError):
+            # The entry was evicted by another process in the meantime.
+            self.logger.warning("Failed to restore estimator cache entry %s.",
+                                key)
+            return False
+        self.logger.info("Restored estimator output from cache entry %s.",
+                         key)
+        return True
+
+    def store(self, key, output_folder, description=None, excluded_files=()):
+        """Adds the content of output_folder to the cache under key.
+
+        The entry is first written to a temporary folder and then moved into
+        place, so concurrent readers never see partial entries.
+
+        excluded_files are paths relative to output_folder that are not
+        stored, e.g. files that belong to one run and not to its output.
+        """
+        entry_folder = os.path.join(self.cache_folder, key)
+        if os.path.isdir(entry_folder):
+            return
+        tmp_folder = '%s.tmp.%i.%i' % (entry_folder, os.getpid(),
+                                       threading.current_thread().ident)
+        try:
+            self._copyTree(output_folder,
+                           os.path.join(tmp_folder, self.OUTPUT_FOLDER),
+                           False, excluded_files)
+            entry = {
+                'created': time.strftime("%Y%m%d_%H%M%S", time.localtime()),
+                'size_bytes': _getFolderSize(tmp_folder)
+            }
+            if description:
+                entry['description'] = description
+            dumpYaml(entry, os.path.join(tmp_folder, self.ENTRY_FILENAME))
+            os.rename(tmp_folder, entry_folder)
+            self.logger.info("Stored estimator output in cache entry %s.",
+                             key)
+        except OSError:
+            # Most likely another process stored the same entry first.
+            self.logger.info("Could not store estimator cache entry %s.", key)
+        finally:
+            if os.path.isdir(tmp_folder):
+                shutil.rmtree(tmp_folder, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache is smaller
+        than max_size_bytes."""
+        if self.max_size_bytes is None:
+            return
+        with self._lock:
+            entries = []
+            for key in os.listdir(self.cache_folder):
+                entry_file = os.path.join(self.cache_folder, key,
+                                          self.ENTRY_FILENAME)
+                try:
+                    last_used = os.path.getmtime(entry_file)
+                    size = loadYaml(entry_file)['size_bytes']
+                except (IOError, OSError, TypeError, KeyError,
+                        yaml.YAMLError):
+                    continue
+                entries.append((last_used, size, key))
+
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, key in sorted(entries):
+                if total_size <= self.max_size_bytes:
+                    break
+                self.logger.info("Evicting estimator cache entry %s.", key)
+                shutil.rmtree(
+                    os.path.join(self.cache_folder, key), ignore_errors=True)
+                total_size -= size
+
+    @staticmethod
+    def _copyTree(source_folder, target_folder, hardlink, excluded_files=()):
+        """Copies the content of source_folder into target_folder, which may
+        already exist. excluded_files are paths relative to source_folder
+        that are not copied."""
+        excluded_files = set(os.path.normpath(path) for path in excluded_files)
+        for root, _, files in os.walk(source_folder):
+            target_root = os.path.join(target_folder,
+                                       os.path.relpath(root, source_folder))
+            if not os.path.isdir(target_root):
+                os.makedirs(target_root)
+            for file_name in files:
+                source_file = os.path.join(root, file_name)
+                if os.path.relpath(source_file,
+                                   source_folder) in excluded_files:
+                    continue
+                target_file = os.path.join(target_root, file_name)
+                if os.path.lexists(target_file):
+                    os.remove(target_file)
+                if hardlink:
+                    try:
+                        os.link(source_file, target_file)
+                        continue
+                    except OSError:
+                        # E.g. the cache is on another file system.
+                        pass
+                shutil.copy2(source_file, target_file)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def getEstimatorCache(cache_settings):
+    """Returns the cache for the 'estimator_cache' settings of an experiment.
+
+    cache_settings is a dictionary with the entries 'folder' and optionally
+    'max_size_gb' and 'mode'. Returns None if cache_settings is empty. Jobs
+    with the same settings share the same cache object.
+    """
+    if not cache_settings or not cache_settings.get('folder'):
+        return None
+    max_size_bytes = None
+    if cache_settings.get('max_size_gb') is not None:
+        max_size_bytes = int(float(cache_settings['max_size_gb']) * 1024**3)
+    mode = cache_settings.get('mode', 'copy')
+    cache_id = (os.path.realpath(cache_settings['folder']), max_size_bytes,
+                mode)
+    with _caches_lock:
+        if cache_id not in _caches:
+            _caches[cache_id] = EstimatorOutputCache(
+                cache_settings['folder'], max_size_bytes, mode)
+        return _caches[cache_id]
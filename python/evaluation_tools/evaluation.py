@@ -5,12 +5,12 @@ from __future__ import print_function
 import argparse
 import logging
 import os
-import yaml
 
 import evaluation_tools.catkin_utils as catkin_utils
-from evaluation_tools.command_runner import CommandRunnerException, runCommand
+from evaluation_tools.command_runner import CommandRunnerException
 from evaluation_tools.job import Job
 import evaluation_tools.utils as eval_utils
+from evaluation_tools.yaml_io import dumpYaml
 
 
 class Evaluation(object):
@@ -30,13 +30,27 @@ class Evaluation(object):
         else:
             self.logger.info("No evaluation scripts in job.")
 
-    def runEvaluations(self):
+    def runEvaluations(self, evaluation_scripts=None):
+        """Runs the evaluation scripts of the job.
+
+        Input:
+        - evaluation_scripts: subset of self.evaluation_scripts to run. All
+              evaluation scripts are run if this is None.
+
+        Return value: dictionary with the exit code of each evaluation script,
+        or its termination reason if it timed out or stalled.
+        """
+        if evaluation_scripts is None:
+            evaluation_scripts = self.evaluation_scripts
         evaluation_script_results = {}
-        additional_dataset_parameters_str = yaml.dump(
-            self.job.dataset_additional_parameters, width=10000)
-        additional_dataset_parameters_str = \
-            '"' + additional_dataset_parameters_str + '"'
-        for evaluation in self.evaluation_scripts:
+        # Passed as a single argument, see command_runner.buildCommand().
+        additional_dataset_parameters_arg = [
+            dumpYaml(
+                self.job.dataset_additional_parameters,
+                default_flow_style=None,
+                width=10000)
+        ]
+        for evaluation in evaluation_scripts:
             self.logger.info("=== Run Evaluation ===")
             if 'name' in evaluation:
                 if 'package' in evaluation:
@@ -68,7 +82,7 @@ class Evaluation(object):
                 "job_dir": self.job_dir,
                 "localization_map": self.job.info['localization_map'],
                 "additional_dataset_parameters":
-                additional_dataset_parameters_str
+                additional_dataset_parameters_arg
             }
             if 'arguments' in evaluation:
                 for argument_name, value in evaluation[
@@ -79,12 +93,14 @@ class Evaluation(object):
                     params_dict[argument_name] = value
             if "parameter_file" in self.job.info:
                 params_dict["parameter_file"] = self.job.info["parameter_file"]
-            params_dict["dataset_paths"] = ' '.join(self.job.dataset_paths)
-            params_dict["dataset_log_dirs"] = ' '.join(
-                self.job.dataset_log_dirs)
+            params_dict["dataset_paths"] = self.job.dataset_paths
+            params_dict["dataset_log_dirs"] = self.job.dataset_log_dirs
             try:
-                runCommand(
-                    evaluation_script_with_path, params_dict=params_dict)
+                self.job.runJobCommand(
+                    'evaluation',
+                    'evaluation_' + os.path.basename(evaluation['name']),
+                    evaluation_script_with_path,
+                    params_dict=params_dict)
                 evaluation_script_results[evaluation['name']] = 0
             except CommandRunnerException as ex:
                 print(
@@ -92,10 +108,10 @@ class Evaluation(object):
                     evaluation['name'],
                     '" from job "',
                     self.job.job_name,
-                    '" exited with non-zero return value: ',
-                    ex.return_value,
+                    '" failed: ',
+                    ex.getStatus(),
                     sep='')
-                evaluation_script_results[evaluation['name']] = ex.return_value
+                evaluation_script_results[evaluation['name']] = ex.getStatus()
 
         return evaluation_script_results
 
@@ -1,5 +1,6 @@
 import argparse
-import yaml
+
+from evaluation_tools.yaml_io import loadYamlString
 
 
 class EvaluationArgParse(object):
@@ -11,4 +12,4 @@ class EvaluationArgParse(object):
         self.parser.add_argument('--dataset_paths', default='', nargs='+')
         self.parser.add_argument('--dataset_log_dirs', default='', nargs='+')
         self.parser.add_argument(
-            '--additional_dataset_parameters', type=yaml.load)
+            '--additional_dataset_parameters', type=loadYamlString)
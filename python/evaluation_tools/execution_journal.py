@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+import logging
+import os
+import threading
+import yaml
+
+from evaluation_tools.yaml_io import dumpYaml, loadYamlString
+
+
+class ExecutionJournal(object):
+    """Append-only record of the job stages that were run in an experiment.
+
+    Every time a stage of a job (estimator, console, evaluation, statistics)
+    finishes, one line of the form
+      - {job: <job_name>, stage: <stage_name>, results: {<label>: <exit code>}}
+    is appended to the journal file. The file is therefore always a valid YAML
+    list, and a run that was interrupted loses at most the line that was being
+    written: a partially written last line is cut off when the journal is
+    loaded, so the next entry starts on a new line.
+
+    The journal is used to resume an experiment: stages whose last entry only
+    contains zero exit codes don't need to be run again.
+    """
+
+    def __init__(self, journal_file):
+        logging.basicConfig(level=logging.DEBUG)
+        self.logger = logging.getLogger(__name__)
+        self.journal_file = journal_file
+        self._lock = threading.Lock()
+        self._results = {}
+
+        if os.path.isfile(self.journal_file):
+            self._load()
+
+    def _load(self):
+        with open(self.journal_file, 'rb+') as in_file_stream:
+            content = in_file_stream.read()
+            if content and not content.endswith(b'\n'):
+                self.logger.warning(
+                    "Removing the partially written last line of the "
+                    "execution journal %s.", self.journal_file)
+                in_file_stream.truncate(content.rfind(b'\n') + 1)
+        with open(self.journal_file, 'r') as in_file_stream:
+            for line_number, line in enumerate(in_file_stream):
+                if not line.strip():
+                    continue
+                try:
+                    entry = loadYamlString(line)[0]
+                    self._results[(entry['job'],
+                                   entry['stage'])] = entry['results']
+                except (yaml.YAMLError, TypeError, KeyError, IndexError):
+                    # Most likely a line that was only partially written when
+                    # the experiment was interrupted.
+                    self.logger.warning(
+                        "Ignoring malformed line %i of the execution journal "
+                        "%s.", line_number + 1, self.journal_file)
+        self.logger.info("Loaded %i entries from the execution journal %s.",
+                         len(self._results), self.journal_file)
+
+    def record(self, job_name, stage_name, results):
+        """Appends the results of a finished stage to the journal.
+
+        Input:
+        - job_name: name of the job.
+        - stage_name: name of the stage that finished.
+        - results: dictionary with the exit code of every command of the stage
+              that is reported in the evaluation results. Can be empty.
+        """
+        entry = {'job': job_name, 'stage': stage_name, 'results': results}
+        line = '- ' + dumpYaml(
+            entry, default_flow_style=True, width=1000000).strip() + '\n'
+        with self._lock:
+            self._results[(job_name, stage_name)] = results
+            journal_folder = os.path.dirname(self.journal_file)
+            if journal_folder and not os.path.isdir(journal_folder):
+                os.makedirs(journal_folder)
+            with open(self.journal_file, 'a') as out_file_stream:
+                out_file_stream.write(line)
+                out_file_stream.flush()
+                os.fsync(out_file_stream.fileno())
+
+    def getResults(self, job_name, stage_name):
+        """Returns the results of the last run of the stage or None if the
+        stage was never recorded."""
+        with self._lock:
+            return self._results.get((job_name, stage_name))
+
+    def hasSucceeded(self, job_name, stage_name):
+        """Returns True if the last run of the stage has only zero exit
+        codes."""
+        results = self.getResults(job_name, stage_name)
+        if results is None:
+            return False
+        return all(exit_code == 0 for exit_code in results.values())
@@ -0,0 +1,483 @@
+#!/usr/bin/env python
+"""Static HTML report of the summarized metrics of an experiment.
+
+The report folder can be opened in a browser without a server:
+- index.html: the page, the same for every report.
+- report_index.js: the datasets, parameter files and metrics of the report.
+- metrics/: one chunk per metric with its statistics per parameter file and
+      per dataset and parameter file. The page only loads the chunk of the
+      metric that is shown, so it opens instantly also for large experiments.
+
+The chunks are JSON wrapped in a function call, because browsers don't allow
+a page opened from a file to fetch other files. The hashes of the chunks are
+stored in REPORT_HASHES_FILENAME; updating a report only creates and writes the
+chunks of the metrics whose statistics changed and removes the chunks of the
+metrics that are gone.
+"""
+
+import argparse
+from collections import defaultdict
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+
+import numpy as np
+
+from evaluation_tools.metric_store import MetricStore
+from evaluation_tools.simple_summarization import (
+    SUMMARY_CACHE_FILENAME, SUMMARY_QUANTILES, SimpleSummarization,
+    alphanum_key, getStatsFilesInFolder)
+
+REPORT_HASHES_FILENAME = 'report_hashes.json'
+
+REPORT_INDEX_FILENAME = 'report_index.js'
+
+METRICS_FOLDER = 'metrics'
+
+# Significant digits of the values in the chunks.
+_SIGNIFICANT_DIGITS = 6
+
+# Part of the hashes of the chunks, change it when the chunks change to write
+# all chunks again.
+_REPORT_VERSION = 1
+
+_INDEX_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Experiment report</title>
+<style>
+body { font-family: sans-serif; margin: 0; display: flex; height: 100vh; }
+#sidebar { width: 300px; overflow-y: auto; border-right: 1px solid #ccc;
+  padding: 8px; box-sizing: border-box; }
+#sidebar input { width: 100%; box-sizing: border-box; }
+#metrics { list-style: none; padding: 0; }
+#metrics li { cursor: pointer; padding: 2px 4px; word-break: break-all; }
+#metrics li:hover, #metrics li.selected { background: #dde6f0; }
+#content { flex: 1; overflow: auto; padding: 8px 16px; }
+table { border-collapse: collapse; margin-bottom: 16px; }
+th, td { border: 1px solid #ccc; padding: 2px 6px; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.missing { color: #aaa; }
+</style>
+</head>
+<body>
+<div id="sidebar">
+  <input id="filter" type="text" placeholder="Filter metrics">
+  <ul id="metrics"></ul>
+</div>
+<div id="content"></div>
+<script>
+var report = {index: null, chunks: {}, callbacks: {}};
+
+function loadReportIndex(index) {
+  report.index = index;
+}
+
+function loadReportChunk(name, chunk) {
+  report.chunks[name] = chunk;
+  var callback = report.callbacks[name];
+  delete report.callbacks[name];
+  if (callback) {
+    callback(chunk);
+  }
+}
+
+function escapeHtml(text) {
+  return String(text).replace(/&/g, '&amp;').replace(/</g, '&lt;')
+      .replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+}
+
+function formatValue(value) {
+  return value === null ? '<span class="missing">-</span>' : String(value);
+}
+
+function getChunk(metric, callback) {
+  if (report.chunks[metric.name]) {
+    callback(report.chunks[metric.name]);
+    return;
+  }
+  report.callbacks[metric.name] = callback;
+  var script = document.createElement('script');
+  script.src = metric.chunk + '?' + metric.hash;
+  script.onerror = function() {
+    document.getElementById('content').innerHTML =
+        '<p>Failed to load ' + escapeHtml(metric.chunk) + '.</p>';
+  };
+  document.head.appendChild(script);
+}
+
+function renderOverview() {
+  var index = report.index;
+  var html = '<h1>Experiment report</h1><p>' + index.num_jobs + ' jobs, ' +
+      index.metrics.length + ' metrics.</p>';
+  [['Parameter files', index.parameter_files], ['Datasets', index.datasets]]
+      .forEach(function(entry) {
+    html += '<details><summary>' + entry[0] + ' (' + entry[1].length +
+        ')</summary><ul>' + entry[1].map(function(label) {
+          return '<li>' + escapeHtml(label) + '</li>';
+        }).join('') + '</ul></details>';
+  });
+  document.getElementById('content').innerHTML = html;
+}
+
+function renderBars(chunk) {
+  // Horizontal bars with the means and whiskers of +- one stddev.
+  var summary = chunk.summary;
+  var low = 0, high = 0;
+  summary.mean.forEach(function(mean, i) {
+    var stddev = summary.stddev[i] || 0;
+    low = Math.min(low, mean - stddev);
+    high = Math.max(high, mean + stddev);
+  });
+  var width = 400, bar = 18, label = 220;
+  var scale = high > low ? width / (high - low) : 0;
+  var x = function(value) { return label + (value - low) * scale; };
+  var svg = '<svg width="' + (label + width + 10) + '" height="' +
+      (bar * chunk.parameter_files.length + 4) + '">';
+  chunk.parameter_files.forEach(function(parameterFile, i) {
+    var mean = summary.mean[i], stddev = summary.stddev[i] || 0;
+    var y = i * bar + 2;
+    svg += '<text x="' + (label - 4) + '" y="' + (y + bar - 5) +
+        '" text-anchor="end" font-size="12">' + escapeHtml(parameterFile) +
+        '</text><rect x="' + Math.min(x(0), x(mean)) + '" y="' + (y + 2) +
+        '" width="' + Math.abs(x(mean) - x(0)) + '" height="' + (bar - 4) +
+        '" fill="#6b9bc9"><title>' + mean + '</title></rect><line x1="' +
+        x(mean - stddev) + '" x2="' + x(mean + stddev) + '" y1="' +
+        (y + bar / 2) + '" y2="' + (y + bar / 2) + '" stroke="black"/>';
+  });
+  return svg + '</svg>';
+}
+
+function renderMetric(metric) {
+  getChunk(metric, function(chunk) {
+    var statistics = ['count', 'mean', 'stddev', 'min', 'max']
+        .concat(chunk.quantiles);
+    var html = '<h2>' + escapeHtml(metric.name) + '</h2>' + renderBars(chunk);
+    html += '<table><tr><th>parameter file</th>' +
+        statistics.map(function(statistic) {
+          return '<th>' + statistic + '</th>';
+        }).join('') + '</tr>';
+    chunk.parameter_files.forEach(function(parameterFile, i) {
+      html += '<tr><td>' + escapeHtml(parameterFile) + '</td>' +
+          statistics.map(function(statistic) {
+            return '<td>' + formatValue(chunk.summary[statistic][i]) + '</td>';
+          }).join('') + '</tr>';
+    });
+    html += '</table><h3>Mean per dataset</h3><table><tr><th>dataset</th>' +
+        chunk.parameter_files.map(function(parameterFile) {
+          return '<th>' + escapeHtml(parameterFile) + '</th>';
+        }).join('') + '</tr>';
+    chunk.datasets.forEach(function(dataset, i) {
+      html += '<tr><td>' + escapeHtml(dataset) + '</td>' +
+          chunk.per_dataset.mean[i].map(function(mean, j) {
+            return '<td title="count: ' + chunk.per_dataset.count[i][j] +
+                ', stddev: ' + chunk.per_dataset.stddev[i][j] + '">' +
+                formatValue(mean) + '</td>';
+          }).join('') + '</tr>';
+    });
+    document.getElementById('content').innerHTML = html + '</table>';
+  });
+}
+
+function renderMetricList() {
+  var filter = document.getElementById('filter').value.toLowerCase();
+  var selected = decodeURIComponent(location.hash.slice(1));
+  var list = document.getElementById('metrics');
+  list.innerHTML = '';
+  report.index.metrics.forEach(function(metric) {
+    if (metric.name.toLowerCase().indexOf(filter) < 0) {
+      return;
+    }
+    var item = document.createElement('li');
+    item.textContent = metric.name;
+    item.title = metric.num_parameter_files + ' parameter files, ' +
+        metric.num_datasets + ' datasets';
+    if (metric.name === selected) {
+      item.className = 'selected';
+    }
+    item.onclick = function() {
+      location.hash = encodeURIComponent(metric.name);
+    };
+    list.appendChild(item);
+  });
+}
+
+function showSelection() {
+  var selected = decodeURIComponent(location.hash.slice(1));
+  var metrics = report.index.metrics.filter(function(metric) {
+    return metric.name === selected;
+  });
+  renderMetricList();
+  if (metrics.length) {
+    renderMetric(metrics[0]);
+  } else {
+    renderOverview();
+  }
+}
+
+var indexScript = document.createElement('script');
+indexScript.src = 'report_index.js?' + Date.now();
+indexScript.onload = function() {
+  document.getElementById('filter').oninput = renderMetricList;
+  window.onhashchange = showSelection;
+  showSelection();
+};
+document.head.appendChild(indexScript);
+</script>
+</body>
+</html>
+"""
+
+
+def _roundValue(value):
+    """Returns value rounded to _SIGNIFICANT_DIGITS or None for NaN, which
+    JSON can't represent."""
+    if value is None or math.isnan(value):
+        return None
+    return float('%.*g' % (_SIGNIFICANT_DIGITS, value))
+
+
+def _roundValues(values, mask=None):
+    """Returns a (nested) list of the rounded values, None where not mask."""
+    values = np.asarray(values, dtype=np.float64)
+    if mask is not None:
+        values = np.where(mask, values, np.nan)
+    if values.ndim > 1:
+        return [_roundValues(row) for row in values]
+    return [_roundValue(value) for value in values.tolist()]
+
+
+def _writeFileAtomically(path, content):
+    temp_file = path + '.' + str(os.getpid()) + '.tmp'
+    with open(temp_file, 'w') as out_file_stream:
+        out_file_stream.write(content)
+    os.rename(temp_file, path)
+
+
+def _getStringLabels(metric_store):
+    """Returns the labels of a MetricStore as strings. E.g. the dataset is
+    None if prepare_statistics.py wasn't given one."""
+    return [[
+        label if isinstance(label, (str, type(u''))) else str(label)
+        for label in labels
+    ] for labels in metric_store.labels]
+
+
+def getChunkPath(metric):
+    """Returns the path of the chunk of a metric relative to the report
+    folder. The hash keeps the paths of metrics unique whose names only
+    differ in characters that are replaced."""
+    return METRICS_FOLDER + '/' + re.sub(
+        r'[^\w.-]', '_', metric)[:64] + '_' + hashlib.sha1(
+            metric.encode('utf-8')).hexdigest()[:8] + '.js'
+
+
+class HtmlReport(object):
+    """Writes and updates a static HTML report of a MetricStore, see the
+    module documentation."""
+
+    def __init__(self, report_folder):
+        logging.basicConfig(level=logging.DEBUG)
+        self.logger = logging.getLogger(__name__)
+        self.report_folder = report_folder
+
+    @staticmethod
+    def _getInputHashes(metric_store):
+        """Returns a hash of everything a chunk is created from for every
+        metric of a MetricStore, so unchanged chunks aren't created again."""
+        labels_hash = hashlib.sha1(
+            json.dumps([_REPORT_VERSION] +
+                       _getStringLabels(metric_store)[:2]).encode(
+                'utf-8')).digest()
+        # One contiguous (metrics, datasets, parameter files) copy per array.
+        arrays = [
+            np.ascontiguousarray(np.moveaxis(getattr(metric_store, name), 2, 0))
+            for name in MetricStore._ARRAYS
+        ]
+        metric_sketches = defaultdict(list)
+        for cell, sketch in sorted(metric_store.sketches.items()):
+            metric_sketches[cell[2]].append([cell[:2], sketch.toDict()])
+
+        hashes = []
+        for metric_index, metric in enumerate(
+                _getStringLabels(metric_store)[2]):
+            hasher = hashlib.sha1(labels_hash)
+            hasher.update(metric.encode('utf-8'))
+            for array in arrays:
+                hasher.update(array[metric_index].tobytes())
+            hasher.update(
+                json.dumps(metric_sketches[metric_index],
+                           sort_keys=True).encode('utf-8'))
+            hashes.append(hasher.hexdigest())
+        return hashes
+
+    @staticmethod
+    def _createChunk(metric_store, stddev, merged_store, merged_stddev,
+                     metric_index):
+        """Returns the chunk of a metric of a MetricStore with the default
+        axes.
+
+        Input:
+        - metric_store, stddev: the store and its MetricStore.stddev().
+        - merged_store, merged_stddev: the same with the datasets merged.
+        - metric_index: index of the metric in the store.
+        """
+        datasets, parameter_files, _ = _getStringLabels(metric_store)
+        parameter_file_indices = np.flatnonzero(
+            merged_store.has_data[:, metric_index])
+        dataset_indices = np.flatnonzero(
+            metric_store.has_data[:, :, metric_index].any(axis=1))
+        cells = (parameter_file_indices, metric_index)
+        summary = {
+            'count': _roundValues(merged_store.count[cells]),
+            'mean': _roundValues(merged_store.mean[cells]),
+            'stddev': _roundValues(merged_stddev[cells]),
+            'min': _roundValues(merged_store.minimum[cells]),
+            'max': _roundValues(merged_store.maximum[cells])
+        }
+        quantile_names = []
+        quantiles = [q for _, q in SUMMARY_QUANTILES]
+        values = np.full((len(parameter_file_indices), len(quantiles)),
+                         np.nan)
+        for i, parameter_file_index in enumerate(
+                parameter_file_indices.tolist()):
+            cell_quantiles = merged_store.getQuantiles(
+                (parameter_file_index, metric_index), quantiles)
+            if cell_quantiles is not None:
+                values[i] = cell_quantiles
+                quantile_names = [name for name, _ in SUMMARY_QUANTILES]
+        for name, column in zip(quantile_names, values.T):
+            summary[name] = _roundValues(column)
+
+        # (datasets, parameter files) arrays of the metric.
+        cells = np.ix_(dataset_indices, parameter_file_indices,
+                       [metric_index])
+        has_data = metric_store.has_data[cells][:, :, 0]
+        return {
+            'parameter_files':
+            [parameter_files[i] for i in parameter_file_indices.tolist()],
+            'datasets': [datasets[i] for i in dataset_indices.tolist()],
+            'quantiles': quantile_names,
+            'summary': summary,
+            'per_dataset': {
+                'count':
+                _roundValues(metric_store.count[cells][:, :, 0], has_data),
+                'mean':
+                _roundValues(metric_store.mean[cells][:, :, 0], has_data),
+                'stddev':
+                _roundValues(stddev[cells][:, :, 0], has_data)
+            }
+        }
+
+    def update(self, metric_store, num_jobs=None):
+        """Writes the report of a MetricStore with the default axes, e.g.
+        SimpleSummarization.metric_store, to report_folder. The chunks of the
+        metrics whose statistics didn't change since the last update are not
+        created and written again.
+
+        Return value: number of chunks that were written.
+        """
+        metrics_folder = os.path.join(self.report_folder, METRICS_FOLDER)
+        if not os.path.isdir(metrics_folder):
+            os.makedirs(metrics_folder)
+        hashes_file = os.path.join(self.report_folder, REPORT_HASHES_FILENAME)
+        try:
+            with open(hashes_file, 'r') as in_file_stream:
+                previous_hashes = json.load(in_file_stream)
+        except (IOError, OSError, ValueError):
+            previous_hashes = {}
+
+        stddev = metric_store.stddev()
+        merged_store = metric_store.mergeAxis('dataset')
+        merged_stddev = merged_store.stddev()
+        num_parameter_files = merged_store.has_data.sum(axis=0).tolist()
+        num_datasets = metric_store.has_data.any(axis=1).sum(axis=0).tolist()
+        hashes = {}
+        index_metrics = []
+        num_written = 0
+        for metric_index, (metric, input_hash) in enumerate(
+                zip(_getStringLabels(metric_store)[2],
+                    self._getInputHashes(metric_store))):
+            chunk_path = getChunkPath(metric)
+            hashes[chunk_path] = input_hash
+            output_file = os.path.join(self.report_folder, chunk_path)
+            if previous_hashes.get(chunk_path) != input_hash or \
+                    not os.path.isfile(output_file):
+                chunk = self._createChunk(metric_store, stddev, merged_store,
+                                          merged_stddev, metric_index)
+                _writeFileAtomically(
+                    output_file, 'loadReportChunk(' + json.dumps(metric) +
+                    ', ' + json.dumps(
+                        chunk, sort_keys=True, separators=(',', ':')) + ');\n')
+                num_written += 1
+            index_metrics.append({
+                'name': metric,
+                'chunk': chunk_path,
+                # Makes the browser load the chunk again when it changed.
+                'hash': input_hash[:12],
+                'num_parameter_files': num_parameter_files[metric_index],
+                'num_datasets': num_datasets[metric_index]
+            })
+
+        for chunk_path in set(previous_hashes) - set(hashes):
+            try:
+                os.remove(os.path.join(self.report_folder, chunk_path))
+            except OSError:
+                pass
+
+        datasets, parameter_files, _ = _getStringLabels(metric_store)
+        index = {
+            'num_jobs': num_jobs,
+            'datasets': sorted(datasets, key=alphanum_key),
+            'parameter_files': sorted(parameter_files, key=alphanum_key),
+            'metrics': sorted(
+                index_metrics, key=lambda metric: alphanum_key(metric['name']))
+        }
+        _writeFileAtomically(
+            os.path.join(self.report_folder, REPORT_INDEX_FILENAME),
+            'loadReportIndex(' + json.dumps(index, sort_keys=True) + ');\n')
+        index_html = os.path.join(self.report_folder, 'index.html')
+        if not os.path.isfile(index_html):
+            _writeFileAtomically(index_html, _INDEX_HTML)
+        else:
+            with open(index_html, 'r') as in_file_stream:
+                if in_file_stream.read() != _INDEX_HTML:
+                    _writeFileAtomically(index_html, _INDEX_HTML)
+        # The hashes are written last, so an interrupted update writes the
+        # chunks again.
+        _writeFileAtomically(hashes_file, json.dumps(hashes, sort_keys=True))
+        self.logger.info("Wrote %i of %i metric chunks of the report in %s, "
+                         "the others were unchanged.", num_written,
+                         len(hashes), self.report_folder)
+        return num_written
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    logger = logging.getLogger(__name__)
+
+    parser = argparse.ArgumentParser(
+        description="""Write or update a static HTML report of the summarized
+        metrics of a results folder.""")
+    parser.add_argument(
+        '--results_folder',
+        required=True,
+        help='folder that contains all job folders')
+    parser.add_argument(
+        '--report_folder',
+        help='folder of the report (default: results_folder/report)')
+    args = parser.parse_args()
+
+    summarization = SimpleSummarization(
+        getStatsFilesInFolder(args.results_folder),
+        cache_file=os.path.join(args.results_folder, SUMMARY_CACHE_FILENAME))
+    report_folder = args.report_folder or os.path.join(args.results_folder,
+                                                       'report')
+    HtmlReport(report_folder).update(summarization.metric_store,
+                                     summarization.num_runs)
+    logger.info("Open %s in a browser to view the report.",
+                os.path.join(report_folder, 'index.html'))
@@ -5,26 +5,112 @@ import copy
 import logging
 import os
 import re
-import yaml
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 
 import evaluation_tools.catkin_utils as catkin_utils
-from evaluation_tools.command_runner import runCommand
+from evaluation_tools.command_runner import (
+    CommandRunnerException, getResourceUsageDict, launchCommand, quoteCommand)
+from evaluation_tools.estimator_cache import getEstimatorCache
+from evaluation_tools.job_scheduler import JobScheduler, JobSchedulerException
+from evaluation_tools.process_sampler import (PROCESS_SAMPLES_FILENAME,
+                                              ProcessSampler)
+from evaluation_tools.yaml_io import dumpYaml, loadJobInfo, loadYaml
+
+
+# Entries of the 'timeouts' setting of an experiment (or of the additional
+# parameters of a dataset): wall-clock limits in seconds for the commands of
+# the corresponding stage and the 'stall' limit for all commands.
+TIMEOUT_STAGES = ['estimator', 'console', 'evaluation']
+STALL_TIMEOUT_KEY = 'stall'
+
+
+# Entries of the experiment dict that differ between the jobs of an
+# experiment or are not stored in the job info.
+_JOB_SPECIFIC_EXPERIMENT_KEYS = [
+    'experiment_name', 'datasets', 'parameter_files', 'console_commands'
+]
+
+# Candidates for placeholders in parameter values and console commands.
+_PLACEHOLDER_REGEX = re.compile('<[^<>]*>')
+
+
+class JobInfo(MutableMapping):
+    """Info dict of a job (the content of job.yaml).
+
+    The entries that are the same for all jobs of an experiment are read from
+    a dict that is shared between the jobs, see Job.createSharedInfo(). Only
+    the entries that are set on the job itself are stored per job. The shared
+    dict must therefore not be modified.
+    """
+
+    __slots__ = ('_shared', '_own')
+
+    def __init__(self, shared, own=None):
+        self._shared = shared
+        self._own = own if own is not None else {}
+
+    def __getitem__(self, key):
+        if key in self._own:
+            return self._own[key]
+        return self._shared[key]
+
+    def __setitem__(self, key, value):
+        self._own[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._own.pop(key, None)
+        if key in self._shared:
+            # Stop sharing instead of modifying the shared dict.
+            self._shared = {
+                shared_key: value
+                for shared_key, value in self._shared.items()
+                if shared_key != key
+            }
+
+    def __iter__(self):
+        for key in self._own:
+            yield key
+        for key in self._shared:
+            if key not in self._own:
+                yield key
+
+    def __len__(self):
+        return len(self._own) + sum(
+            1 for key in self._shared if key not in self._own)
+
+    def __repr__(self):
+        return repr(dict(self))
 
 
 class Job(object):
     """Contains the information to run the experiment (estimator and console).
     """
 
+    __slots__ = ('logger', 'params_dict', 'additional_placeholders',
+                 'resource_usage', 'dataset_additional_parameters',
+                 'dataset_paths', 'exec_app', 'exec_folder', 'exec_name',
+                 'exec_path', 'experiment_root_folder', 'info', 'job_name',
+                 'job_path', 'localization_map', 'sensors_file',
+                 '_placeholder_table')
+
+    DATASET_LOG_DIR_PREFIX = 'estimator_output_'
+
     def __init__(self):
         logging.basicConfig(level=logging.DEBUG)
         self.logger = logging.getLogger(__name__)
         self.params_dict = []
         self.additional_placeholders = []
-        self._dataset_log_dir_prefix = 'estimator_output_'
+        # Resource usage of the commands run by this job, keyed by the name of
+        # the command (see runJobCommand()).
+        self.resource_usage = {}
 
         self.dataset_additional_parameters = None
-        self.dataset_log_dirs = None
-        self.dataset_names = None
         self.dataset_paths = None
         self.exec_app = None
         self.exec_folder = None
@@ -35,14 +121,65 @@ class Job(object):
         self.job_name = None
         self.job_path = None
         self.localization_map = None
-        self.output_map_folders = None
         self.sensors_file = None
+        # Values of the built-in placeholders, created on first use by
+        # _createPlaceholderTable().
+        self._placeholder_table = None
 
     def __eq__(self, other):
         if isinstance(self, other.__class__):
-            return vars(self) == vars(other)
+            return all(
+                getattr(self, name) == getattr(other, name)
+                for name in self.__slots__ if not name.startswith('_'))
         return False
 
+    def __ne__(self, other):
+        return not self == other
+
+    @staticmethod
+    def createSharedInfo(experiment_dict, experiment_root_folder):
+        """Returns the part of the job info that is the same for all jobs of
+    an experiment. Pass it to createJob() to share it between the jobs.
+    """
+        shared_info = copy.deepcopy({
+            key: value
+            for key, value in experiment_dict.items()
+            if key not in _JOB_SPECIFIC_EXPERIMENT_KEYS
+        })
+        shared_info['experiment_root_folder'] = experiment_root_folder
+        return shared_info
+
+    @property
+    def dataset_names(self):
+        """Dataset names, i.e. the basenames of the dataset paths without the
+    '.bag' extension. These are the suggested map keys."""
+        if self.dataset_paths is None:
+            return None
+        return [
+            os.path.basename(dataset_path).replace('.bag', '')
+            for dataset_path in self.dataset_paths
+        ]
+
+    @property
+    def dataset_log_dirs(self):
+        if self.dataset_paths is None:
+            return None
+        return [
+            os.path.join(self.job_path,
+                         self.DATASET_LOG_DIR_PREFIX + dataset_name)
+            for dataset_name in self.dataset_names
+        ]
+
+    @property
+    def output_map_folders(self):
+        if self.dataset_paths is None:
+            return None
+        return [
+            os.path.join(dataset_log_dir, dataset_name)
+            for dataset_log_dir, dataset_name in zip(self.dataset_log_dirs,
+                                                     self.dataset_names)
+        ]
+
     def createJob(self,
                   datasets_dict,
                   experiment_root_folder,
@@ -50,7 +187,8 @@ class Job(object):
                   experiment_dict,
                   parameter_name,
                   parameter_dict,
-                  summarize_statistics=False):
+                  summarize_statistics=False,
+                  shared_info=None):
         """Initializes the job.
 
         Input:
@@ -66,6 +204,10 @@ class Job(object):
         - parameter_dict: dictionary containing all parameters for this job
               (loaded from the corresponding parameter yaml).
         - summarize_statistics: (only works with SWE).
+        - shared_info: result of createSharedInfo() for experiment_dict. Jobs
+              that are created with the same shared_info share the
+              experiment-level entries of their info instead of each holding
+              a copy.
 
         Return value: nothing.
 
@@ -94,7 +236,6 @@ class Job(object):
         self.sensors_file = experiment_dict['sensors_file']
         self.localization_map = experiment_dict['localization_map']
 
-        self._obtainOutputMapKeyAndFolderForDataset()
         self._addAdditionalPlaceholders()
 
         for dataset_log_dir in self.dataset_log_dirs:
@@ -118,16 +259,17 @@ class Job(object):
             console_batch_runner_filename = os.path.join(
                 self.job_path, "console_commands.yaml")
             self.logger.info("Write %s", console_batch_runner_filename)
-            with open(console_batch_runner_filename, "w") as out_file_stream:
-                yaml.safe_dump(
-                    console_batch_runner_settings,
-                    stream=out_file_stream,
-                    default_flow_style=False,
-                    width=10000)  # Prevent random line breaks in long strings.
+            dumpYaml(
+                console_batch_runner_settings,
+                console_batch_runner_filename,
+                width=10000)  # Prevent random line breaks in long strings.
 
         # Write options to file.
-        self.info = copy.deepcopy(experiment_dict)
-        self.info['experiment_root_folder'] = self.experiment_root_folder
+        if shared_info is None:
+            shared_info = Job.createSharedInfo(experiment_dict,
+                                               self.experiment_root_folder)
+        self.info = JobInfo(shared_info)
+        self.info['experiment_name'] = self.job_name
         self.info['datasets'] = [{
             'name':
             name,
@@ -139,15 +281,10 @@ class Job(object):
             self.dataset_paths, self.dataset_additional_parameters,
             self.params_dict)]
         self.info['parameter_file'] = parameter_name
-        del self.info['parameter_files']
-        if 'console_commands' in self.info:
-            del self.info['console_commands']
 
         job_filename = os.path.join(self.job_path, "job.yaml")
         self.logger.info("Write %s", job_filename)
-        with open(job_filename, "w") as out_file_stream:
-            yaml.safe_dump(
-                self.info, stream=out_file_stream, default_flow_style=False)
+        dumpYaml(dict(self.info), job_filename)
 
         self.exec_app = self.info["app_package_name"]
         self.exec_name = self.info["app_executable"]
@@ -161,6 +298,7 @@ class Job(object):
         self.dataset_paths = [
             dataset_dict['name'] for dataset_dict in datasets_dict
         ]
+        self._placeholder_table = None
         self.dataset_additional_parameters = []
         for dataset_dict in datasets_dict:
             if 'additional_parameters' in dataset_dict:
@@ -169,28 +307,13 @@ class Job(object):
             else:
                 self.dataset_additional_parameters.append({})
 
-    def _obtainOutputMapKeyAndFolderForDataset(self):
-        """Generates suggested map keys and folders from the dataset names."""
-        self.dataset_names = [
-            os.path.basename(dataset_name).replace('.bag', '')
-            for dataset_name in self.dataset_paths
-        ]
-        self.dataset_log_dirs = [
-            os.path.join(self.job_path,
-                         self._dataset_log_dir_prefix + dataset_name)
-            for dataset_name in self.dataset_names
-        ]
-        self.output_map_folders = [
-            os.path.join(dataset_log_dir, dataset_name) for dataset_log_dir,
-            dataset_name in zip(self.dataset_log_dirs, self.dataset_names)
-        ]
-
     def _addAdditionalPlaceholders(self):
         """Creates placeholders for the additional parameters."""
+        self.additional_placeholders = []
         for idx, dataset_additional_parameters in \
             enumerate(self.dataset_additional_parameters):
+            self.additional_placeholders.append({})
             for key, value in dataset_additional_parameters.iteritems():
-                self.additional_placeholders.append({})
                 if isinstance(value, str):
                     dataset_additional_parameters[key] = (
                         self.replacePlaceholdersInString(
@@ -236,9 +359,13 @@ class Job(object):
     Throws an exception if there are still "<" or ">" characters left in the
     output string.
 
+    All placeholders are replaced in a single pass over the string, i.e. the
+    replaced values are not searched for placeholders again. The values of
+    the placeholders are computed once per job.
+
     The following placeholders exist (# refers to the dataset index):
-    - <BAG_FILENAME>: path to the dataset bag file.
-    - <BAG_FOLDER>: folder of the bag file.
+    - <BAG_FILENAME>, <BAG_FILENAME_#>: path to the dataset bag file.
+    - <BAG_FOLDER>, <BAG_FOLDER_#>: folder of the bag file.
     - <SENSORS_YAML>: path to the sensor calibration file as specified in the
           experiment yaml.
     - <LOCALIZATION_MAP>: path to the localization map as specified in the
@@ -255,56 +382,72 @@ class Job(object):
           i.e. primarily output data from the estimator.  This will be equal to
           <JOB_DIR>/estimator_output_<DATASET_NAME>
     """
-        string = string.replace('<BAG_FILENAME>',
-                                self.dataset_paths[dataset_index])
-        string = string.replace('<BAG_FOLDER>',
-                                os.path.dirname(
-                                    self.dataset_paths[dataset_index]))
-        for i in range(0, len(self.dataset_names)):
-            string = string.replace('<BAG_FILENAME_' + str(i) + '>',
-                                    self.dataset_names[i])
-            string = string.replace('<BAG_FOLDER_' + str(i) + '>',
-                                    os.path.dirname(self.dataset_names[i]))
-
-        string = string.replace('<SENSORS_YAML>', self.sensors_file)
-        string = string.replace('<LOCALIZATION_MAP>', self.localization_map)
-
-        string = string.replace('<OUTPUT_MAP_FOLDER>',
-                                self.output_map_folders[dataset_index])
-        for i in range(0, len(self.output_map_folders)):
-            string = string.replace('<OUTPUT_MAP_FOLDER_' + str(i) + '>',
-                                    self.output_map_folders[i])
-
-        string = string.replace('<DATASET_NAME>',
-                                self.dataset_names[dataset_index])
-        for i in range(0, len(self.dataset_names)):
-            string = string.replace('<DATASET_NAME_' + str(i) + '>',
-                                    self.dataset_names[i])
-        string = string.replace('<OUTPUT_MAP_KEY>',
-                                self.dataset_names[dataset_index])
-        for i in range(0, len(self.dataset_names)):
-            string = string.replace('<OUTPUT_MAP_KEY_' + str(i) + '>',
-                                    self.dataset_names[i])
-
-        string = string.replace('<JOB_DIR>', self.job_path)
-        string = string.replace('<DATASET_LOG_DIR>',
-                                self.dataset_log_dirs[dataset_index])
-
-        if len(self.additional_placeholders) > dataset_index:
-            for original, replacement in self.additional_placeholders[
-                    dataset_index].iteritems():
-                # No index is supported for additional placeholders. These come
-                # from the additional dataset parameters.
-                string = string.replace(original, replacement)
+        if '<' not in string:
+            return string
+        replaced_string = _PLACEHOLDER_REGEX.sub(
+            lambda match: self._getPlaceholderValue(match.group(),
+                                                    dataset_index), string)
 
         # Check that no substrings in the form of <...> are left.
-        regex_result = re.search('<.*>', string)
+        regex_result = re.search('<.*>', replaced_string)
         if regex_result:
             raise Exception(
                 'Replacing of placeholders did not complete: invalid '
                 'placeholder "' + regex_result.group() +
-                '" found. Resulting string: ' + string)
-        return string
+                '" found. Resulting string: ' + replaced_string)
+        return replaced_string
+
+    def _getPlaceholderValue(self, placeholder, dataset_index):
+        """Returns the value of a placeholder or the placeholder itself if it
+        is unknown."""
+        if self._placeholder_table is None:
+            self._placeholder_table = self._createPlaceholderTable()
+        indexed_values, dataset_values = self._placeholder_table
+        value = dataset_values[dataset_index].get(placeholder)
+        if value is not None:
+            return value
+        value = indexed_values.get(placeholder)
+        if value is not None:
+            return value
+        if len(self.additional_placeholders) > dataset_index:
+            # No index is supported for additional placeholders. These come
+            # from the additional dataset parameters.
+            return self.additional_placeholders[dataset_index].get(
+                placeholder, placeholder)
+        return placeholder
+
+    def _createPlaceholderTable(self):
+        """Returns the values of the built-in placeholders as a tuple of:
+        - a dict with the placeholders that contain a dataset index, e.g.
+          <DATASET_NAME_3>.
+        - a list with one dict per dataset with the placeholders that refer to
+          the dataset the string is replaced for, e.g. <DATASET_NAME>.
+        """
+        indexed_values = {}
+        dataset_values = []
+        for i, (dataset_path, dataset_name, output_map_folder,
+                dataset_log_dir) in enumerate(
+                    zip(self.dataset_paths, self.dataset_names,
+                        self.output_map_folders, self.dataset_log_dirs)):
+            bag_folder = os.path.dirname(dataset_path)
+            suffix = '_' + str(i) + '>'
+            indexed_values['<BAG_FILENAME' + suffix] = dataset_path
+            indexed_values['<BAG_FOLDER' + suffix] = bag_folder
+            indexed_values['<OUTPUT_MAP_FOLDER' + suffix] = output_map_folder
+            indexed_values['<DATASET_NAME' + suffix] = dataset_name
+            indexed_values['<OUTPUT_MAP_KEY' + suffix] = dataset_name
+            dataset_values.append({
+                '<BAG_FILENAME>': dataset_path,
+                '<BAG_FOLDER>': bag_folder,
+                '<SENSORS_YAML>': self.sensors_file,
+                '<LOCALIZATION_MAP>': self.localization_map,
+                '<OUTPUT_MAP_FOLDER>': output_map_folder,
+                '<DATASET_NAME>': dataset_name,
+                '<OUTPUT_MAP_KEY>': dataset_name,
+                '<JOB_DIR>': self.job_path,
+                '<DATASET_LOG_DIR>': dataset_log_dir
+            })
+        return indexed_values, dataset_values
 
     def loadConfigFromFolder(self, job_path):
         """Loads the job configuration from disk.
@@ -318,12 +461,11 @@ class Job(object):
         self.logger.info("Loading job config from file: %s", job_filename)
         if not os.path.isfile(job_filename):
             raise ValueError("Job info file does not exist: " + job_filename)
-        self.info = yaml.safe_load(open(job_filename))
+        self.info = loadJobInfo(job_filename)
         self.job_name = self.info['experiment_name']
         self._parseDatasetsDict(self.info['datasets'])
         self.sensors_file = self.info['sensors_file']
         self.localization_map = self.info['localization_map']
-        self._obtainOutputMapKeyAndFolderForDataset()
         self._addAdditionalPlaceholders()
         self.exec_app = self.info["app_package_name"]
         self.exec_name = self.info["app_executable"]
@@ -338,7 +480,8 @@ class Job(object):
     def execute(self,
                 skip_estimator=False,
                 skip_console=False,
-                enable_console_progress_bars=True):
+                enable_console_progress_bars=True,
+                parallel_estimator_runs=None):
         """Runs the estimator and maplab console as defined in this job.
 
     Input:
@@ -347,34 +490,251 @@ class Job(object):
     - enable_console_progress_bars: if True, progress bars in the maplab
           console will be disabled. This is useful when the output is forwarded
           into a log file (e.g. on a Jenkins job).
+    - parallel_estimator_runs: maximum number of estimator invocations (one per
+          dataset) that are run concurrently. Defaults to the
+          'parallel_estimator_runs' entry of the job info or 1 if not set. The
+          console step only starts once all estimator invocations finished.
     """
         if not skip_estimator:
-            # Run estimator.
-            for params in self.params_dict:
-                runCommand(self.exec_path, params_dict=params)
+            self.runEstimator(parallel_estimator_runs)
         else:
             self.logger.info("Step estimator of job was skipped.")
 
         if not skip_console:
-            # Run console commands.
-            batch_runner_settings_file = os.path.join(self.job_path,
-                                                      "console_commands.yaml")
-            if os.path.isfile(batch_runner_settings_file):
-                console_executable_path = catkin_utils.catkinFindLib(
-                    "maplab_console")
-                runCommand(
-                    os.path.join(console_executable_path, "batch_runner"),
-                    params_dict={
-                        "log_dir": self.job_path,
-                        "batch_control_file": batch_runner_settings_file,
-                        "show_progress_bar": enable_console_progress_bars
-                    })
-            else:
-                self.logger.info("No console commands to be run.")
+            self.runConsole(enable_console_progress_bars)
         else:
             self.logger.info("Step console of job was skipped.")
 
+    def runEstimator(self, parallel_estimator_runs=None):
+        """Runs the estimator on all datasets of the job.
+
+    See execute() for the description of parallel_estimator_runs.
+    """
+        if parallel_estimator_runs is None:
+            parallel_estimator_runs = self.info.get('parallel_estimator_runs',
+                                                    1)
+        parallel_estimator_runs = min(
+            int(parallel_estimator_runs), len(self.params_dict))
+        if parallel_estimator_runs <= 1:
+            for dataset_index in range(len(self.params_dict)):
+                self._runEstimatorForDataset(dataset_index)
+        else:
+            self._runEstimatorInParallel(parallel_estimator_runs)
+
+    def runConsole(self, enable_console_progress_bars=True):
+        """Runs the console commands of the job with the maplab batch runner.
+
+    Does nothing if the job has no console commands.
+    """
+        batch_runner_settings_file = os.path.join(self.job_path,
+                                                  "console_commands.yaml")
+        if os.path.isfile(batch_runner_settings_file):
+            console_executable_path = catkin_utils.catkinFindLib(
+                "maplab_console")
+            self.runJobCommand(
+                'console',
+                'console',
+                os.path.join(console_executable_path, "batch_runner"),
+                params_dict={
+                    "log_dir": self.job_path,
+                    "batch_control_file": batch_runner_settings_file,
+                    "show_progress_bar": enable_console_progress_bars
+                })
+        else:
+            self.logger.info("No console commands to be run.")
+
+    def getLogFile(self, name):
+        """Returns the path of the file that stores the output of a command
+    run by the job, i.e. <JOB_DIR>/logs/<name>.log.
+    """
+        return os.path.join(self.job_path, 'logs', name + '.log')
+
+    def runJobCommand(self,
+                      stage,
+                      name,
+                      exec_path,
+                      params_dict=None,
+                      process_samples_file=None,
+                      dataset_index=None):
+        """Runs a command of the job and records its resource usage.
+
+    Input:
+    - stage: stage the command belongs to (estimator, console, evaluation).
+    - name: unique name of the command within the job. The output of the
+          command is written to getLogFile(name).
+    - exec_path, params_dict: see command_runner.runCommand().
+    - process_samples_file: if set, the resource usage of the command is
+          sampled while it runs and written to this file (see
+          process_sampler.ProcessSampler). The sampling rate is taken from the
+          'process_sampling_rate_hz' entry of the job info.
+    - dataset_index: index of the dataset the command runs on, None if it
+          runs on all datasets of the job. See getTimeouts().
+
+    Return value: CommandResult of the command. Raises a CommandRunnerException
+    if the command returned a non-zero exit code or was killed because it
+    timed out or stalled.
+    """
+        timeout_s, stall_timeout_s = self.getTimeouts(stage, dataset_index)
+        running_command = launchCommand(
+            exec_path, params_dict=params_dict, log_file=self.getLogFile(name))
+        sampler = None
+        if process_samples_file is not None:
+            sampler = ProcessSampler(
+                running_command.pid, process_samples_file,
+                float(self.info['process_sampling_rate_hz'])).start()
+        try:
+            result = running_command.wait(timeout_s, stall_timeout_s)
+        finally:
+            if sampler is not None:
+                sampler.stop()
+
+        self._recordResourceUsage(stage, name, result)
+        if result.exit_code != 0:
+            raise CommandRunnerException(
+                quoteCommand(result.command), result.exit_code,
+                result.log_file, result)
+        return result
+
+    def getTimeouts(self, stage, dataset_index=None):
+        """Returns (timeout_s, stall_timeout_s) for a command of the job.
+
+    The limits are read from the 'timeouts' entry of the job info and can be
+    overridden per dataset by a 'timeouts' entry in the additional parameters
+    of the dataset. For commands that run on all datasets of the job
+    (dataset_index is None), the largest limit of all datasets is used. None
+    means that there is no limit.
+    """
+        if stage not in TIMEOUT_STAGES:
+            raise ValueError('Unknown stage "' + str(stage) + '".')
+        timeouts = self.info.get('timeouts') or {}
+        if dataset_index is None:
+            dataset_indices = range(len(self.dataset_additional_parameters))
+        else:
+            dataset_indices = [dataset_index]
+        dataset_timeouts = [
+            self.dataset_additional_parameters[index].get('timeouts') or {}
+            for index in dataset_indices
+        ]
+
+        limits = []
+        for key in [stage, STALL_TIMEOUT_KEY]:
+            values = [
+                dataset_timeout.get(key, timeouts.get(key))
+                for dataset_timeout in dataset_timeouts
+            ] or [timeouts.get(key)]
+            if None in values:
+                limits.append(None)
+            else:
+                limits.append(max(float(value) for value in values))
+        return tuple(limits)
+
+    def _recordResourceUsage(self, stage, name, result):
+        resource_usage = getResourceUsageDict(result)
+        resource_usage['stage'] = stage
+        self.resource_usage[name] = resource_usage
+
+    def _runEstimatorForDataset(self, dataset_index):
+        """Runs the estimator on one dataset.
+
+    If the experiment defines an 'estimator_cache', the output folder of the
+    dataset is restored from the cache if the same estimator was already run
+    with the same parameters on the same data. Otherwise the estimator is run
+    and its output is added to the cache.
+    """
+        params = self.params_dict[dataset_index]
+        command_name = 'estimator_' + self.dataset_names[dataset_index]
+        process_samples_file = None
+        if self.info.get('process_sampling_rate_hz'):
+            process_samples_file = os.path.join(
+                self.dataset_log_dirs[dataset_index], PROCESS_SAMPLES_FILENAME)
+        cache = getEstimatorCache(self.info.get('estimator_cache'))
+        if cache is None:
+            self.runJobCommand('estimator', command_name, self.exec_path,
+                               params, process_samples_file, dataset_index)
+            return
+
+        key = cache.computeKey(
+            self.exec_path, self._getCacheableParams(dataset_index),
+            self.dataset_paths[dataset_index], self.sensors_file)
+        output_folder = self.dataset_log_dirs[dataset_index]
+        if cache.restore(key, output_folder):
+            self.logger.info("Estimator output for dataset %s restored from "
+                             "cache, skipping the estimator.",
+                             self.dataset_names[dataset_index])
+            return
+        self.runJobCommand('estimator', command_name, self.exec_path, params,
+                           process_samples_file, dataset_index)
+        cache.store(
+            key,
+            output_folder,
+            description={
+                'executable': self.exec_path,
+                'dataset': self.dataset_paths[dataset_index],
+                'job': self.job_name
+            },
+            # The resource samples belong to this run of the estimator.
+            excluded_files=[PROCESS_SAMPLES_FILENAME])
+
+    def _getCacheableParams(self, dataset_index):
+        """Returns the estimator parameters for a dataset with all paths that
+    depend on the job location or the machine replaced by their placeholders.
+    """
+        path_placeholders = [
+            (self.dataset_log_dirs[dataset_index], '<DATASET_LOG_DIR>'),
+            (self.output_map_folders[dataset_index], '<OUTPUT_MAP_FOLDER>'),
+            (self.job_path, '<JOB_DIR>'),
+            (self.dataset_paths[dataset_index], '<BAG_FILENAME>'),
+            (self.sensors_file, '<SENSORS_YAML>'),
+        ]
+        # Replace longer paths first, e.g. <OUTPUT_MAP_FOLDER> before
+        # <DATASET_LOG_DIR>.
+        path_placeholders = sorted(
+            [(path, placeholder) for path, placeholder in path_placeholders
+             if path],
+            key=lambda path_placeholder: len(path_placeholder[0]),
+            reverse=True)
+
+        cacheable_params = {}
+        for key, value in self.params_dict[dataset_index].items():
+            if isinstance(value, str):
+                for path, placeholder in path_placeholders:
+                    value = value.replace(path, placeholder)
+            cacheable_params[key] = value
+        return cacheable_params
+
+    def _runEstimatorInParallel(self, num_workers):
+        """Runs the estimator for all datasets with up to num_workers
+        concurrent invocations.
+
+        Waits for all invocations to finish. If one or more of them failed, the
+        exception of the first failed dataset is raised.
+        """
+        self.logger.info("Running the estimator on %i datasets with %i "
+                         "concurrent invocations.", len(self.params_dict),
+                         num_workers)
+
+        scheduler = JobScheduler(num_workers)
+        try:
+            scheduler.run(
+                range(len(self.params_dict)), self._runEstimatorForDataset)
+        except JobSchedulerException as ex:
+            raise min(ex.failed_jobs, key=lambda failure: failure[0])[1]
+
     def writeSummary(self, filename):
+        """Writes information about the executable and the resource usage of
+    all commands run by the job to <JOB_DIR>/<filename>.
+
+    Resource usage entries from an existing summary file are kept for commands
+    that were not run again, e.g. when an experiment is resumed.
+    """
+        out_file_path = os.path.join(self.job_path, filename)
+        resource_usage = {}
+        if os.path.isfile(out_file_path):
+            previous_summary = loadYaml(out_file_path)
+            if previous_summary and previous_summary.get('resources'):
+                resource_usage.update(previous_summary['resources'])
+        resource_usage.update(self.resource_usage)
+
         summary_dict = {}
         summary_dict["executable"] = {}
         summary_dict["executable"]["name"] = self.exec_name
@@ -389,10 +749,10 @@ class Job(object):
             summary_dict["calib"]["rev"] = \
                 catkin_utils.getCalibRevision(self.info["cam_id"])
 
-        out_file_path = os.path.join(self.job_path, filename)
-        out_file_stream = open(out_file_path, "w")
-        yaml.safe_dump(
-            summary_dict, stream=out_file_stream, default_flow_style=False)
+        if resource_usage:
+            summary_dict["resources"] = resource_usage
+
+        dumpYaml(summary_dict, out_file_path)
 
 
 if __name__ == '__main__':
@@ -413,10 +773,18 @@ if __name__ == '__main__':
         required=False,
         default=False,
         action="store_true")
+    parser.add_argument(
+        '--parallel_estimator_runs',
+        help='Maximum number of concurrent estimator invocations.',
+        required=False,
+        type=int,
+        default=None)
     args = parser.parse_args()
 
     if args.job_dir:
         j = Job()
         j.loadConfigFromFolder(args.job_dir)
         j.execute(
-            skip_estimator=args.skip_estimator, skip_console=args.skip_console)
+            skip_estimator=args.skip_estimator,
+            skip_console=args.skip_console,
+            parallel_estimator_runs=args.parallel_estimator_runs)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+import copy
+import os
+import threading
+
+from evaluation_tools.job import Job
+
+
+class JobPlan(object):
+    """Everything that is needed to create a job, without creating it.
+
+    Creating a Job writes its folder, job.yaml and console_commands.yaml, which
+    is slow for experiments with thousands of jobs. A JobPlan only stores the
+    inputs of Job.createJob() and creates the job the first time getJob() is
+    called, i.e. when the job is about to run. Once the job finished, it can be
+    released with releaseJob() and is loaded from its folder if it's needed
+    again.
+
+    The inputs that are the same for many jobs (datasets, parameters,
+    experiment dict) are shared between the plans, only the parameters that
+    differ (e.g. the values of a parameter sweep) are stored per plan.
+
+    Input:
+    - job_name: name of the job, i.e. <experiment_basename>/<job folder>.
+    - datasets: list of dataset dicts of the job.
+    - parameter_name: name of the parameter set of the job.
+    - params: parameter dict of the job. Not modified and can be shared.
+    - experiment_root_folder, results_folder: see Job.createJob().
+    - experiment_dict: experiment dict shared by all jobs of the experiment.
+          Its 'experiment_name' entry is replaced by job_name.
+    - shared_info: result of Job.createSharedInfo() for experiment_dict.
+    - param_overrides: parameters that replace entries of params for this
+          job.
+    """
+
+    __slots__ = ('job_name', 'datasets', 'parameter_name', '_params',
+                 '_param_overrides', 'experiment_root_folder',
+                 'results_folder', 'experiment_dict', 'shared_info', '_job',
+                 '_job_path', '_is_created', '_lock')
+
+    def __init__(self,
+                 job_name,
+                 datasets,
+                 parameter_name,
+                 params,
+                 experiment_root_folder,
+                 results_folder,
+                 experiment_dict,
+                 shared_info=None,
+                 param_overrides=None):
+        self.job_name = job_name
+        self.datasets = datasets
+        self.parameter_name = parameter_name
+        self._params = params
+        self._param_overrides = param_overrides
+        self.experiment_root_folder = experiment_root_folder
+        self.results_folder = results_folder
+        self.experiment_dict = experiment_dict
+        self.shared_info = shared_info
+        self._job = None
+        self._job_path = None
+        self._is_created = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fromJob(job):
+        """Returns a plan for a job that already exists."""
+        job_plan = JobPlan(job.job_name, None, None, None,
+                           job.experiment_root_folder, None, None)
+        # pylint: disable=protected-access
+        job_plan._job_path = job.job_path
+        job_plan._job = job
+        job_plan._is_created = True
+        return job_plan
+
+    @property
+    def job_path(self):
+        if self._job_path is not None:
+            return self._job_path
+        return os.path.join(self.results_folder, self.job_name)
+
+    @property
+    def params(self):
+        if not self._param_overrides:
+            return self._params
+        params = dict(self._params)
+        params.update(self._param_overrides)
+        return params
+
+    def isCreated(self):
+        return self._is_created
+
+    def getJob(self):
+        """Returns the job and creates it on disk if this wasn't done yet."""
+        with self._lock:
+            if self._job is not None:
+                return self._job
+            job = Job()
+            if self._is_created:
+                job.loadConfigFromFolder(self.job_path)
+            else:
+                experiment_dict = dict(self.experiment_dict)
+                experiment_dict['experiment_name'] = self.job_name
+                # createJob() modifies the additional parameters of the
+                # datasets, which are shared with other plans.
+                job.createJob(
+                    datasets_dict=copy.deepcopy(self.datasets),
+                    experiment_root_folder=self.experiment_root_folder,
+                    results_folder=self.results_folder,
+                    experiment_dict=experiment_dict,
+                    parameter_name=self.parameter_name,
+                    parameter_dict=self.params,
+                    shared_info=self.shared_info)
+                self._is_created = True
+            self._job = job
+            return job
+
+    def releaseJob(self):
+        """Drops the reference to the job to free its memory."""
+        with self._lock:
+            self._job = None
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+import logging
+import threading
+
+
+class JobSchedulerException(Exception):
+    def __init__(self, failed_jobs):
+        Exception.__init__(self)
+        self.failed_jobs = failed_jobs
+
+    def __str__(self):
+        return str(len(self.failed_jobs)) + ' job(s) failed: ' + ', '.join(
+            '"' + str(job_name) + '" (' + str(ex) + ')'
+            for job_name, ex in self.failed_jobs)
+
+
+class JobScheduler(object):
+    """Runs a function for every job of an experiment with a fixed number of
+    concurrent workers.
+
+    The jobs themselves only start and supervise external processes
+    (estimator, console, evaluation scripts), so running them from threads of
+    the same Python process is enough to keep several cores busy.
+    """
+
+    def __init__(self, num_workers=1):
+        logging.basicConfig(level=logging.DEBUG)
+        self.logger = logging.getLogger(__name__)
+        if num_workers < 1:
+            raise ValueError(
+                'The number of workers needs to be at least 1, got ' +
+                str(num_workers) + '.')
+        self.num_workers = num_workers
+        self._lock = threading.Lock()
+        self._jobs_iterator = None
+        self._failed_jobs = []
+
+    def run(self, jobs, run_job_function):
+        """Calls run_job_function(job) for each job in jobs.
+
+        Input:
+        - jobs: iterable of jobs. Jobs are started in the order of the
+              iterable.
+        - run_job_function: function that runs a single job. It is called from
+              one of the worker threads and needs to be thread-safe.
+
+        A job that raises an exception does not stop the other jobs. After all
+        jobs have finished, a JobSchedulerException listing all failed jobs is
+        raised if there was at least one failure.
+        """
+        self._jobs_iterator = iter(jobs)
+        self._failed_jobs = []
+        if self.num_workers == 1:
+            self._worker(run_job_function)
+        else:
+            self.logger.info("Running jobs with %i workers.",
+                             self.num_workers)
+            workers = []
+            for _ in range(self.num_workers):
+                worker = threading.Thread(
+                    target=self._worker, args=(run_job_function, ))
+                # Daemon threads so that a KeyboardInterrupt in the main thread
+                # terminates the experiment.
+                worker.daemon = True
+                worker.start()
+                workers.append(worker)
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(1.0)
+
+        if self._failed_jobs:
+            raise JobSchedulerException(self._failed_jobs)
+
+    def _nextJob(self):
+        with self._lock:
+            return next(self._jobs_iterator, None)
+
+    def _worker(self, run_job_function):
+        job = self._nextJob()
+        while job is not None:
+            try:
+                run_job_function(job)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            # CommandRunnerException derives from BaseException.
+            except BaseException as ex:  # pylint: disable=broad-except
+                job_name = getattr(job, 'job_name', job)
+                self.logger.exception('Job "%s" failed.', job_name)
+                with self._lock:
+                    self._failed_jobs.append((job_name, ex))
+            job = self._nextJob()
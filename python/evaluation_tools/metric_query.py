@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+
+import argparse
+import csv
+import fnmatch
+import logging
+import os
+import sys
+
+import numpy as np
+
+from evaluation_tools.simple_summarization import (
+    SUMMARY_CACHE_FILENAME, SUMMARY_QUANTILES, SimpleSummarization,
+    alphanum_key, getStatsFilesInFolder)
+
+# Keys that cells can be filtered and grouped by. base_parameter_file and
+# sweep_value are derived from the parameter file, see
+# splitSweepParameterFile().
+QUERY_KEYS = ('dataset', 'parameter_file', 'base_parameter_file',
+              'sweep_value', 'metric')
+
+STATISTICS = ['count', 'mean', 'stddev', 'min', 'max'] + [
+    name for name, _ in SUMMARY_QUANTILES
+]
+
+# Store axis of every query key.
+_KEY_AXES = {
+    'dataset': 'dataset',
+    'parameter_file': 'parameter_file',
+    'base_parameter_file': 'parameter_file',
+    'sweep_value': 'parameter_file',
+    'metric': 'metric'
+}
+
+
+def splitSweepParameterFile(parameter_file):
+    """Splits the name of a parameter file of a parameter sweep,
+    <parameter file>_SWEEP_<value>, into (parameter file, value). The value is
+    None for parameter files that are not part of a sweep."""
+    if '_SWEEP_' not in parameter_file:
+        return parameter_file, None
+    base_parameter_file, _, sweep_value = parameter_file.rpartition('_SWEEP_')
+    return base_parameter_file, sweep_value
+
+
+def getStatistic(metric_store, statistic):
+    """Returns an array with a statistic (see STATISTICS) of every cell of a
+    MetricStore, NaN for cells without data."""
+    if statistic == 'count':
+        values = metric_store.count.copy()
+    elif statistic == 'mean':
+        values = metric_store.mean.copy()
+    elif statistic == 'stddev':
+        values = metric_store.stddev()
+    elif statistic == 'min':
+        values = metric_store.minimum.copy()
+    elif statistic == 'max':
+        values = metric_store.maximum.copy()
+    elif statistic in STATISTICS:
+        quantile = dict(SUMMARY_QUANTILES)[statistic]
+        values = np.full(metric_store.count.shape, np.nan)
+        for cell in metric_store.sketches:
+            values[cell] = metric_store.getQuantiles(cell, [quantile])[0]
+    else:
+        raise ValueError("Unknown statistic: " + str(statistic))
+    values[~metric_store.has_data] = np.nan
+    return values
+
+
+def _sortLabels(labels):
+    return sorted(labels, key=lambda label: alphanum_key(str(label)))
+
+
+class MetricQuery(object):
+    """Filters, groups and pivots the metrics of a MetricStore.
+
+    The query keeps secondary indexes {label: indices on the store axis} for
+    every key of QUERY_KEYS and a selection of indices per store axis. A
+    filter only narrows the selection; the cells are only copied out of the
+    store for groupBy() and pivot(), restricted to the selection.
+
+    Example: mean of every metric of a parameter sweep by sweep value:
+      query = MetricQuery(summarization.metric_store)
+      sweep_values, metrics, means = query.filter(
+          base_parameter_file='my_parameters').pivot('sweep_value', 'metric')
+    """
+
+    def __init__(self, metric_store, indexes=None, selection=None):
+        """Creates a query that selects all cells of metric_store. indexes and
+        selection are only passed by the query itself."""
+        self.metric_store = metric_store
+        if indexes is None:
+            indexes = self._createIndexes(metric_store)
+        self.indexes = indexes
+        if selection is None:
+            selection = [
+                np.arange(len(labels), dtype=np.intp)
+                for labels in metric_store.labels
+            ]
+        self.selection = selection
+
+    @staticmethod
+    def _createIndexes(metric_store):
+        indexes = {}
+        for key in QUERY_KEYS:
+            labels = metric_store.labels[metric_store.getAxis(_KEY_AXES[key])]
+            if key == 'base_parameter_file':
+                labels = [splitSweepParameterFile(label)[0] for label in labels]
+            elif key == 'sweep_value':
+                labels = [splitSweepParameterFile(label)[1] for label in labels]
+            index = {}
+            for position, label in enumerate(labels):
+                index.setdefault(label, []).append(position)
+            indexes[key] = {
+                label: np.array(positions, dtype=np.intp)
+                for label, positions in index.items()
+            }
+        return indexes
+
+    def _getIndices(self, key, patterns):
+        """Returns the indices on the store axis of the labels of key that
+        match any of the patterns (see fnmatch)."""
+        if key not in QUERY_KEYS:
+            raise ValueError("Unknown key: " + str(key))
+        if not isinstance(patterns, (list, tuple, set)):
+            patterns = [patterns]
+        index = self.indexes[key]
+        matches = [
+            positions for label, positions in index.items()
+            if label is not None and any(
+                fnmatch.fnmatchcase(str(label), str(pattern))
+                for pattern in patterns)
+        ]
+        if None in patterns and None in index:
+            matches.append(index[None])
+        if not matches:
+            return np.zeros(0, dtype=np.intp)
+        return np.unique(np.concatenate(matches))
+
+    def filter(self, **conditions):
+        """Returns a query with the cells of this query that match all
+        conditions.
+
+        Input: keyword arguments {key of QUERY_KEYS: pattern or list of
+        patterns}. A cell matches a condition if its label matches any of the
+        shell-style patterns, e.g. metric='*error*'. Use sweep_value=None to
+        select the parameter files that are not part of a sweep.
+        """
+        selection = list(self.selection)
+        for key, patterns in conditions.items():
+            indices = self._getIndices(key, patterns)
+            axis_index = self.metric_store.getAxis(_KEY_AXES[key])
+            selection[axis_index] = selection[axis_index][np.in1d(
+                selection[axis_index], indices)]
+        return MetricQuery(self.metric_store, self.indexes, selection)
+
+    def getLabels(self, key):
+        """Returns the distinct labels of key in the selected cells."""
+        axis_index = self.metric_store.getAxis(_KEY_AXES[key])
+        selected = set(self.selection[axis_index].tolist())
+        return _sortLabels(label
+                           for label, positions in self.indexes[key].items()
+                           if selected.intersection(positions.tolist()))
+
+    def getStore(self):
+        """Returns a MetricStore with the selected cells."""
+        store = self.metric_store
+        for axis, indices in zip(store.axes, self.selection):
+            if len(indices) != len(store.labels[store.getAxis(axis)]):
+                store = store.take(axis, indices)
+        return store
+
+    def groupBy(self, *keys):
+        """Merges the selected cells with the same labels of keys.
+
+        The axes not used by keys are merged completely. At most one of
+        parameter_file, base_parameter_file and sweep_value can be used.
+
+        Return value: MetricStore with one axis per key, in the given order,
+        labeled with the (sorted) labels of the key.
+        """
+        for key in keys:
+            if key not in QUERY_KEYS:
+                raise ValueError("Unknown key: " + str(key))
+        axes = [_KEY_AXES[key] for key in keys]
+        if len(set(axes)) != len(axes):
+            raise ValueError("Can't group by more than one key of an axis: " +
+                             str(keys))
+        store = self.getStore()
+        for key, axis in zip(keys, axes):
+            axis_index = store.getAxis(axis)
+            group_labels = self.getLabels(key)
+            positions = {
+                index: position
+                for position, index in enumerate(
+                    self.selection[self.metric_store.getAxis(axis)].tolist())
+            }
+            group_indices = [[
+                positions[index]
+                for index in self.indexes[key][label].tolist()
+                if index in positions
+            ] for label in group_labels]
+            if key == axis:
+                # The labels of an axis are unique, so the groups only need to
+                # be sorted.
+                store = store.take(axis, [
+                    indices[0] for indices in group_indices
+                ])
+            else:
+                store = store.groupAxis(axis, group_labels, group_indices)
+            # The key becomes the name of the axis.
+            store.axes = store.axes[:axis_index] + (key, ) + \
+                store.axes[axis_index + 1:]
+        for axis in set(self.metric_store.axes) - set(axes):
+            store = store.mergeAxis(axis)
+        return store.transpose(keys)
+
+    def pivot(self, rows, columns, statistic='mean'):
+        """Returns a table of a statistic (see STATISTICS) of the selected
+        cells grouped by the keys rows and columns.
+
+        If neither rows nor columns is 'metric', the selection must contain a
+        single metric.
+
+        Return value: tuple (row labels, column labels, 2D array), NaN for
+        combinations without data.
+        """
+        if 'metric' not in (rows, columns) and \
+                len(self.getLabels('metric')) > 1:
+            raise ValueError("Select a single metric to pivot by " + rows +
+                             " and " + columns + ".")
+        store = self.groupBy(rows, columns)
+        return store.labels[0], store.labels[1], getStatistic(store, statistic)
+
+    def writeCsv(self, out_file_stream, keys, statistics=None):
+        """Writes the selected cells grouped by keys as csv with one row per
+        group with data and one column per key and statistic."""
+        statistics = statistics or STATISTICS
+        store = self.groupBy(*keys)
+        values = [getStatistic(store, statistic) for statistic in statistics]
+        writer = csv.writer(out_file_stream)
+        writer.writerow(list(keys) + statistics)
+        for cell in zip(*np.nonzero(store.has_data)):
+            writer.writerow(
+                [store.labels[axis][index] for axis, index in enumerate(cell)]
+                + [
+                    _formatValue(value[cell], statistic)
+                    for value, statistic in zip(values, statistics)
+                ])
+
+    def writePivotCsv(self, out_file_stream, rows, columns, statistic='mean'):
+        """Writes the output of pivot() as csv."""
+        row_labels, column_labels, values = self.pivot(rows, columns,
+                                                       statistic)
+        writer = csv.writer(out_file_stream)
+        writer.writerow([rows + '/' + columns] + column_labels)
+        for row_label, row_values in zip(row_labels, values):
+            writer.writerow([row_label] + [
+                _formatValue(value, statistic) for value in row_values
+            ])
+
+
+def _formatValue(value, statistic):
+    """Formats a value of a statistic for csv, empty for NaN."""
+    if np.isnan(value):
+        return ''
+    if statistic == 'count':
+        return str(int(value))
+    return repr(float(value))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    logger = logging.getLogger(__name__)
+
+    parser = argparse.ArgumentParser(
+        description="""Filter, group and pivot the summarized metrics of a
+        results folder and print them as csv. Filters accept shell-style
+        patterns, e.g. --metric '*error*'.""")
+    parser.add_argument(
+        '--results_folder',
+        required=True,
+        help='folder that contains all job folders')
+    for key in QUERY_KEYS:
+        parser.add_argument(
+            '--' + key, nargs='+', help='only cells with this ' + key)
+    parser.add_argument(
+        '--group_by',
+        nargs='+',
+        choices=QUERY_KEYS,
+        default=['parameter_file', 'metric'],
+        help='keys to group by, all other cells are merged')
+    parser.add_argument(
+        '--pivot',
+        nargs=2,
+        choices=QUERY_KEYS,
+        metavar=('ROWS', 'COLUMNS'),
+        help='print a table of one statistic instead')
+    parser.add_argument(
+        '--statistics',
+        nargs='+',
+        choices=STATISTICS,
+        help='statistics to print, the first one for --pivot')
+    parser.add_argument(
+        '--output_file', help='csv file (default: standard output)')
+    args = parser.parse_args()
+
+    summarization = SimpleSummarization(
+        getStatsFilesInFolder(args.results_folder),
+        cache_file=os.path.join(args.results_folder, SUMMARY_CACHE_FILENAME))
+    query = MetricQuery(summarization.metric_store).filter(
+        **{key: getattr(args, key)
+           for key in QUERY_KEYS if getattr(args, key) is not None})
+
+    out_file_stream = sys.stdout
+    if args.output_file is not None:
+        out_file_stream = open(args.output_file, 'w')
+    try:
+        if args.pivot is not None:
+            query.writePivotCsv(out_file_stream, args.pivot[0], args.pivot[1],
+                                (args.statistics or ['mean'])[0])
+        else:
+            query.writeCsv(out_file_stream, args.group_by, args.statistics)
+    finally:
+        if out_file_stream is not sys.stdout:
+            out_file_stream.close()
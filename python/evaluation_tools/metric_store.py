@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+from evaluation_tools.quantile_sketch import (QuantileSketch,
+                                             getSketchFromMetric)
+
+# Entries of a sample of a metric, in the order of binary_stats.STATS_COLUMNS.
+SAMPLE_COLUMNS = ['samples', 'mean', 'stddev', 'min', 'max']
+
+
+def sampleFromDict(sample):
+    """Converts the dictionary of a metric in a formatted_stats.yaml to a
+    list with the entries in the order of SAMPLE_COLUMNS. If the metric has
+    values, a histogram or a quantile sketch, the list is followed by the
+    sketch as a dictionary, see quantile_sketch.getSketchFromMetric()."""
+    if not isinstance(sample, dict):
+        raise TypeError("Sample is not a dictionary")
+    if not set(SAMPLE_COLUMNS).issubset(sample.keys()):
+        raise ValueError("Malformed sample")
+    values = [sample[column] for column in SAMPLE_COLUMNS]
+    sketch = getSketchFromMetric(sample)
+    if sketch is not None:
+        values.append(sketch.toDict())
+    return values
+
+
+def _mergeGroups(groups, num_groups, count, mean, m2, minimum, maximum):
+    """Merges the statistics of all entries with the same group index.
+
+    The means and the sums of squared deviations (m2) are combined with the
+    pairwise update of Chan et al., generalized to any number of entries: the
+    m2 of a group is the sum of the m2 of its entries plus the count weighted
+    squared deviations of their means from the mean of the group. This avoids
+    the cancellation of the textbook sum of squares formula.
+
+    Input:
+    - groups: group index of every entry, in [0, num_groups).
+    - count, mean, m2, minimum, maximum: statistics of every entry.
+
+    Return value: tuple (count, mean, m2, minimum, maximum) of arrays with
+    num_groups entries. Groups without entries have count 0, mean 0, m2 0 and
+    NaN as minimum and maximum. The minimum and maximum of entries with count
+    0 are ignored.
+    """
+    group_count = np.bincount(groups, count, num_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        group_mean = np.bincount(groups, count * mean,
+                                 num_groups) / group_count
+    group_mean[group_count == 0] = 0.
+    deviation = mean - group_mean[groups]
+    group_m2 = np.bincount(groups, m2 + count * deviation * deviation,
+                           num_groups)
+
+    group_minimum = np.full(num_groups, np.nan)
+    group_maximum = np.full(num_groups, np.nan)
+    minimum = np.where(count > 0, minimum, np.nan)
+    maximum = np.where(count > 0, maximum, np.nan)
+    if len(groups) > 0:
+        order = np.argsort(groups, kind='mergesort')
+        sorted_groups = groups[order]
+        starts = np.flatnonzero(
+            np.concatenate(([True], sorted_groups[1:] != sorted_groups[:-1])))
+        # fmin and fmax ignore NaN, like the minimum of an empty metric.
+        group_minimum[sorted_groups[starts]] = np.fmin.reduceat(
+            minimum[order], starts)
+        group_maximum[sorted_groups[starts]] = np.fmax.reduceat(
+            maximum[order], starts)
+    return group_count, group_mean, group_m2, group_minimum, group_maximum
+
+
+class MetricStore(object):
+    """Dense arrays with the statistics of metrics along named axes.
+
+    With the default axes, every cell holds the statistics of one metric of
+    the runs of one dataset with one parameter file. The statistics are stored
+    as separate arrays with one entry per cell:
+    - count: number of samples.
+    - mean: mean of the samples.
+    - m2: sum of the squared deviations of the samples from the mean.
+    - minimum, maximum: NaN if there are no samples.
+    - has_data: True if the cell was part of a run, also with 0 samples.
+
+    mergeAxis() combines the cells along an axis with vectorised and
+    numerically stable updates, without a Python object per cell.
+
+    The cells of metrics with quantile sketches additionally have an entry
+    {index tuple: QuantileSketch} in sketches, see getQuantiles().
+    """
+
+    AXES = ('dataset', 'parameter_file', 'metric')
+
+    _ARRAYS = ['count', 'mean', 'm2', 'minimum', 'maximum', 'has_data']
+
+    def __init__(self, labels, axes=AXES):
+        """Creates an empty store.
+
+        Input:
+        - labels: list with the labels of the entries of each axis.
+        - axes: names of the axes.
+        """
+        if len(labels) != len(axes):
+            raise ValueError("Expected labels for the axes " + str(axes))
+        self.axes = tuple(axes)
+        self.labels = [list(axis_labels) for axis_labels in labels]
+        shape = tuple(len(axis_labels) for axis_labels in self.labels)
+        self.count = np.zeros(shape)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.minimum = np.full(shape, np.nan)
+        self.maximum = np.full(shape, np.nan)
+        self.has_data = np.zeros(shape, dtype=bool)
+        self.sketches = {}
+
+    @classmethod
+    def fromRuns(cls, runs):
+        """Creates a store with the default axes from the metrics of runs.
+
+        Input:
+        - runs: iterable of tuples (dataset, parameter_file, metrics), where
+              metrics is a dictionary {metric name: sample} and sample a list
+              like returned by sampleFromDict(). Runs with the same dataset
+              and parameter file are merged.
+        """
+        indices = [{}, {}, {}]
+        cell_indices = []
+        samples = []
+        sketches = {}
+        num_columns = len(SAMPLE_COLUMNS)
+        for dataset, parameter_file, metrics in runs:
+            dataset_index = indices[0].setdefault(dataset, len(indices[0]))
+            parameter_file_index = indices[1].setdefault(
+                parameter_file, len(indices[1]))
+            for metric_name, sample in metrics.items():
+                cell = (dataset_index, parameter_file_index,
+                        indices[2].setdefault(metric_name, len(indices[2])))
+                cell_indices.extend(cell)
+                samples.extend(sample[:num_columns])
+                if len(sample) > num_columns:
+                    sketch = QuantileSketch.fromDict(sample[num_columns])
+                    if cell in sketches:
+                        sketches[cell].merge(sketch)
+                    else:
+                        sketches[cell] = sketch
+
+        store = cls([
+            sorted(axis_indices, key=axis_indices.get)
+            for axis_indices in indices
+        ])
+        cell_indices = np.array(
+            cell_indices, dtype=np.intp).reshape(-1, len(cls.AXES))
+        samples = np.array(
+            samples, dtype=np.float64).reshape(-1, len(SAMPLE_COLUMNS))
+        count, mean, stddev, minimum, maximum = samples.T
+        # The stddev of a sample is the sample standard deviation.
+        m2 = stddev * stddev * np.maximum(count - 1., 0.)
+        cells = np.ravel_multi_index(cell_indices.T, store.count.shape)
+        num_cells = store.count.size
+        store._setFlat(*_mergeGroups(cells, num_cells, count, mean, m2,
+                                     minimum, maximum))
+        store.has_data.flat[cells] = True
+        store.sketches = sketches
+        return store
+
+    def _setFlat(self, count, mean, m2, minimum, maximum):
+        shape = self.count.shape
+        self.count = count.reshape(shape)
+        self.mean = mean.reshape(shape)
+        self.m2 = m2.reshape(shape)
+        self.minimum = minimum.reshape(shape)
+        self.maximum = maximum.reshape(shape)
+
+    def getAxis(self, axis):
+        """Returns the position of the axis with the given name."""
+        if axis not in self.axes:
+            raise ValueError("Unknown axis: " + str(axis))
+        return self.axes.index(axis)
+
+    def getIndices(self, axis, labels):
+        """Returns the indices of labels on the axis with the given name.
+
+        Raises a KeyError if a label is not in the store.
+        """
+        axis_labels = self.labels[self.getAxis(axis)]
+        label_indices = dict(zip(axis_labels, range(len(axis_labels))))
+        return [label_indices[label] for label in labels]
+
+    def variance(self):
+        """Returns the sample variance of every cell, 0 for cells with less
+        than 2 samples."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1., self.m2 / (self.count - 1.), 0.)
+
+    def stddev(self):
+        """Returns the sample standard deviation of every cell."""
+        return np.sqrt(self.variance())
+
+    def getQuantiles(self, cell, quantiles):
+        """Returns the quantiles (each in [0, 1]) of the cell with the given
+        index tuple or None if the cell has no quantile sketch."""
+        sketch = self.sketches.get(tuple(cell))
+        if sketch is None:
+            return None
+        return [sketch.quantile(q) for q in quantiles]
+
+    def take(self, axis, indices):
+        """Returns a MetricStore with the entries with the given indices on an
+        axis, in the order of indices."""
+        axis_index = self.getAxis(axis)
+        labels = list(self.labels)
+        labels[axis_index] = [labels[axis_index][index] for index in indices]
+        store = MetricStore(labels, self.axes)
+        for name in self._ARRAYS:
+            setattr(store, name,
+                    np.take(getattr(self, name), indices, axis=axis_index))
+        positions = {}
+        for position, index in enumerate(indices):
+            positions.setdefault(index, []).append(position)
+        # The sketches are shared, merging copies them.
+        for cell, sketch in self.sketches.items():
+            for position in positions.get(cell[axis_index], []):
+                store.sketches[cell[:axis_index] + (position, ) +
+                               cell[axis_index + 1:]] = sketch
+        return store
+
+    def transpose(self, axes):
+        """Returns a MetricStore with the axes in the given order."""
+        order = [self.getAxis(axis) for axis in axes]
+        if sorted(order) != list(range(len(self.axes))):
+            raise ValueError("Expected a permutation of the axes " +
+                             str(self.axes))
+        store = MetricStore([self.labels[index] for index in order], axes)
+        for name in self._ARRAYS:
+            setattr(store, name, np.transpose(getattr(self, name), order))
+        store.sketches = {
+            tuple(cell[index] for index in order): sketch
+            for cell, sketch in self.sketches.items()
+        }
+        return store
+
+    def mergeAxis(self, axis, labels=None):
+        """Merges the cells along an axis.
+
+        Input:
+        - axis: name of the axis to merge.
+        - labels: labels of the entries of the axis to merge, all if None.
+
+        Return value: MetricStore without the merged axis.
+        """
+        if labels is not None:
+            return self.take(axis, self.getIndices(axis,
+                                                   labels)).mergeAxis(axis)
+        axis_index = self.getAxis(axis)
+        count = self.count
+        mean = self.mean
+
+        merged = MetricStore(
+            self.labels[:axis_index] + self.labels[axis_index + 1:],
+            self.axes[:axis_index] + self.axes[axis_index + 1:])
+        if count.shape[axis_index] == 0:
+            return merged
+        merged.count = count.sum(axis=axis_index)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            merged.mean = (count * mean).sum(axis=axis_index) / merged.count
+        merged.mean[merged.count == 0] = 0.
+        deviation = mean - np.expand_dims(merged.mean, axis_index)
+        merged.m2 = (self.m2 + count * deviation * deviation).sum(
+            axis=axis_index)
+        # Cells without samples don't contribute to the minimum and maximum.
+        merged.minimum = np.fmin.reduce(
+            np.where(count > 0, self.minimum, np.nan), axis=axis_index)
+        merged.maximum = np.fmax.reduce(
+            np.where(count > 0, self.maximum, np.nan), axis=axis_index)
+        merged.has_data = self.has_data.any(axis=axis_index)
+
+        for cell, sketch in self.sketches.items():
+            merged_cell = cell[:axis_index] + cell[axis_index + 1:]
+            if merged_cell in merged.sketches:
+                merged.sketches[merged_cell].merge(sketch)
+            else:
+                merged.sketches[merged_cell] = sketch.copy()
+        return merged
+
+    def groupAxis(self, axis, group_labels, group_indices):
+        """Merges groups of entries of an axis.
+
+        Input:
+        - axis: name of the axis.
+        - group_labels: labels of the groups, the new labels of the axis.
+        - group_indices: list with the indices on the axis of each group.
+
+        Return value: MetricStore with one entry per group on the axis.
+        """
+        axis_index = self.getAxis(axis)
+        labels = list(self.labels)
+        labels[axis_index] = list(group_labels)
+        grouped = MetricStore(labels, self.axes)
+        merged_groups = [
+            self.take(axis, indices).mergeAxis(axis)
+            for indices in group_indices
+        ]
+        if not merged_groups:
+            return grouped
+        for name in self._ARRAYS:
+            setattr(grouped, name,
+                    np.stack([getattr(merged, name)
+                              for merged in merged_groups],
+                             axis=axis_index))
+        for group_index, merged in enumerate(merged_groups):
+            for cell, sketch in merged.sketches.items():
+                grouped.sketches[cell[:axis_index] + (group_index, ) +
+                                 cell[axis_index:]] = sketch
+        return grouped
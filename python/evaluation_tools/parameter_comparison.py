@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+
+import argparse
+import csv
+import logging
+import os
+
+import numpy as np
+
+from evaluation_tools.simple_summarization import (
+    SUMMARY_CACHE_FILENAME, SimpleSummarization, getStatsFilesInFolder)
+
+COMPARISON_COLUMNS = [
+    'metric', 'parameter_file_a', 'parameter_file_b', 'num_datasets',
+    'mean_a', 'mean_b', 'difference', 'relative_difference', 'ci_low',
+    'ci_high', 'p_value', 'significant'
+]
+
+# Upper bound of the number of bootstrap replicates held in memory at once.
+_MAX_REPLICATES_PER_CHUNK = 10000000
+
+
+def _getResampleWeights(num_datasets, num_resamples, seed):
+    """Returns a (num_resamples, num_datasets) array with the number of times
+    every dataset is drawn in each bootstrap resample."""
+    rng = np.random.RandomState(seed)
+    draws = rng.randint(0, num_datasets, size=(num_resamples, num_datasets))
+    draws += num_datasets * np.arange(num_resamples)[:, np.newaxis]
+    return np.bincount(
+        draws.ravel(), minlength=num_resamples * num_datasets).reshape(
+            num_resamples, num_datasets).astype(np.float64)
+
+
+def _bootstrapMeanDifferences(differences, weights, confidence):
+    """Bootstraps the mean of the paired differences of every comparison.
+
+    Input:
+    - differences: (comparisons, datasets) array with the paired differences
+          of comparisons that have the same paired datasets.
+    - weights: output of _getResampleWeights() for these datasets.
+
+    Return value: tuple (ci_low, ci_high, p_value) with one entry per
+    comparison. The p-value is the fraction of replicates whose deviation
+    from the observed mean is at least as large as the observed mean, i.e. the
+    two-sided test of a zero mean difference with the centered bootstrap
+    distribution.
+    """
+    num_datasets = differences.shape[1]
+    observed = differences.mean(axis=1)
+    # One matrix product computes the sums of all resamples at once.
+    replicates = differences.dot(weights.T) / num_datasets
+
+    deviations = np.abs(replicates - observed[:, np.newaxis])
+    p_value = (deviations >= np.abs(observed)[:, np.newaxis]).mean(axis=1)
+
+    replicates.sort(axis=1)
+    alpha = (1. - confidence) / 2.
+    index_low, index_high = [
+        int(np.floor(q * (replicates.shape[1] - 1)))
+        for q in [alpha, 1. - alpha]
+    ]
+    return replicates[:, index_low], replicates[:, index_high], p_value
+
+
+def compareParameterFiles(metric_store,
+                          metrics=None,
+                          num_resamples=2000,
+                          confidence=0.95,
+                          seed=0,
+                          min_datasets=2):
+    """Compares the metrics of every pair of parameter files.
+
+    For every metric and pair of parameter files (a, b), the per-dataset
+    difference of the means a - b is computed on the datasets that have the
+    metric for both parameter files. The mean of these paired differences is
+    bootstrapped by resampling these paired datasets, which gives a confidence
+    interval and a p-value for a difference of zero. Comparisons with the same
+    paired datasets use the same resamples, which are drawn from a RandomState
+    with the given seed, so the results are reproducible.
+
+    Input:
+    - metric_store: MetricStore with the default axes, e.g.
+          SimpleSummarization.metric_store.
+    - metrics: names of the metrics to compare, all if None.
+    - num_resamples: number of bootstrap resamples.
+    - confidence: level of the confidence interval.
+    - seed: seed of the resampling.
+    - min_datasets: comparisons with fewer paired datasets get no confidence
+          interval and p-value (NaN).
+
+    Return value: list with one dictionary with the COMPARISON_COLUMNS per
+    comparison, ranked by p-value (NaN last) and then by the magnitude of
+    the relative difference. A difference is significant if the confidence
+    interval doesn't contain 0.
+    """
+    datasets, parameter_files, metric_names = metric_store.labels
+    metric_indices = np.arange(len(metric_names))
+    if metrics is not None:
+        metric_indices = np.array(
+            metric_store.getIndices('metric', metrics), dtype=np.intp)
+    if len(parameter_files) < 2 or len(metric_indices) == 0:
+        return []
+
+    # (datasets, comparisons) arrays, ordered by pair and then by metric.
+    index_a, index_b = np.triu_indices(len(parameter_files), 1)
+    has_metric = metric_store.has_data & (metric_store.count > 0)
+    has_metric = has_metric[:, :, metric_indices]
+    means = metric_store.mean[:, :, metric_indices]
+    num_comparisons = len(index_a) * len(metric_indices)
+    is_valid = (has_metric[:, index_a, :] & has_metric[:, index_b, :]).reshape(
+        len(datasets), num_comparisons)
+    means_a = means[:, index_a, :].reshape(len(datasets), num_comparisons)
+    means_b = means[:, index_b, :].reshape(len(datasets), num_comparisons)
+    differences = np.where(is_valid, means_a - means_b, 0.).T
+    is_valid = is_valid.T
+
+    num_paired_datasets = is_valid.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_a = (means_a.T * is_valid).sum(axis=1) / num_paired_datasets
+        mean_b = (means_b.T * is_valid).sum(axis=1) / num_paired_datasets
+    difference = mean_a - mean_b
+
+    ci_low = np.full(num_comparisons, np.nan)
+    ci_high = np.full(num_comparisons, np.nan)
+    p_value = np.full(num_comparisons, np.nan)
+    to_bootstrap = np.flatnonzero(num_paired_datasets >= min_datasets)
+    if len(to_bootstrap) > 0:
+        # Every comparison is resampled over its own paired datasets.
+        # Comparisons with the same paired datasets share their resamples.
+        patterns, pattern_indices = np.unique(
+            is_valid[to_bootstrap], axis=0, return_inverse=True)
+        pattern_indices = pattern_indices.ravel()
+        chunk_size = max(1, _MAX_REPLICATES_PER_CHUNK // num_resamples)
+        for pattern_index, pattern in enumerate(patterns):
+            comparison_indices = to_bootstrap[pattern_indices ==
+                                              pattern_index]
+            dataset_indices = np.flatnonzero(pattern)
+            weights = _getResampleWeights(
+                len(dataset_indices), num_resamples, seed)
+            for start in range(0, len(comparison_indices), chunk_size):
+                chunk = comparison_indices[start:start + chunk_size]
+                ci_low[chunk], ci_high[chunk], p_value[chunk] = \
+                    _bootstrapMeanDifferences(
+                        differences[np.ix_(chunk, dataset_indices)], weights,
+                        confidence)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        relative_difference = difference / np.abs(mean_b)
+    pair_indices, metric_positions = np.divmod(
+        np.arange(num_comparisons), len(metric_indices))
+    order = np.lexsort((-np.nan_to_num(np.abs(relative_difference)),
+                        np.where(np.isnan(p_value), np.inf, p_value)))
+
+    comparisons = []
+    for i in order.tolist():
+        if num_paired_datasets[i] == 0:
+            continue
+        comparisons.append({
+            'metric': metric_names[metric_indices[metric_positions[i]]],
+            'parameter_file_a': parameter_files[index_a[pair_indices[i]]],
+            'parameter_file_b': parameter_files[index_b[pair_indices[i]]],
+            'num_datasets': int(num_paired_datasets[i]),
+            'mean_a': float(mean_a[i]),
+            'mean_b': float(mean_b[i]),
+            'difference': float(difference[i]),
+            'relative_difference': float(relative_difference[i]),
+            'ci_low': float(ci_low[i]),
+            'ci_high': float(ci_high[i]),
+            'p_value': float(p_value[i]),
+            'significant': bool(ci_low[i] > 0. or ci_high[i] < 0.)
+        })
+    return comparisons
+
+
+def writeComparisonTable(comparisons, output_file):
+    """Writes the output of compareParameterFiles() as csv."""
+    with open(output_file, 'w') as out_file_stream:
+        writer = csv.writer(out_file_stream)
+        writer.writerow(COMPARISON_COLUMNS)
+        for comparison in comparisons:
+            writer.writerow(
+                [comparison[column] for column in COMPARISON_COLUMNS])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    logger = logging.getLogger(__name__)
+
+    parser = argparse.ArgumentParser(
+        description="""Compare the metrics of all pairs of parameter files of
+        an experiment with paired bootstrap tests over the datasets.""")
+    parser.add_argument(
+        '--results_folder',
+        required=True,
+        help='folder that contains all job folders')
+    parser.add_argument(
+        '--output_file',
+        help='csv file for the ranked comparisons (default: '
+        'results_folder/parameter_comparison.csv)')
+    parser.add_argument('--metrics', nargs='+', help='metrics to compare')
+    parser.add_argument('--resamples', type=int, default=2000)
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    summarization = SimpleSummarization(
+        getStatsFilesInFolder(args.results_folder),
+        cache_file=os.path.join(args.results_folder, SUMMARY_CACHE_FILENAME))
+    comparisons = compareParameterFiles(
+        summarization.metric_store,
+        metrics=args.metrics,
+        num_resamples=args.resamples,
+        confidence=args.confidence,
+        seed=args.seed)
+    output_file = args.output_file or os.path.join(args.results_folder,
+                                                   'parameter_comparison.csv')
+    writeComparisonTable(comparisons, output_file)
+    logger.info("Wrote %i comparisons, %i significant, to %s.",
+                len(comparisons),
+                sum(comparison['significant'] for comparison in comparisons),
+                output_file)
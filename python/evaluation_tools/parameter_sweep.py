@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+import itertools
+import random
+
+SWEEP_MODES = ['grid', 'random', 'latin_hypercube']
+
+# Maximum number of values of a single parameter sweep (min/max/step_size).
+MAX_SINGLE_PARAMETER_STEPS = 100
+
+
+def _getGridValues(p_min, p_max, p_step_size, max_steps=None):
+    values = []
+    p_current = p_min
+    while p_current <= p_max and (max_steps is None
+                                  or len(values) < max_steps):
+        values.append(p_current)
+        p_current += p_step_size
+    return values
+
+
+class SweepDimension(object):
+    """One parameter of a multi-parameter sweep.
+
+    The parameter is described either by an explicit list of values:
+      {name: <parameter name>, values: [<value>, ...]}
+    or by a range:
+      {name: <parameter name>, min: <min>, max: <max>, step_size: <step>}
+    step_size is the spacing of the grid and is optional for random and
+    Latin-hypercube sampling, where it rounds the sampled values.
+    """
+
+    def __init__(self, dimension_dict):
+        if 'name' not in dimension_dict:
+            raise ValueError('Every swept parameter needs a name.')
+        self.name = dimension_dict['name']
+        self.values = dimension_dict.get('values')
+        self.min = dimension_dict.get('min')
+        self.max = dimension_dict.get('max')
+        self.step_size = dimension_dict.get('step_size')
+        if self.values is None and (self.min is None or self.max is None):
+            raise ValueError('The swept parameter "' + str(self.name) +
+                             '" needs either values or min and max.')
+        if self.values is not None and not self.values:
+            raise ValueError('The swept parameter "' + str(self.name) +
+                             '" has no values.')
+
+    def getGridValues(self):
+        if self.values is not None:
+            return list(self.values)
+        if self.step_size is None:
+            raise ValueError('The swept parameter "' + str(self.name) +
+                             '" needs a step_size for the grid mode.')
+        return _getGridValues(self.min, self.max, self.step_size)
+
+    def getValue(self, fraction):
+        """Returns the value at fraction in [0, 1) of the range."""
+        if self.values is not None:
+            return self.values[min(
+                int(fraction * len(self.values)),
+                len(self.values) - 1)]
+        value = self.min + fraction * (self.max - self.min)
+        if self.step_size is not None:
+            value = self.min + round(
+                (value - self.min) / float(self.step_size)) * self.step_size
+            value = min(self.max, value)
+            if all(
+                    isinstance(number, int)
+                    for number in [self.min, self.max, self.step_size]):
+                return int(value)
+        return value
+
+
+def isMultiParameterSweep(sweep_dict):
+    return 'parameters' in sweep_dict
+
+
+def getSweepPoints(sweep_dict):
+    """Generates the parameter values of a parameter sweep.
+
+    sweep_dict is the parameter_sweep entry of a parameter file, either a
+    single parameter sweep:
+      {name: <parameter name>, min: <min>, max: <max>, step_size: <step>}
+    which is limited to MAX_SINGLE_PARAMETER_STEPS values, or a
+    multi-parameter sweep:
+      mode: grid, random or latin_hypercube (default: grid)
+      parameters: list of SweepDimension dicts.
+      samples: number of points for random and latin_hypercube.
+      seed: seed of the random sampling (default: 0).
+
+    grid is the cartesian product of the values of all parameters. random
+    samples every parameter independently and uniformly, latin_hypercube
+    samples each parameter once from each of `samples` equally sized
+    strata, which covers the ranges more evenly than random sampling.
+
+    Yields one dictionary {<parameter name>: <value>} per point. The points
+    are generated lazily, so large sweeps don't need to be kept in memory.
+    """
+    if not isMultiParameterSweep(sweep_dict):
+        for value in _getGridValues(
+                sweep_dict['min'],
+                sweep_dict['max'],
+                sweep_dict['step_size'],
+                max_steps=MAX_SINGLE_PARAMETER_STEPS):
+            yield {sweep_dict['name']: value}
+        return
+
+    mode = sweep_dict.get('mode', 'grid')
+    if mode not in SWEEP_MODES:
+        raise ValueError('Unknown parameter sweep mode "' + str(mode) +
+                         '", valid modes are: ' + ', '.join(SWEEP_MODES))
+    dimensions = [
+        SweepDimension(dimension_dict)
+        for dimension_dict in sweep_dict['parameters']
+    ]
+    if not dimensions:
+        raise ValueError('A parameter sweep needs at least one parameter.')
+    names = [dimension.name for dimension in dimensions]
+
+    if mode == 'grid':
+        for values in itertools.product(
+                *[dimension.getGridValues() for dimension in dimensions]):
+            yield dict(zip(names, values))
+        return
+
+    if 'samples' not in sweep_dict:
+        raise ValueError('The parameter sweep mode "' + mode +
+                         '" needs the number of samples.')
+    num_samples = int(sweep_dict['samples'])
+    rng = random.Random(sweep_dict.get('seed', 0))
+    if mode == 'random':
+        for _ in range(num_samples):
+            yield {
+                dimension.name: dimension.getValue(rng.random())
+                for dimension in dimensions
+            }
+        return
+
+    # Latin hypercube: a random permutation of the strata per dimension.
+    strata = []
+    for _ in dimensions:
+        dimension_strata = list(range(num_samples))
+        rng.shuffle(dimension_strata)
+        strata.append(dimension_strata)
+    for sample_index in range(num_samples):
+        yield {
+            dimension.name: dimension.getValue(
+                (dimension_strata[sample_index] + rng.random()) / num_samples)
+            for dimension, dimension_strata in zip(dimensions, strata)
+        }
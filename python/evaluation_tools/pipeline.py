@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+import logging
+import threading
+import time
+
+from evaluation_tools.job_scheduler import JobSchedulerException
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+
+class PipelineStage(object):
+    """One stage of a Pipeline.
+
+    Input:
+    - name: name of the stage, used for logging and the statistics.
+    - function: function that is called with each item. Returns True if the
+          item should be passed on to the next stage and False if the
+          processing of the item should stop after this stage.
+    - num_workers: number of items that are processed concurrently by this
+          stage.
+    """
+
+    def __init__(self, name, function, num_workers=1):
+        if num_workers < 1:
+            raise ValueError('Stage "' + name +
+                             '" needs at least 1 worker, got ' +
+                             str(num_workers) + '.')
+        self.name = name
+        self.function = function
+        self.num_workers = num_workers
+        self.queue = queue.Queue()
+
+        self.lock = threading.Lock()
+        self.processed_items = 0
+        self.failed_items = 0
+        self.max_queue_depth = 0
+        self.busy_time = 0.
+        self.idle_time = 0.
+
+    def getStatistics(self):
+        return {
+            'num_workers': self.num_workers,
+            'processed_items': self.processed_items,
+            'failed_items': self.failed_items,
+            'max_queue_depth': self.max_queue_depth,
+            'busy_time_s': round(self.busy_time, 3),
+            'idle_time_s': round(self.idle_time, 3)
+        }
+
+
+class Pipeline(object):
+    """Runs items through a sequence of stages.
+
+    Every stage has its own queue and worker threads, so different items can
+    be in different stages at the same time (e.g. the evaluation of job i runs
+    while the estimator of job i+1 is running). Each item goes through the
+    stages in order.
+    """
+
+    _STOP = object()
+
+    def __init__(self, stages):
+        logging.basicConfig(level=logging.DEBUG)
+        self.logger = logging.getLogger(__name__)
+        if not stages:
+            raise ValueError('A pipeline needs at least one stage.')
+        self.stages = stages
+        self.statistics = {}
+        self._failed_items = []
+        self._failed_items_lock = threading.Lock()
+        self._items_fed = 0
+        self._items_in_flight = 0
+        self._items_in_flight_condition = threading.Condition()
+
+    def run(self, items):
+        """Processes all items and blocks until they went through all stages.
+
+        Returns a dictionary with the statistics of each stage (queue depth,
+        idle and busy time of the workers, ...). The statistics are also stored
+        in self.statistics.
+
+        An item for which a stage raises an exception is not passed on to the
+        next stage. After all items have been processed, a
+        JobSchedulerException listing all failed items is raised if there was
+        at least one failure.
+        """
+        self._failed_items = []
+        self._items_fed = 0
+        workers = []
+        for stage_index, stage in enumerate(self.stages):
+            for _ in range(stage.num_workers):
+                worker = threading.Thread(
+                    target=self._worker, args=(stage_index, ))
+                # Daemon threads so that a KeyboardInterrupt in the main thread
+                # terminates the experiment.
+                worker.daemon = True
+                worker.start()
+                workers.append(worker)
+
+        for item in items:
+            # Items are only handed to the first stage once it has a free
+            # worker. This keeps items that are generated lazily from being
+            # created long before they are needed.
+            with self._items_in_flight_condition:
+                while (self._numItemsInFirstStage() >=
+                       self.stages[0].num_workers):
+                    self._items_in_flight_condition.wait(1.0)
+                self._items_in_flight += 1
+                self._items_fed += 1
+            self._put(0, item)
+
+        with self._items_in_flight_condition:
+            while self._items_in_flight > 0:
+                self._items_in_flight_condition.wait(1.0)
+
+        for stage in self.stages:
+            for _ in range(stage.num_workers):
+                stage.queue.put(self._STOP)
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(1.0)
+
+        self.statistics = {}
+        for stage in self.stages:
+            self.statistics[stage.name] = stage.getStatistics()
+            self.logger.info(
+                'Pipeline stage "%s": %i items processed (%i failed), max '
+                'queue depth %i, busy %.1fs, idle %.1fs (%i workers).',
+                stage.name, stage.processed_items, stage.failed_items,
+                stage.max_queue_depth, stage.busy_time, stage.idle_time,
+                stage.num_workers)
+
+        if self._failed_items:
+            raise JobSchedulerException(self._failed_items)
+        return self.statistics
+
+    def _numItemsInFirstStage(self):
+        """Needs to be called while holding _items_in_flight_condition."""
+        first_stage = self.stages[0]
+        with first_stage.lock:
+            return self._items_fed - (
+                first_stage.processed_items + first_stage.failed_items)
+
+    def _put(self, stage_index, item):
+        stage = self.stages[stage_index]
+        stage.queue.put(item)
+        with stage.lock:
+            stage.max_queue_depth = max(stage.max_queue_depth,
+                                        stage.queue.qsize())
+
+    def _finishItem(self):
+        with self._items_in_flight_condition:
+            self._items_in_flight -= 1
+            self._items_in_flight_condition.notify_all()
+
+    def _worker(self, stage_index):
+        stage = self.stages[stage_index]
+        while True:
+            idle_start = time.time()
+            item = stage.queue.get()
+            busy_start = time.time()
+            with stage.lock:
+                stage.idle_time += busy_start - idle_start
+            if item is self._STOP:
+                return
+
+            continue_processing = False
+            failed = False
+            try:
+                continue_processing = stage.function(item)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            # CommandRunnerException derives from BaseException.
+            except BaseException as ex:  # pylint: disable=broad-except
+                item_name = getattr(item, 'job_name', item)
+                self.logger.exception('Stage "%s" failed for "%s".',
+                                      stage.name, item_name)
+                with self._failed_items_lock:
+                    self._failed_items.append((item_name, ex))
+                failed = True
+
+            with stage.lock:
+                stage.busy_time += time.time() - busy_start
+                if failed:
+                    stage.failed_items += 1
+                else:
+                    stage.processed_items += 1
+
+            if continue_processing and stage_index + 1 < len(self.stages):
+                self._put(stage_index + 1, item)
+            else:
+                self._finishItem()
+            if stage_index == 0:
+                with self._items_in_flight_condition:
+                    self._items_in_flight_condition.notify_all()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+
+from array import array
+import logging
+import os
+import resource
+import threading
+import time
+
+import numpy as np
+
+PROCESS_SAMPLES_FILENAME = 'process_samples.bin'
+
+# Columns of a sample:
+# - time_s: time since the start of the sampling.
+# - cpu_percent: CPU utilisation since the previous sample, 100 corresponds to
+#       one fully used core.
+# - rss_kb: resident set size.
+# - num_threads, num_processes: number of threads and processes.
+# - read_bytes, write_bytes: bytes read from and written to storage.
+# All values except time_s are summed over the process and all its running
+# descendants.
+SAMPLE_COLUMNS = [
+    'time_s', 'cpu_percent', 'rss_kb', 'num_threads', 'num_processes',
+    'read_bytes', 'write_bytes'
+]
+
+_FILE_HEADER_PREFIX = '# process_samples v1 '
+
+_CLOCK_TICKS_PER_S = float(os.sysconf('SC_CLK_TCK'))
+_PAGE_SIZE_KB = resource.getpagesize() / 1024.
+
+
+def _readFile(path):
+    with open(path, 'r') as in_file_stream:
+        return in_file_stream.read()
+
+
+def _getChildren(pid):
+    """Returns the pids of the direct children of a process."""
+    children = []
+    if not os.path.isdir('/proc/%i' % pid):
+        return children
+    try:
+        for task in os.listdir('/proc/%i/task' % pid):
+            children.extend(
+                int(child) for child in _readFile(
+                    '/proc/%i/task/%s/children' % (pid, task)).split())
+        return children
+    except (IOError, OSError):
+        pass
+
+    # Fallback for kernels without /proc/<pid>/task/<tid>/children.
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            stat = _readFile('/proc/%s/stat' % entry)
+        except (IOError, OSError):
+            continue
+        if int(stat.rpartition(')')[2].split()[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def _readProcessStats(pid):
+    """Returns (cpu_time_s, rss_kb, num_threads, read_bytes, write_bytes) of a
+    single process or None if the process doesn't exist anymore or already
+    exited."""
+    try:
+        # The process name can contain spaces, the fields after it can not.
+        fields = _readFile('/proc/%i/stat' % pid).rpartition(')')[2].split()
+    except (IOError, OSError):
+        return None
+    if fields[0] in ['Z', 'X']:
+        return None
+    cpu_time_s = (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS_PER_S
+    num_threads = int(fields[17])
+    rss_kb = int(fields[21]) * _PAGE_SIZE_KB
+
+    read_bytes = 0
+    write_bytes = 0
+    try:
+        for line in _readFile('/proc/%i/io' % pid).splitlines():
+            key, _, value = line.partition(':')
+            if key == 'read_bytes':
+                read_bytes = int(value)
+            elif key == 'write_bytes':
+                write_bytes = int(value)
+    except (IOError, OSError):
+        # /proc/<pid>/io is not readable on all systems.
+        pass
+    return cpu_time_s, rss_kb, num_threads, read_bytes, write_bytes
+
+
+def getProcessTree(pid):
+    """Returns the pids of a process and all its running descendants."""
+    pids = []
+    pending_pids = [pid]
+    while pending_pids:
+        current_pid = pending_pids.pop()
+        pids.append(current_pid)
+        pending_pids.extend(_getChildren(current_pid))
+    return pids
+
+
+def getProcessTreeStats(pid):
+    """Returns (cpu_time_s, rss_kb, num_threads, read_bytes, write_bytes,
+    num_processes) summed over a process and all its running descendants or
+    None if the process doesn't exist anymore."""
+    totals = None
+    num_processes = 0
+    for current_pid in getProcessTree(pid):
+        stats = _readProcessStats(current_pid)
+        if stats is None:
+            continue
+        totals = stats if totals is None else [
+            total + value for total, value in zip(totals, stats)
+        ]
+        num_processes += 1
+    if totals is None:
+        return None
+    return list(totals) + [num_processes]
+
+
+class ProcessSampler(object):
+    """Periodically samples the resource usage of a running process and all
+    its descendants from /proc and writes the samples to a file.
+
+    The file starts with a text header line that lists the columns (see
+    SAMPLE_COLUMNS), followed by the samples as native float64 records. The
+    samples are written as they are taken, so the file is usable even if the
+    experiment is interrupted. Use loadProcessSamples() to read the file.
+    """
+
+    def __init__(self, pid, output_file, rate_hz=2.):
+        logging.basicConfig(level=logging.DEBUG)
+        self.logger = logging.getLogger(__name__)
+        if rate_hz <= 0:
+            raise ValueError('The sampling rate needs to be positive, got ' +
+                             str(rate_hz) + '.')
+        self.pid = pid
+        self.output_file = output_file
+        self.period_s = 1. / rate_hz
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the sampling and waits until the file is written."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        start_time = time.time()
+        previous_time = start_time
+        previous_cpu_time_s = None
+        with open(self.output_file, 'wb') as out_file_stream:
+            out_file_stream.write(
+                (_FILE_HEADER_PREFIX + ','.join(SAMPLE_COLUMNS) + '\n').encode(
+                    'ascii'))
+            while not self._stop_event.is_set():
+                sample = getProcessTreeStats(self.pid)
+                current_time = time.time()
+                if sample is None:
+                    break
+                (cpu_time_s, rss_kb, num_threads, read_bytes, write_bytes,
+                 num_processes) = sample
+
+                cpu_percent = 0.
+                if (previous_cpu_time_s is not None
+                        and current_time > previous_time):
+                    # Can be negative if a child process exited.
+                    cpu_percent = max(
+                        0., 100. * (cpu_time_s - previous_cpu_time_s) /
+                        (current_time - previous_time))
+                previous_time = current_time
+                previous_cpu_time_s = cpu_time_s
+
+                array('d', [
+                    current_time - start_time, cpu_percent, rss_kb,
+                    num_threads, num_processes, read_bytes, write_bytes
+                ]).tofile(out_file_stream)
+                out_file_stream.flush()
+                self._stop_event.wait(self.period_s)
+
+
+def loadProcessSamples(samples_file):
+    """Loads a file written by a ProcessSampler.
+
+    Return value: dictionary with one NumPy array per column, see
+    SAMPLE_COLUMNS.
+    """
+    with open(samples_file, 'rb') as in_file_stream:
+        header = in_file_stream.readline().decode('ascii').strip()
+        if not header.startswith(_FILE_HEADER_PREFIX.strip()):
+            raise ValueError('Not a process samples file: ' + samples_file)
+        columns = header[len(_FILE_HEADER_PREFIX):].split(',')
+        data = in_file_stream.read()
+    # Drop a partially written sample at the end.
+    sample_size = len(columns) * np.dtype(np.float64).itemsize
+    num_samples = len(data) // sample_size
+    data = np.frombuffer(
+        data[:num_samples * sample_size], dtype=np.float64).reshape(
+            num_samples, len(columns))
+    return {column: data[:, index] for index, column in enumerate(columns)}
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""Mergeable quantile sketches for the metrics of the summarization.
+
+QuantileSketch follows DDSketch (Masson et al., 2019): every value is counted
+in a bucket with logarithmically growing width, so any quantile is returned
+with a relative error of at most relative_accuracy. Sketches with the same
+accuracy are merged by adding the bucket counts, which makes the merged
+quantiles as accurate as the quantiles of a sketch of all values. The number
+of buckets only grows with the logarithm of the range of the values.
+
+A metric in a statistics.yaml can provide its values in one of three ways, see
+getSketchFromMetric():
+- values: list with the raw samples.
+- histogram: {bin_edges: [...], counts: [...]} like numpy.histogram().
+- sketch: a sketch written by QuantileSketch.toDict().
+"""
+
+import math
+
+import numpy as np
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# Values with a smaller magnitude are counted as 0.
+_MIN_INDEXABLE_VALUE = 1e-9
+
+
+class QuantileSketch(object):
+    """DDSketch with the values of one metric."""
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        if not 0. < relative_accuracy < 1.:
+            raise ValueError("The relative accuracy must be in (0, 1).")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1. + relative_accuracy) / (1. - relative_accuracy)
+        self._multiplier = 1. / math.log(self._gamma)
+        self.count = 0
+        self.zero_count = 0
+        # {bucket index: count} of the positive values and of the magnitudes
+        # of the negative values.
+        self.positive_buckets = {}
+        self.negative_buckets = {}
+
+    def add(self, value, count=1):
+        """Adds count times the value."""
+        self.addValues([value], [count])
+
+    def addValues(self, values, counts=None):
+        """Adds all values, each counts[i] times (once if counts is None)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if counts is None:
+            counts = np.ones(len(values), dtype=np.int64)
+        else:
+            counts = np.asarray(counts).ravel()
+            if len(counts) != len(values):
+                raise ValueError("Expected one count per value.")
+        valid = np.isfinite(values) & (counts > 0)
+        values = values[valid]
+        counts = counts[valid]
+
+        is_zero = np.abs(values) < _MIN_INDEXABLE_VALUE
+        self.zero_count += counts[is_zero].sum().item()
+        for buckets, mask in [(self.positive_buckets, values > 0.),
+                              (self.negative_buckets, values < 0.)]:
+            mask &= ~is_zero
+            if not mask.any():
+                continue
+            indices = np.ceil(
+                np.log(np.abs(values[mask])) * self._multiplier).astype(
+                    np.int64)
+            unique_indices, inverse = np.unique(indices, return_inverse=True)
+            bucket_counts = np.bincount(inverse, counts[mask])
+            if counts.dtype.kind in 'iu':
+                bucket_counts = bucket_counts.astype(np.int64)
+            for index, bucket_count in zip(unique_indices.tolist(),
+                                           bucket_counts.tolist()):
+                buckets[index] = buckets.get(index, 0) + bucket_count
+        self.count += counts.sum().item()
+
+    def addHistogram(self, bin_edges, counts):
+        """Adds a histogram, e.g. from numpy.histogram(). The values of a bin
+        are assumed to be at its center, so the quantiles are only as accurate
+        as the bins."""
+        bin_edges = np.asarray(bin_edges, dtype=np.float64)
+        if len(bin_edges) != len(counts) + 1:
+            raise ValueError("Expected one bin edge more than counts.")
+        self.addValues((bin_edges[:-1] + bin_edges[1:]) / 2., counts)
+
+    def merge(self, other):
+        """Adds all values of another sketch with the same accuracy."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Can't merge sketches of different accuracy.")
+        for buckets, other_buckets in [
+            (self.positive_buckets, other.positive_buckets),
+            (self.negative_buckets, other.negative_buckets)
+        ]:
+            for index, bucket_count in other_buckets.items():
+                buckets[index] = buckets.get(index, 0) + bucket_count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def copy(self):
+        sketch = QuantileSketch(self.relative_accuracy)
+        sketch.merge(self)
+        return sketch
+
+    def _getBucketValue(self, index):
+        return 2. * self._gamma**index / (self._gamma + 1.)
+
+    def quantile(self, q):
+        """Returns the q-quantile (q in [0, 1]) or NaN if the sketch is
+        empty."""
+        if not 0. <= q <= 1.:
+            raise ValueError("The quantile must be in [0, 1].")
+        if self.count == 0:
+            return float('nan')
+        rank = q * (self.count - 1)
+        cumulative_count = 0
+        for index in sorted(self.negative_buckets, reverse=True):
+            cumulative_count += self.negative_buckets[index]
+            if cumulative_count > rank:
+                return -self._getBucketValue(index)
+        cumulative_count += self.zero_count
+        if cumulative_count > rank:
+            return 0.
+        for index in sorted(self.positive_buckets):
+            cumulative_count += self.positive_buckets[index]
+            if cumulative_count > rank:
+                return self._getBucketValue(index)
+        # Only reached if the counts don't add up, e.g. due to rounding of
+        # fractional counts.
+        if self.positive_buckets:
+            return self._getBucketValue(max(self.positive_buckets))
+        return 0.
+
+    def toDict(self):
+        """Returns the sketch as a dictionary of lists and numbers that can be
+        written to yaml or JSON."""
+        sketch = {
+            'relative_accuracy': self.relative_accuracy,
+            'zero_count': self.zero_count
+        }
+        for name, buckets in [('positive', self.positive_buckets),
+                              ('negative', self.negative_buckets)]:
+            indices = sorted(buckets)
+            sketch[name] = {
+                'indices': indices,
+                'counts': [buckets[index] for index in indices]
+            }
+        return sketch
+
+    @classmethod
+    def fromDict(cls, sketch_dict):
+        """Creates a sketch from the output of toDict()."""
+        try:
+            sketch = cls(sketch_dict['relative_accuracy'])
+            sketch.zero_count = sketch_dict['zero_count']
+            for name, buckets in [('positive', sketch.positive_buckets),
+                                  ('negative', sketch.negative_buckets)]:
+                buckets.update(
+                    zip(sketch_dict[name]['indices'],
+                        sketch_dict[name]['counts']))
+        except (KeyError, TypeError):
+            raise ValueError("Malformed quantile sketch")
+        sketch.count = sketch.zero_count + sum(
+            sketch.positive_buckets.values()) + sum(
+                sketch.negative_buckets.values())
+        return sketch
+
+
+def getSketchFromMetric(metric):
+    """Returns a QuantileSketch with the values of a metric of a
+    statistics.yaml or None if the metric has neither values, a histogram nor
+    a sketch."""
+    if 'sketch' in metric:
+        return QuantileSketch.fromDict(metric['sketch'])
+    if 'values' in metric:
+        sketch = QuantileSketch()
+        sketch.addValues(metric['values'])
+        return sketch
+    if 'histogram' in metric:
+        histogram = metric['histogram']
+        if not isinstance(histogram, dict) or \
+                not {'bin_edges', 'counts'}.issubset(histogram):
+            raise ValueError("Malformed histogram")
+        sketch = QuantileSketch()
+        sketch.addHistogram(histogram['bin_edges'], histogram['counts'])
+        return sketch
+    return None
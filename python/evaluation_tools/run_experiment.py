@@ -1,17 +1,39 @@
 #!/usr/bin/env python
 
 import argparse
+from collections import OrderedDict
+import copy
+import functools
 import logging
 import os
+import threading
 import time
-import yaml
 
+from evaluation_tools.adaptive_sweep import AdaptiveSweep
 from evaluation_tools.command_runner import CommandRunnerException
 import evaluation_tools.dataset_tools as dataset_tools
 from evaluation_tools.evaluation import Evaluation
+from evaluation_tools.execution_journal import ExecutionJournal
+from evaluation_tools.html_report import HtmlReport
 from evaluation_tools.job import Job
-from evaluation_tools.simple_summarization import SimpleSummarization
+from evaluation_tools.job_plan import JobPlan
+from evaluation_tools.job_scheduler import JobScheduler, JobSchedulerException
+from evaluation_tools.parameter_sweep import (getSweepPoints,
+                                              isMultiParameterSweep)
+from evaluation_tools.pipeline import Pipeline, PipelineStage
+from evaluation_tools.simple_summarization import (SUMMARY_CACHE_FILENAME,
+                                                   SimpleSummarization)
 import evaluation_tools.utils as eval_utils
+from evaluation_tools.yaml_io import dumpYaml, loadYaml
+
+RESULTS_JOB_LABEL = 'job_estimator_and_console'
+STATISTICS_SCRIPT_NAME = 'prepare_statistics.py'
+PIPELINE_STAGE_NAMES = ['estimator', 'console', 'evaluation', 'statistics']
+JOURNAL_FILENAME = 'execution_journal.yaml'
+JOB_SUMMARY_FILENAME = 'job_summary.yaml'
+RESOURCE_SUMMARY_FILENAME = 'experiment_resources.yaml'
+ADAPTIVE_SWEEPS_FILENAME = 'adaptive_sweeps.yaml'
+JOB_PLANS_FILENAME = 'job_plans.yaml'
 
 
 class Experiment(object):
@@ -21,22 +43,61 @@ class Experiment(object):
                  experiment_file,
                  results_folder,
                  automatic_dataset_download,
-                 enable_progress_bars=True):
+                 enable_progress_bars=True,
+                 num_jobs=None,
+                 pipeline=None,
+                 resume_folder=None):
         """Initializes the experiment.
 
         Loads and parses the yaml and creates the corresponding job objects to
         be run at a later stage.
 
+        If resume_folder is set, the experiment is instead loaded from the jobs
+        in that folder and experiment_file, results_folder and
+        automatic_dataset_download are ignored. See
+        _loadExperimentFromResultsFolder() for details.
+
         Input:
         - experiment_file: yaml with the experiment info.
         - results_folder: folder where the results of the evaluation are stored.
         - automatic_dataset_download: if True, datasets that cannot be found on
               disk will be automatically retrieved from a remote location as
               specified in the datasets yaml.
+        - num_jobs: number of jobs that are run concurrently. Overrides the
+              'jobs' entry of the experiment yaml (default: 1).
+        - pipeline: if True, the stages of the jobs (estimator, console,
+              evaluation, statistics) are run as a pipeline, see
+              runAndEvaluate(). Overrides the 'pipeline' entry of the
+              experiment yaml if set.
+        - resume_folder: folder of an existing experiment, i.e.
+              <results_folder>/<experiment_basename>, that should be resumed.
         """
         logging.basicConfig(level=logging.DEBUG)
         self.logger = logging.getLogger(__name__)
+        self.evaluation_results = {}
+        self._evaluation_results_lock = threading.Lock()
+        self.enable_progress_bars = enable_progress_bars
+        self.pipeline_statistics = {}
+        # Jobs of which at least one stage was run by this process. All
+        # following stages of these jobs are run again when resuming.
+        self._rerun_jobs = set()
+        # Adaptive parameter sweeps by parameter file, see
+        # _registerAdaptiveSweep().
+        self._adaptive_sweeps = OrderedDict()
+        # Experiment-level part of the job info, shared by all jobs.
+        self._shared_job_info = None
+
+        if resume_folder is not None:
+            self._loadExperimentFromResultsFolder(resume_folder, num_jobs,
+                                                  pipeline)
+        else:
+            self._createExperimentFromFile(experiment_file, results_folder,
+                                           automatic_dataset_download,
+                                           num_jobs, pipeline)
 
+    def _createExperimentFromFile(self, experiment_file, results_folder,
+                                  automatic_dataset_download, num_jobs,
+                                  pipeline):
         self.logger.info("Checking parameters")
         if not os.path.isfile(experiment_file):
             raise Exception(
@@ -46,7 +107,6 @@ class Experiment(object):
         self.root_folder = os.path.dirname(experiment_file)
         self.experiment_file = experiment_file
         self.results_folder = results_folder
-        self.evaluation_results = {}
 
         if not os.path.exists(self.results_folder):
             os.makedirs(self.results_folder)
@@ -58,7 +118,7 @@ class Experiment(object):
         # Read Evaluation File
         self.experiment_filename = os.path.basename(experiment_file).replace(
             '.yaml', '')
-        self.eval_dict = yaml.safe_load(open(self.experiment_file))
+        self.eval_dict = loadYaml(self.experiment_file)
         self.experiment_file = experiment_file
 
         # Check necessary parameters in evaluation file:
@@ -68,6 +128,7 @@ class Experiment(object):
         eval_utils.assertParam(self.eval_dict, "parameter_files")
         eval_utils.checkParam(self.eval_dict, "cam_calib_source",
                               "dataset_folder")
+        self._parseExecutionSettings(num_jobs, pipeline)
 
         # Information stored in the job but not used to run the algorithm.
         self.eval_dict['experiment_generated_time'] = time.strftime(
@@ -82,6 +143,10 @@ class Experiment(object):
         else:
             experiment_basename = (self.eval_dict['experiment_generated_time']
                                    + '_' + self.eval_dict["experiment_name"])
+        self.experiment_basename = experiment_basename
+        self.journal = ExecutionJournal(
+            os.path.join(self.results_folder, experiment_basename,
+                         JOURNAL_FILENAME))
 
         # Find sensors file:
         sensors_file = ''
@@ -117,12 +182,11 @@ class Experiment(object):
                         self.eval_dict['evaluation_scripts'] = []
                     self.eval_dict['evaluation_scripts'].append({
                         'name':
-                        'prepare_statistics.py'
+                        STATISTICS_SCRIPT_NAME
                     })
 
         # Create set of datasets and download them if needed.
         dataset_tools.root_folder = self.root_folder
-        self.enable_progress_bars = enable_progress_bars
         dataset_tools.enable_download_progress_bar = self.enable_progress_bars
         available_datasets = dataset_tools.getDatasetList()
         downloaded_datasets, _ = dataset_tools.getDownloadedDatasets()
@@ -170,8 +234,9 @@ class Experiment(object):
                 eval_utils.findFileOrDir(self.root_folder, "parameter_files",
                                          filename))
 
-        # Create jobs for all dataset-parameter file combination.
-        self.job_list = []
+        # Plan jobs for all dataset-parameter file combination. The jobs are
+        # only created on disk when they are run, see JobPlan.
+        self.job_plans = []
         if ('create_job_for_each_dataset' in self.eval_dict
                 and not self.eval_dict['create_job_for_each_dataset']):
             # Create only one job for all datasets.
@@ -182,6 +247,86 @@ class Experiment(object):
             # Create a job for every dataset.
             for dataset in self.eval_dict['datasets']:
                 self._createJobsForDatasets(experiment_basename, [dataset])
+        self._createAdaptiveSweepJobs()
+        self._writeJobPlans()
+
+    def _loadExperimentFromResultsFolder(self, experiment_folder, num_jobs,
+                                         pipeline):
+        """Loads an existing experiment to resume it.
+
+        All jobs are loaded from the job.yaml files in the sub-folders of
+        experiment_folder. The experiment settings are taken from the first
+        job. The execution journal of the experiment is used to only run the
+        job stages that did not finish successfully before.
+        """
+        if not os.path.isdir(experiment_folder):
+            raise Exception('The experiment folder "' + experiment_folder +
+                            "\" doesn't exist.")
+        experiment_folder = os.path.normpath(experiment_folder)
+        self.results_folder = os.path.dirname(experiment_folder)
+        self.experiment_basename = os.path.basename(experiment_folder)
+        self.journal = ExecutionJournal(
+            os.path.join(experiment_folder, JOURNAL_FILENAME))
+
+        jobs = {}
+        for job_folder in sorted(os.listdir(experiment_folder)):
+            job_path = os.path.join(experiment_folder, job_folder)
+            if os.path.isfile(os.path.join(job_path, 'job.yaml')):
+                job = Job()
+                job.loadConfigFromFolder(job_path)
+                jobs[job.job_name] = job
+
+        # Jobs that were planned but not created yet are taken from the job
+        # plans file.
+        self.job_plans = []
+        self.eval_dict = None
+        job_plans_file = os.path.join(experiment_folder, JOB_PLANS_FILENAME)
+        if os.path.isfile(job_plans_file):
+            job_plans_dict = loadYaml(job_plans_file)
+            self.eval_dict = job_plans_dict['experiment']
+            self.root_folder = self.eval_dict['experiment_root_folder']
+            for job_plan_dict in job_plans_dict['jobs']:
+                job_name = job_plan_dict['job_name']
+                if job_name in jobs:
+                    self.job_plans.append(JobPlan.fromJob(jobs.pop(job_name)))
+                else:
+                    self.job_plans.append(
+                        self._createJobPlan(job_plan_dict['datasets'],
+                                            job_name,
+                                            job_plan_dict['parameter_name'],
+                                            job_plan_dict['params']))
+        self.job_plans.extend(
+            JobPlan.fromJob(jobs[job_name]) for job_name in sorted(jobs))
+        if not self.job_plans:
+            raise Exception('No jobs found in the experiment folder "' +
+                            experiment_folder + '".')
+        self.logger.info("Resuming experiment %s with %i jobs.",
+                         self.experiment_basename, len(self.job_plans))
+
+        if self.eval_dict is None:
+            self.eval_dict = copy.deepcopy(
+                dict(self.job_plans[0].getJob().info))
+        self.root_folder = self.eval_dict['experiment_root_folder']
+        self.experiment_file = None
+        self._parseExecutionSettings(num_jobs, pipeline)
+        self.summarize_statistics = bool(
+            self.eval_dict.get('summarize_statistics')
+            and self.eval_dict['summarize_statistics'].get('enabled'))
+
+    def _parseExecutionSettings(self, num_jobs, pipeline):
+        """Reads the number of concurrent jobs and the pipeline settings from
+        the experiment dict. num_jobs and pipeline override the values from the
+        dict if they are not None.
+        """
+        eval_utils.checkParam(self.eval_dict, "jobs", 1)
+        if num_jobs is not None:
+            self.eval_dict['jobs'] = num_jobs
+        self.num_jobs = int(self.eval_dict['jobs'])
+        if pipeline is not None and not (pipeline and
+                                         self.eval_dict.get('pipeline')):
+            self.eval_dict['pipeline'] = pipeline
+        self.pipeline_workers = self._getPipelineWorkers(
+            self.eval_dict.get('pipeline'))
 
     def _createJobsForDatasets(self, experiment_basename, datasets):
         assert datasets
@@ -190,80 +335,381 @@ class Experiment(object):
         if len(datasets) > 1:
             job_name_from_dataset += '_and_others'
 
-        for parameter_file in self.parameter_files:
-            params = yaml.safe_load(open(parameter_file))
-
-            if 'parameter_sweep' in params:
-                p_name = params['parameter_sweep']["name"]
-                p_min = params['parameter_sweep']["min"]
-                p_max = params['parameter_sweep']["max"]
-                p_step_size = params['parameter_sweep']["step_size"]
-
-                step = 0
-                max_steps = 100
-                p_current = p_min
-                while p_current <= p_max and step < max_steps:
-                    params[p_name] = p_current
-                    self.eval_dict['experiment_name'] = str(
-                        experiment_basename + '/' + job_name_from_dataset +
-                        '__' + os.path.basename(parameter_file)
-                        .replace('.yaml', '') + '__SWEEP_' + str(step))
-
-                    parameter_tag = str(parameter_file) + "_SWEEP_" + str(
-                        p_current)
-                    job = Job()
-                    job.createJob(
-                        datasets_dict=datasets,
-                        experiment_root_folder=self.root_folder,
-                        results_folder=self.results_folder,
-                        experiment_dict=self.eval_dict,
-                        parameter_name=parameter_tag,
-                        parameter_dict=params)
-                    self.job_list.append(job)
-                    p_current += p_step_size
-                    step += 1
+        for parameter_file in sorted(self.parameter_files):
+            params = loadYaml(parameter_file)
+            job_name_prefix = str(experiment_basename + '/' +
+                                  job_name_from_dataset + '__' +
+                                  os.path.basename(parameter_file).replace(
+                                      '.yaml', ''))
+
+            if ('parameter_sweep' in params
+                    and 'adaptive' in params['parameter_sweep']):
+                self._registerAdaptiveSweep(parameter_file, params, datasets,
+                                            job_name_prefix)
+            elif 'parameter_sweep' in params:
+                sweep_dict = params['parameter_sweep']
+                # Shared by all jobs of the sweep.
+                sweep_params = dict(params)
+                del sweep_params['parameter_sweep']
+                for step, sweep_point in enumerate(
+                        getSweepPoints(sweep_dict)):
+                    if isMultiParameterSweep(sweep_dict):
+                        parameter_tag = str(parameter_file) + "_SWEEP_" + str(
+                            step)
+                    else:
+                        parameter_tag = str(parameter_file) + "_SWEEP_" + str(
+                            sweep_point[sweep_dict['name']])
+                    self.job_plans.append(
+                        self._createJobPlan(
+                            datasets, job_name_prefix + '__SWEEP_' + str(step),
+                            parameter_tag, sweep_params, sweep_point))
             else:
-                self.eval_dict['experiment_name'] = str(
-                    experiment_basename + '/' + job_name_from_dataset + '__' +
-                    os.path.basename(parameter_file).replace('.yaml', ''))
-
-                job = Job()
-                job.createJob(
-                    datasets_dict=datasets,
-                    experiment_root_folder=self.root_folder,
-                    results_folder=self.results_folder,
-                    experiment_dict=self.eval_dict,
-                    parameter_name=str(parameter_file),
-                    parameter_dict=params)
-                self.job_list.append(job)
+                self.job_plans.append(
+                    self._createJobPlan(datasets, job_name_prefix,
+                                        str(parameter_file), params))
+
+    def _createJobPlan(self,
+                       datasets,
+                       job_name,
+                       parameter_name,
+                       params,
+                       param_overrides=None):
+        if self._shared_job_info is None:
+            self._shared_job_info = Job.createSharedInfo(
+                self.eval_dict, self.root_folder)
+        return JobPlan(job_name, datasets, parameter_name, params,
+                       self.root_folder, self.results_folder, self.eval_dict,
+                       self._shared_job_info, param_overrides)
+
+    def _writeJobPlans(self):
+        """Writes the plans of all jobs to JOB_PLANS_FILENAME in the
+        experiment folder, so that jobs that were not created yet can be
+        resumed."""
+        experiment_folder = os.path.join(self.results_folder,
+                                         self.experiment_basename)
+        if not os.path.isdir(experiment_folder):
+            os.makedirs(experiment_folder)
+        job_plans_dict = {
+            'experiment':
+            dict(self.eval_dict, experiment_root_folder=self.root_folder),
+            'jobs': [{
+                'job_name': job_plan.job_name,
+                'datasets': job_plan.datasets,
+                'parameter_name': job_plan.parameter_name,
+                'params': job_plan.params
+            } for job_plan in self.job_plans]
+        }
+        job_plans_file = os.path.join(experiment_folder, JOB_PLANS_FILENAME)
+        self.logger.info("Write %s", job_plans_file)
+        dumpYaml(job_plans_dict, job_plans_file)
+
+    @property
+    def job_list(self):
+        """All jobs of the experiment. Creates the jobs that were not created
+        yet."""
+        return [job_plan.getJob() for job_plan in self.job_plans]
+
+    def _registerAdaptiveSweep(self, parameter_file, params, datasets,
+                               job_name_prefix):
+        """Adds a group of datasets to the adaptive sweep of a parameter file.
+
+        All dataset groups of a parameter file share one AdaptiveSweep, so
+        that the first rounds can be run on a subset of the datasets. The jobs
+        are created by _createAdaptiveSweepJobs().
+
+        The values are scored from the formatted_stats.yaml of the jobs, which
+        is only written if summarize_statistics is enabled.
+        """
+        if not self.summarize_statistics:
+            raise ValueError(
+                'The adaptive parameter sweep of "' + str(parameter_file) +
+                '" requires summarize_statistics to be enabled in the '
+                'experiment.')
+        if parameter_file not in self._adaptive_sweeps:
+            self._adaptive_sweeps[parameter_file] = {
+                'sweep': AdaptiveSweep(params['parameter_sweep']),
+                'params': params,
+                'dataset_groups': [],
+                # Job paths of the current round by value.
+                'job_paths': {}
+            }
+        self._adaptive_sweeps[parameter_file]['dataset_groups'].append(
+            (datasets, job_name_prefix))
+
+    def _createAdaptiveSweepJobs(self):
+        """Creates the jobs of the current round of all unfinished adaptive
+        sweeps and returns their plans. The plans are also added to
+        self.job_plans.
+        """
+        jobs = []
+        for parameter_file, adaptive_sweep in self._adaptive_sweeps.items():
+            sweep = adaptive_sweep['sweep']
+            adaptive_sweep['job_paths'] = {}
+            if sweep.isFinished():
+                continue
+            dataset_groups = adaptive_sweep['dataset_groups']
+            dataset_groups = dataset_groups[:sweep.getNumDatasets(
+                len(dataset_groups))]
+            round_tag = '_ROUND_' + str(sweep.round_index)
+            for value_index, value in enumerate(sweep.values):
+                params = sweep.getParameters(adaptive_sweep['params'], value)
+                parameter_tag = (str(parameter_file) + round_tag + '_SWEEP_' +
+                                 str(value))
+                for datasets, job_name_prefix in dataset_groups:
+                    job = self._createJobPlan(
+                        datasets, job_name_prefix + '_' + round_tag +
+                        '_SWEEP_' + str(value_index), parameter_tag, params)
+                    adaptive_sweep['job_paths'].setdefault(
+                        value, []).append(job.job_path)
+                    jobs.append(job)
+        self.job_plans.extend(jobs)
+        return jobs
+
+    def _finishAdaptiveSweepRound(self):
+        """Scores the jobs of the current round of all adaptive sweeps,
+        writes the results to ADAPTIVE_SWEEPS_FILENAME and returns the jobs of
+        the next round."""
+        sweep_results = {}
+        for parameter_file, adaptive_sweep in self._adaptive_sweeps.items():
+            sweep = adaptive_sweep['sweep']
+            if adaptive_sweep['job_paths']:
+                sweep.finishRound({
+                    value: sweep.getScore(job_paths)
+                    for value, job_paths in adaptive_sweep['job_paths'].items()
+                })
+            best_value = sweep.getBestValue()
+            sweep_results[os.path.basename(parameter_file)] = {
+                'parameter': sweep.name,
+                'metric': sweep.metric,
+                'objective': sweep.objective,
+                'best_value': best_value[0] if best_value else None,
+                'best_score': best_value[1] if best_value else None,
+                'rounds': sweep.scores
+            }
+
+        sweep_results_file = os.path.join(
+            self.results_folder, self.experiment_basename,
+            ADAPTIVE_SWEEPS_FILENAME)
+        self.logger.info("Write %s", sweep_results_file)
+        dumpYaml(sweep_results, sweep_results_file)
+        jobs = self._createAdaptiveSweepJobs()
+        self._writeJobPlans()
+        return jobs
+
+    def _getPipelineWorkers(self, pipeline_config):
+        """Returns the number of workers for each pipeline stage or None if the
+        jobs should not be run as a pipeline.
+
+        pipeline_config is either a bool or a dictionary with the number of
+        workers per stage. Stages without an entry use self.num_jobs workers.
+        """
+        if not pipeline_config:
+            return None
+        pipeline_workers = {
+            stage_name: self.num_jobs
+            for stage_name in PIPELINE_STAGE_NAMES
+        }
+        if isinstance(pipeline_config, dict):
+            for stage_name, num_workers in pipeline_config.items():
+                if stage_name not in pipeline_workers:
+                    raise ValueError('Unknown pipeline stage "' +
+                                     str(stage_name) + '", valid stages are: '
+                                     + ', '.join(PIPELINE_STAGE_NAMES))
+                pipeline_workers[stage_name] = int(num_workers)
+        return pipeline_workers
 
     def runAndEvaluate(self):
-        """Run estimator and console commands and all evaluation scripts."""
-        RESULTS_JOB_LABEL = 'job_estimator_and_console'
-        for job in self.job_list:
-            self.logger.info("Run job: %s/job.yaml", job.job_path)
-            try:
-                job.execute(
-                    enable_console_progress_bars=self.enable_progress_bars)
-                self.evaluation_results[job.job_name] = {RESULTS_JOB_LABEL: 0}
-            except CommandRunnerException as ex:
-                self.logger.error(
-                    'Running the job %s failed: the estimator or console '
-                    'command returned a non-zero exit code: %i.', job.job_name,
-                    ex.return_value)
-                self.evaluation_results[job.job_name] = {
-                    RESULTS_JOB_LABEL: ex.return_value
-                }
-                continue
+        """Run estimator and console commands and all evaluation scripts.
 
-            job.writeSummary("job_summary.yaml")
+        By default, up to self.num_jobs jobs are run at the same time, each
+        going through all its stages before the next job is started.
 
-            self.logger.info("Run evaluation: %s", job.job_path)
-            evaluation = Evaluation(job)
-            self.evaluation_results[job.job_name].update(
-                evaluation.runEvaluations())
+        If the pipeline is enabled, the estimator, console, evaluation and
+        statistics stages have their own queues and number of workers. The
+        evaluation of one job then runs while the estimator of the next job is
+        already running. The queue depth and idle time of each stage are
+        logged and stored in self.pipeline_statistics.
 
-    def runSummarization(self):
+        A failing job does not affect the other jobs.
+
+        Adaptive parameter sweeps are run in rounds: after all jobs ran, the
+        jobs of each round are scored and the jobs of the next round are run,
+        until all adaptive sweeps are finished.
+        """
+        failed_jobs = []
+        try:
+            jobs = self.job_plans
+            while jobs:
+                failed_jobs.extend(self._runJobs(jobs))
+                jobs = []
+                if self._adaptive_sweeps:
+                    jobs = self._finishAdaptiveSweepRound()
+        finally:
+            self.writeResourceSummary()
+        if failed_jobs:
+            raise JobSchedulerException(failed_jobs)
+
+    def _runJobs(self, jobs):
+        """Runs all stages of the jobs and returns the failed jobs as a list
+        of (job_name, exception)."""
+        try:
+            if self.pipeline_workers is None:
+                scheduler = JobScheduler(self.num_jobs)
+                scheduler.run(jobs, self._runAndEvaluateJob)
+            else:
+                pipeline = Pipeline([
+                    PipelineStage(stage_name, stage_function,
+                                  self.pipeline_workers[stage_name])
+                    for stage_name, stage_function in self._getStages()
+                ])
+                try:
+                    pipeline.run(jobs)
+                finally:
+                    self.pipeline_statistics = pipeline.statistics
+        except JobSchedulerException as ex:
+            return ex.failed_jobs
+        return []
+
+    def writeResourceSummary(self):
+        """Sums up the resource usage of all jobs per job and per stage.
+
+        The resource usage is read from the summary file of each job and
+        written to RESOURCE_SUMMARY_FILENAME in the experiment folder. Times
+        are summed up, max_rss_kb is the maximum over all commands.
+        """
+
+        def addResourceUsage(total, resource_usage):
+            total['commands'] = total.get('commands', 0) + 1
+            for key in ['wall_time_s', 'user_time_s', 'system_time_s']:
+                total[key] = round(
+                    total.get(key, 0.) + resource_usage[key], 3)
+            total['max_rss_kb'] = max(
+                total.get('max_rss_kb', 0), resource_usage['max_rss_kb'])
+
+        resource_summary = {'jobs': {}, 'stages': {}, 'total': {}}
+        for job in self.job_plans:
+            job_summary_file = os.path.join(job.job_path, JOB_SUMMARY_FILENAME)
+            if not os.path.isfile(job_summary_file):
+                continue
+            job_summary = loadYaml(job_summary_file)
+            if not job_summary or not job_summary.get('resources'):
+                continue
+            job_total = resource_summary['jobs'].setdefault(job.job_name, {})
+            for resource_usage in job_summary['resources'].values():
+                addResourceUsage(job_total, resource_usage)
+                addResourceUsage(
+                    resource_summary['stages'].setdefault(
+                        resource_usage['stage'], {}), resource_usage)
+                addResourceUsage(resource_summary['total'], resource_usage)
+
+        resource_summary_file = os.path.join(
+            self.results_folder, self.experiment_basename,
+            RESOURCE_SUMMARY_FILENAME)
+        self.logger.info("Write %s", resource_summary_file)
+        dumpYaml(resource_summary, resource_summary_file)
+
+    def _getStages(self):
+        stage_functions = [
+            self._runEstimatorStage, self._runConsoleStage,
+            self._runEvaluationStage, self._runStatisticsStage
+        ]
+        return [(stage_name,
+                 functools.partial(self._runStage, stage_name, stage_function))
+                for stage_name, stage_function in zip(PIPELINE_STAGE_NAMES,
+                                                      stage_functions)]
+
+    def _runAndEvaluateJob(self, job_plan):
+        for _, stage_function in self._getStages():
+            if not stage_function(job_plan):
+                return
+
+    def _runStage(self, stage_name, stage_function, job_plan):
+        """Runs one stage of a job and records it in the execution journal.
+
+        A stage that already succeeded in a previous run of the experiment is
+        skipped and its results are taken from the journal, unless an earlier
+        stage of the same job had to be run again. The job is created on disk
+        when its first stage is run.
+
+        Returns True if the next stage of the job should be run.
+        """
+        job_name = job_plan.job_name
+        with self._evaluation_results_lock:
+            rerun_job = job_name in self._rerun_jobs
+        if not rerun_job and self.journal.hasSucceeded(job_name, stage_name):
+            self.logger.info("Stage %s of job %s already finished, skipping.",
+                             stage_name, job_name)
+            self._updateEvaluationResults(
+                job_plan, self.journal.getResults(job_name, stage_name))
+            return True
+
+        with self._evaluation_results_lock:
+            self._rerun_jobs.add(job_name)
+        job = job_plan.getJob()
+        success, results = stage_function(job)
+        self._updateEvaluationResults(job, results)
+        if not success or stage_name == PIPELINE_STAGE_NAMES[-1]:
+            job.writeSummary(JOB_SUMMARY_FILENAME)
+            # The job is not needed anymore, everything is on disk.
+            job_plan.releaseJob()
+        self.journal.record(job_name, stage_name, results)
+        return success
+
+    def _updateEvaluationResults(self, job, results):
+        with self._evaluation_results_lock:
+            self.evaluation_results.setdefault(job.job_name,
+                                               {}).update(results)
+
+    def _runJobCommand(self, job, command_function):
+        """Runs the estimator or console step of the job.
+
+        Returns a tuple (success, results) where results contains the exit
+        code if the step failed, or the termination reason ('timeout' or
+        'stalled') if the command was killed.
+        """
+        try:
+            command_function()
+        except CommandRunnerException as ex:
+            self.logger.error('Running the job %s failed: %s', job.job_name,
+                              ex)
+            return False, {RESULTS_JOB_LABEL: ex.getStatus()}
+        return True, {}
+
+    def _runEstimatorStage(self, job):
+        self.logger.info("Run job: %s/job.yaml", job.job_path)
+        return self._runJobCommand(job, job.runEstimator)
+
+    def _runConsoleStage(self, job):
+        success, results = self._runJobCommand(
+            job, lambda: job.runConsole(self.enable_progress_bars))
+        if success:
+            results[RESULTS_JOB_LABEL] = 0
+        return success, results
+
+    def _runEvaluationStage(self, job):
+        self.logger.info("Run evaluation: %s", job.job_path)
+        evaluation = Evaluation(job)
+        return True, evaluation.runEvaluations([
+            evaluation_script
+            for evaluation_script in evaluation.evaluation_scripts
+            if evaluation_script.get('name') != STATISTICS_SCRIPT_NAME
+        ])
+
+    def _runStatisticsStage(self, job):
+        evaluation = Evaluation(job)
+        return True, evaluation.runEvaluations([
+            evaluation_script
+            for evaluation_script in evaluation.evaluation_scripts
+            if evaluation_script.get('name') == STATISTICS_SCRIPT_NAME
+        ])
+
+    def runSummarization(self, skip_missing_files=False):
+        """Summarizes the statistics of all jobs if the experiment has a
+        'summarize_statistics' entry.
+
+        If skip_missing_files is True, jobs without statistics, e.g. because
+        they failed, are left out instead of raising a ValueError.
+        """
         if self.summarize_statistics:
             whitelist = []
             blacklist = []
@@ -274,12 +720,34 @@ class Experiment(object):
                 blacklist = self.eval_dict['summarize_statistics'][
                     'blacklisted_metrics']
 
+            # With headless_plots, the plots are rendered to files in the
+            # experiment folder instead of being shown.
+            plot_folder = None
+            if self.eval_dict['summarize_statistics'].get('headless_plots'):
+                plot_folder = os.path.join(self.results_folder,
+                                           self.experiment_basename,
+                                           'summary_plots')
+
             files_to_summarize = []
-            for job in self.job_list:
+            for job in self.job_plans:
                 files_to_summarize.append(
                     job.job_path + "/formatted_stats.yaml")
 
-            s = SimpleSummarization(files_to_summarize, whitelist, blacklist)
+            s = SimpleSummarization(
+                files_to_summarize,
+                whitelist,
+                blacklist,
+                cache_file=os.path.join(self.results_folder,
+                                        self.experiment_basename,
+                                        SUMMARY_CACHE_FILENAME),
+                skip_missing_files=skip_missing_files,
+                plot_folder=plot_folder,
+                plot_format=self.eval_dict['summarize_statistics'].get(
+                    'plot_format', 'png'))
+            if self.eval_dict['summarize_statistics'].get('html_report'):
+                HtmlReport(
+                    os.path.join(self.results_folder, self.experiment_basename,
+                                 'report')).update(s.metric_store, s.num_runs)
             s.runSummarization()
 
 
@@ -293,7 +761,10 @@ if __name__ == '__main__':
 
     parser = argparse.ArgumentParser(description='''Experiment''')
     parser.add_argument(
-        'experiment_yaml_file', help='Experiment YAML file in input_folder')
+        'experiment_yaml_file',
+        help='Experiment YAML file in input_folder',
+        nargs='?',
+        default=None)
     parser.add_argument(
         '--results_output_folder',
         help='The folder where to store results',
@@ -306,16 +777,50 @@ if __name__ == '__main__':
         '--automatic_download',
         action='store_true',
         help='download dataset if it is not available locally')
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        help='number of jobs to run concurrently (overrides the "jobs" entry '
+        'of the experiment yaml)',
+        default=None)
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='run the estimator, console, evaluation and statistics stages of '
+        'the jobs as a pipeline (see also the "pipeline" entry of the '
+        'experiment yaml)',
+        default=None)
+    parser.add_argument(
+        '--resume',
+        help='folder of an existing experiment (i.e. '
+        '<results_output_folder>/<experiment_basename>) to resume. Only the '
+        'job stages that did not finish successfully are run.',
+        default=None)
     args = parser.parse_args()
 
     eval_file = args.experiment_yaml_file
+    if eval_file is None and args.resume is None:
+        parser.error('Either experiment_yaml_file or --resume is required.')
 
     # Create experiment folders.
-    e = Experiment(eval_file, args.results_output_folder,
-                   args.automatic_download)
+    e = Experiment(
+        eval_file,
+        args.results_output_folder,
+        args.automatic_download,
+        num_jobs=args.jobs,
+        pipeline=args.pipeline,
+        resume_folder=args.resume)
 
     # Run each job and the evaluation of each job.
-    e.runAndEvaluate()
+    job_failure = None
+    try:
+        e.runAndEvaluate()
+    except JobSchedulerException as ex:
+        # Summarize the jobs that succeeded before reporting the failures.
+        logger.error('%s', ex)
+        job_failure = ex
 
     # Run summarizations
-    e.runSummarization()
+    e.runSummarization(skip_missing_files=job_failure is not None)
+    if job_failure is not None:
+        raise job_failure
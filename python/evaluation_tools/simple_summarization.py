@@ -2,8 +2,10 @@
 
 import argparse
 from collections import defaultdict, namedtuple
+import hashlib
+import json
 import logging
-from math import sqrt
+import multiprocessing
 import os
 import re
 import yaml
@@ -12,6 +14,40 @@ import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
 import numpy as np
 
+from evaluation_tools.binary_stats import (getBinaryStatsPath,
+                                           loadFormattedStatsPreferBinary)
+from evaluation_tools.metric_store import MetricStore, sampleFromDict
+
+
+# Below this number of files, the statistics are loaded in this process.
+MIN_FILES_FOR_PARALLEL_LOADING = 100
+
+
+SUMMARY_CACHE_FILENAME = 'summary_cache.json'
+FORMATTED_STATS_FILENAME = 'formatted_stats.yaml'
+
+# Quantiles reported for the metrics with quantile sketches, see
+# SimpleSummarization.summarizeMetricsFromDatasets().
+SUMMARY_QUANTILES = [('p50', 0.5), ('p95', 0.95), ('p99', 0.99)]
+
+# Below this number of figures to render, they are rendered in this process.
+MIN_FIGURES_FOR_PARALLEL_RENDERING = 8
+
+# Hashes of the data of the figures rendered to the output folder of Plotter.
+PLOT_HASHES_FILENAME = 'plot_hashes.json'
+
+# Part of the hashes of the figures, change it when the plots change to render
+# all figures again.
+_PLOT_STYLE_VERSION = 1
+
+# quantiles: {quantile name: list of values}, see SUMMARY_QUANTILES. Values are
+# NaN for parameter files without quantiles.
+Data = namedtuple("Data",
+                  "label means stddevs mins maxes quantiles parameter_files")
+
+SweepData = namedtuple("SweepData",
+                       "label means stddevs mins maxes quantiles indices")
+
 
 def atoi(text):
     return int(text) if text.isdigit() else text
@@ -25,79 +61,50 @@ def alphanum_key(text):
     return [atoi(c) for c in re.split(r'(\d+)', text)]
 
 
-class Metric(object):
-    """Data Structure that stores some basic statistical properties."""
-
-    def __init__(self):
-        self.count = 0
-        self.mean = 0
-        self.stddev = 0
-        self.var = 0
-        self.min = float('nan')
-        self.max = float('nan')
-
-    def addSampleFromDict(self, sample):
-        """Incorporate data from a sample that comes in dictionary form."""
-        if not isinstance(sample, dict):
-            raise TypeError("Sample is not a dictionary")
-
-        if not {'samples', 'mean', 'stddev', 'min', 'max'}.issubset(
-                sample.keys()):
-            raise ValueError("Malformed sample")
-
-        m = Metric()
-        m.count = sample["samples"]
-        m.mean = sample["mean"]
-        m.stddev = sample["stddev"]
-        m.var = m.stddev * m.stddev
-        m.min = sample["min"]
-        m.max = sample["max"]
-
-        self.mergeMetric(m)
-
-    def mergeMetric(self, other):
-        """Incorporate data from another metric."""
-        if self.count == 0:
-            self.mean = other.mean
-            self.var = other.var
-            self.stddev = other.stddev
-            self.min = other.min
-            self.max = other.max
-
-        elif other.count != 0:
-            self.mean = (self.mean * self.count + other.mean * other.count) \
-                / (self.count + other.count)
-
-            self.var = (((self.count - 1) * self.var +
-                         (other.count - 1) * other.var +
-                         (self.count * other.count) /
-                         (self.count + other.count) *
-                         (self.mean * self.mean + other.mean * other.mean -
-                          2 * self.mean * other.mean)) /
-                        (self.count + other.count - 1))
-            self.stddev = sqrt(self.var)
-
-            self.min = min(self.min, other.min)
-            self.max = max(self.max, other.max)
-
-        self.count += other.count
+def _renderFigure(task):
+    """Renders one figure of Plotter to a file.
+
+    Input:
+    - task: tuple (output_folder, file_format, data, param_file), where data
+          is a Data for a bar plot or a SweepData for the sweep of param_file.
+    """
+    output_folder, file_format, data, param_file = task
+    # The process pool might not have inherited the backend.
+    plt.switch_backend('Agg')
+    plotter = Plotter(output_folder, file_format)
+    if param_file is None:
+        plotter.plotDataWithoutSweeps(data)
+    else:
+        plotter.plotSweepsData({param_file: data})
 
 
 class Plotter(object):
-    """Plots the results from the summarization."""
+    """Plots the results from the summarization.
+
+    The plots are shown if output_folder is None. Otherwise they are rendered
+    headless with the Agg backend to files of file_format (e.g. 'png' or
+    'svg') in output_folder, by num_workers processes (default: number of
+    CPUs) if there are at least MIN_FIGURES_FOR_PARALLEL_RENDERING figures.
+    The hashes of the data of the figures are stored in PLOT_HASHES_FILENAME
+    in output_folder, and figures whose data didn't change since they were
+    rendered are not rendered again.
+    """
 
-    def __init__(self):
+    def __init__(self, output_folder=None, file_format='png',
+                 num_workers=None):
+        logging.basicConfig(level=logging.DEBUG)
+        self.logger = logging.getLogger(__name__)
+        self.output_folder = output_folder
+        self.file_format = file_format
+        self.num_workers = num_workers
         self.colors = [
             '#FCA17D', '#DA627D', '#9A348E', '#FAF3DD', '#69c6bf', '#97d7ce',
             '#6DAEDB', '#2892D7', '#3E78B2', '#1D70A2', '#1B998B', '#4FB286',
             '#b9ee98', '#d5f396', '#f0f79a', '#ffd993', '#ffc966'
         ]
 
-        self.Data = namedtuple(
-            "Data", "label means stddevs mins maxes parameter_files")
-
-        self.SweepData = namedtuple("SweepData",
-                                    "label means stddevs mins maxes indices")
+        self.Data = Data
+        self.SweepData = SweepData
 
     def plot(self, metrics):
         """Main hook to plot metrics.
@@ -105,8 +112,11 @@ class Plotter(object):
         Creates one Data namedtuple that contains the data from all runs,
         except those that come from parameter sweeps, and one SweepData
         namedtuple for each parameter sweep. Then calls the plotting functions
-        for each Data and SweepData.
+        for each Data and SweepData, or renders them to files, see
+        renderFigures().
         """
+        # Tuples (Data or SweepData, param file of the sweep or None).
+        figures = []
         for metric, parameter_files in metrics.items():
             # Find parameter sweeps captured in the metric.
             parameter_sweep_files = set()
@@ -123,6 +133,8 @@ class Plotter(object):
                 stddevs=[],
                 mins=[],
                 maxes=[],
+                quantiles={name: []
+                           for name, _ in SUMMARY_QUANTILES},
                 parameter_files=[])
             sweep_data_dict = {}
             for parameter_sweep_file in parameter_sweep_files:
@@ -132,11 +144,12 @@ class Plotter(object):
                     means=[],
                     stddevs=[],
                     mins=[],
-                    maxes=[])
+                    maxes=[],
+                    quantiles={name: []
+                               for name, _ in SUMMARY_QUANTILES})
 
             # Fill in Data and SweepData
-            sorted_parameter_files = parameter_files.keys()
-            sorted_parameter_files.sort(key=alphanum_key)
+            sorted_parameter_files = sorted(parameter_files, key=alphanum_key)
             for parameter_file in sorted_parameter_files:
                 if any(strip == 'SWEEP'
                        for strip in parameter_file.split('_')):
@@ -151,6 +164,10 @@ class Plotter(object):
                         parameter_files[parameter_file]["min"])
                     sweep_data_dict[parameter_filename].maxes.append(
                         parameter_files[parameter_file]["max"])
+                    for name, values in sweep_data_dict[
+                            parameter_filename].quantiles.items():
+                        values.append(parameter_files[parameter_file].get(
+                            name, float('nan')))
 
                 else:
                     data_without_sweeps.means.append(
@@ -161,12 +178,108 @@ class Plotter(object):
                         parameter_files[parameter_file]["min"])
                     data_without_sweeps.maxes.append(
                         parameter_files[parameter_file]["max"])
+                    for name, values in data_without_sweeps.quantiles.items():
+                        values.append(parameter_files[parameter_file].get(
+                            name, float('nan')))
                     data_without_sweeps.parameter_files.append(parameter_file)
 
-            self.plotDataWithoutSweeps(data_without_sweeps)
-            self.plotSweepsData(sweep_data_dict)
+            if data_without_sweeps.means:
+                figures.append((data_without_sweeps, None))
+            figures.extend((sweep_data, param_file)
+                           for param_file, sweep_data in sorted(
+                               sweep_data_dict.items()))
 
-        plt.show()
+        if self.output_folder is None:
+            for data, param_file in figures:
+                if param_file is None:
+                    self.plotDataWithoutSweeps(data)
+                else:
+                    self.plotSweepsData({param_file: data})
+            plt.show()
+        else:
+            self.renderFigures(figures)
+
+    def _getFigureName(self, data, param_file):
+        if param_file is None:
+            return data.label
+        return data.label + '__sweep__' + param_file
+
+    def _getFigurePath(self, name):
+        return os.path.join(
+            self.output_folder,
+            re.sub(r'[^\w.-]', '_', name) + '.' + self.file_format)
+
+    def _getFigureHash(self, data, param_file):
+        """Returns a hash of everything that is shown in a figure."""
+        figure_json = json.dumps(
+            [_PLOT_STYLE_VERSION, self.file_format, param_file,
+             type(data).__name__, data._asdict()],
+            sort_keys=True,
+            default=float)
+        return hashlib.sha1(figure_json.encode('utf-8')).hexdigest()
+
+    def renderFigures(self, figures):
+        """Renders figures to files in output_folder, skipping the figures
+        whose data didn't change since they were rendered.
+
+        Input:
+        - figures: list of tuples (data, param_file), where data is a Data for
+              a bar plot or a SweepData for the sweep of param_file.
+        """
+        plt.switch_backend('Agg')
+        if not os.path.isdir(self.output_folder):
+            os.makedirs(self.output_folder)
+        hashes_file = os.path.join(self.output_folder, PLOT_HASHES_FILENAME)
+        try:
+            with open(hashes_file, 'r') as in_file_stream:
+                previous_hashes = json.load(in_file_stream)
+        except (IOError, OSError, ValueError):
+            previous_hashes = {}
+
+        hashes = {}
+        tasks = []
+        for data, param_file in figures:
+            path = self._getFigurePath(self._getFigureName(data, param_file))
+            file_name = os.path.basename(path)
+            hashes[file_name] = self._getFigureHash(data, param_file)
+            if previous_hashes.get(file_name) != hashes[file_name] or \
+                    not os.path.isfile(path):
+                tasks.append((self.output_folder, self.file_format, data,
+                              param_file))
+
+        num_workers = self.num_workers
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        if num_workers <= 1 or len(tasks) < MIN_FIGURES_FOR_PARALLEL_RENDERING:
+            for task in tasks:
+                _renderFigure(task)
+        else:
+            pool = multiprocessing.Pool(num_workers)
+            try:
+                pool.map(_renderFigure, tasks, chunksize=1)
+                pool.close()
+            finally:
+                pool.terminate()
+                pool.join()
+
+        # Write to a temporary file first so that an interrupted write doesn't
+        # leave a corrupt file.
+        temp_file = hashes_file + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_file, 'w') as out_file_stream:
+            json.dump(hashes, out_file_stream)
+        os.rename(temp_file, hashes_file)
+        self.logger.info("Rendered %i of %i figures to %s, the others were "
+                         "unchanged.", len(tasks), len(figures),
+                         self.output_folder)
+
+    def _finishFigure(self, name):
+        """Saves and closes the current figure if plots are saved to files."""
+        if self.output_folder is None:
+            return
+        if not os.path.isdir(self.output_folder):
+            os.makedirs(self.output_folder)
+        plt.savefig(self._getFigurePath(name))
+        plt.close()
 
     def plotDataWithoutSweeps(self, data):
         """Creates and shows one bar plot with the input data."""
@@ -195,6 +308,18 @@ class Plotter(object):
             lw=1)
         for x, y in zip(ind, data.means):
             plt.text(x + 0.55, y * 1.05, "{0:.2f}".format(y))
+        quantile_handles = []
+        for (name, _), marker in zip(SUMMARY_QUANTILES, ['_', '^', 'v']):
+            if not np.isnan(data.quantiles[name]).all():
+                quantile_handles.append(
+                    plt.scatter(
+                        ind + 0.5,
+                        data.quantiles[name],
+                        marker=marker,
+                        s=80,
+                        color='black',
+                        label=name,
+                        zorder=3))
 
         # Format the plot.
         for i in range(N):
@@ -207,8 +332,9 @@ class Plotter(object):
         max_y = plt.axis()[3]
         plt.xlim(-2, N + 2)
         plt.ylim(-0.5 * max_y, 1.5 * max_y)
-        plt.legend(handles=patches)
+        plt.legend(handles=patches + quantile_handles)
         plt.grid()
+        self._finishFigure(self._getFigureName(data, None))
 
     def plotSweepsData(self, data):
         """Creates one x-y plot for each SweepData inside data."""
@@ -243,6 +369,20 @@ class Plotter(object):
             ax.fill_between(
                 indices, stddevs_sup, stddevs_inf, color="#9a0bad", alpha=0.2)
             ax.fill_between(indices, mins, maxes, color="gray", alpha=0.1)
+            for (name, _), linestyle in zip(SUMMARY_QUANTILES,
+                                            ['-.', '-.', ':']):
+                quantiles = np.array(
+                    sweep_data.quantiles[name]).astype(np.float64)
+                if not np.isnan(quantiles).all():
+                    ax.plot(
+                        indices,
+                        quantiles,
+                        linestyle=linestyle,
+                        lw=2,
+                        color="#1D70A2",
+                        label=name)
+            if ax.get_legend_handles_labels()[0]:
+                ax.legend()
 
             # Format the plot.
             curr_axis = plt.axis()
@@ -253,19 +393,193 @@ class Plotter(object):
             plt.ylim(curr_axis[2] - 0.1 * y_range,
                      curr_axis[3] + 0.1 * y_range)
             plt.grid()
+            self._finishFigure(
+                self._getFigureName(sweep_data, param_file))
+
+
+def _loadStatisticsFile(task):
+    """Loads one statistics file for SimpleSummarization.
+
+    Input:
+    - task: tuple (file_to_summarize, whitelist, blacklist,
+          skip_missing_files).
+
+    Return value: tuple (dataset, parameter_file, metrics), where metrics is a
+    dictionary {metric name: sample} with the metrics of the file that pass
+    the whitelist or blacklist, see metric_store.sampleFromDict(). None if
+    skip_missing_files is True and the file doesn't exist or can't be read
+    (yet).
+    """
+    file_to_summarize, whitelist, blacklist, skip_missing_files = task
+    if not os.path.isfile(file_to_summarize) and \
+            not os.path.isfile(getBinaryStatsPath(file_to_summarize)):
+        if skip_missing_files:
+            return None
+        raise ValueError(
+            "Output file does not exist: {}".format(file_to_summarize))
+    try:
+        statistics = loadFormattedStatsPreferBinary(file_to_summarize)
+    except (IOError, ValueError, yaml.YAMLError):
+        # E.g. a file that is still being written.
+        if skip_missing_files:
+            return None
+        raise
+
+    metrics = {}
+    for key, values in statistics["metrics"].items():
+        # Remove unwanted metrics
+        if whitelist:
+            if key not in whitelist:
+                continue
+        elif key in blacklist:
+            continue
+        metrics[key] = sampleFromDict(values)
+    return statistics["dataset"], statistics["parameter_file"], metrics
+
+
+def getStatsFilesInFolder(results_folder):
+    """Returns the paths of the formatted_stats.yaml of all jobs in
+    results_folder, i.e. of all sub-folders that contain a job.yaml. The files
+    don't need to exist yet."""
+    if not os.path.isdir(results_folder):
+        return []
+    return [
+        os.path.join(results_folder, job_folder, FORMATTED_STATS_FILENAME)
+        for job_folder in sorted(os.listdir(results_folder))
+        if os.path.isfile(os.path.join(results_folder, job_folder, 'job.yaml'))
+    ]
+
+
+class SummaryCache(object):
+    """Persistent cache of the metrics loaded from statistics files.
+
+    Stores the result of _loadStatisticsFile() for every file together with
+    the size and modification time of the file (and of its binary copy). An
+    entry is only used if the file didn't change since. The cache is only
+    valid for the same whitelist and blacklist.
+
+    The cache file is JSON:
+      {version: <VERSION>, whitelist: [...], blacklist: [...],
+       files: {<path>: {key: [...], dataset: ..., parameter_file: ...,
+                        metrics: {<name>: <sample>}}}}
+    where every sample is a list as returned by
+    metric_store.sampleFromDict(). Cache files of another version are
+    ignored, so VERSION must be increased whenever this format or the format
+    of the samples changes.
+    """
+
+    VERSION = 3
+
+    def __init__(self, cache_file, whitelist, blacklist):
+        self.cache_file = cache_file
+        self._header = {
+            'version': self.VERSION,
+            'whitelist': list(whitelist),
+            'blacklist': list(blacklist)
+        }
+        self._entries = {}
+        self._used_paths = set()
+        self._is_modified = False
+        try:
+            with open(cache_file, 'r') as in_file_stream:
+                cache = json.load(in_file_stream)
+            if all(cache.get(key) == value
+                   for key, value in self._header.items()):
+                self._entries = cache['files']
+        except (IOError, OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    @staticmethod
+    def getFileKey(file_to_summarize):
+        """Returns the size and modification time of a statistics file and of
+        its binary copy."""
+        file_key = []
+        for path in [
+                file_to_summarize,
+                getBinaryStatsPath(file_to_summarize)
+        ]:
+            try:
+                stat = os.stat(path)
+                file_key.extend([stat.st_size, stat.st_mtime])
+            except OSError:
+                file_key.extend([None, None])
+        return file_key
+
+    def get(self, file_to_summarize, file_key):
+        """Returns the cached result of _loadStatisticsFile() or None."""
+        self._used_paths.add(file_to_summarize)
+        entry = self._entries.get(file_to_summarize)
+        if entry is None or entry['key'] != file_key:
+            return None
+        return entry['dataset'], entry['parameter_file'], entry['metrics']
+
+    def put(self, file_to_summarize, file_key, result):
+        dataset, parameter_file, metrics = result
+        self._used_paths.add(file_to_summarize)
+        self._entries[file_to_summarize] = {
+            'key': file_key,
+            'dataset': dataset,
+            'parameter_file': parameter_file,
+            'metrics': metrics
+        }
+        self._is_modified = True
+
+    def save(self):
+        """Writes the cache if it changed. Entries of files that were not
+        summarized since the cache was loaded are dropped."""
+        if not self._is_modified and \
+                len(self._used_paths) == len(self._entries):
+            return
+        cache = dict(self._header)
+        cache['files'] = {
+            path: entry
+            for path, entry in self._entries.items()
+            if path in self._used_paths
+        }
+        # Write to a temporary file first so that an interrupted write doesn't
+        # corrupt the cache.
+        temp_file = self.cache_file + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_file, 'w') as out_file_stream:
+            json.dump(cache, out_file_stream)
+        os.rename(temp_file, self.cache_file)
 
 
 class SimpleSummarization(object):
     """Performs and plots a summarization of the jobs run in the experiment.
 
     Reads information from the 'formated_stats.yaml' files available in each job
-    result folder, and summarizes and plots the data.
+    result folder, and summarizes and plots the data. The binary copies of the
+    files (see binary_stats.writeBinaryStats()) are read instead if they
+    exist.
+
+    The files are loaded by num_workers processes (default: number of CPUs) if
+    there are at least MIN_FILES_FOR_PARALLEL_LOADING files.
+
+    If cache_file is set, the metrics of every file are stored in this file,
+    see SummaryCache. Summarizing the same files again only loads the files
+    that are new or changed since.
+
+    If skip_missing_files is True, files that don't exist or can't be read are
+    ignored instead of raising a ValueError, e.g. to summarize the jobs that
+    already finished while the experiment is running.
+
+    If plot_folder is set, runSummarization() renders the plots headless to
+    files of plot_format in plot_folder instead of showing them, see Plotter.
     """
 
-    def __init__(self, files_to_summarize, whitelist=None, blacklist=None):
+    def __init__(self,
+                 files_to_summarize,
+                 whitelist=None,
+                 blacklist=None,
+                 num_workers=None,
+                 cache_file=None,
+                 skip_missing_files=False,
+                 plot_folder=None,
+                 plot_format='png'):
         logging.basicConfig(level=logging.DEBUG)
         self.logger = logging.getLogger(__name__)
         self.files_to_summarize = files_to_summarize
+        self.skip_missing_files = skip_missing_files
         if whitelist is not None:
             self.whitelist = whitelist
         else:
@@ -274,101 +588,130 @@ class SimpleSummarization(object):
             self.blacklist = blacklist
         else:
             self.blacklist = []
-        self.plotter = Plotter()
+        self.plotter = Plotter(plot_folder, plot_format, num_workers)
 
         # Load data
-        self.datasets = set()
-        self.parameter_files = set()
-        self.metrics = defaultdict((dict))
-
-        self.metrics = defaultdict(lambda: defaultdict(Metric))
-        for file_to_summarize in files_to_summarize:
-            if not os.path.isfile(file_to_summarize):
-                raise ValueError(
-                    "Output file does not exist: {}".format(file_to_summarize))
-            statistics = yaml.safe_load(open(file_to_summarize))
-            if not {'dataset', 'metrics', 'parameter_file'}.issubset(
-                    statistics.keys()):
-                raise ValueError(
-                    'Malformed statistics file: {}'.format(file_to_summarize))
-
-            dataset = statistics["dataset"]
-            parameter_file = statistics["parameter_file"]
-            metrics = statistics["metrics"]
-
-            # Remove unwanted metrics
-            if self.whitelist:
-                metrics = {
-                    key: metrics[key]
-                    for key in metrics if key in self.whitelist
-                }
-
-            else:
-                metrics = {
-                    key: metrics[key]
-                    for key in metrics if key not in self.blacklist
-                }
-
-            self.datasets.add(dataset)
-            self.parameter_files.add(parameter_file)
-
-            for metric, values in metrics.items():
-                self.metrics[(
-                    dataset, parameter_file)][metric].addSampleFromDict(values)
-
-        self.createMetricsIndices()
+        runs = self._loadFiles(num_workers, cache_file)
+        self.num_runs = len(runs)
+        self.metric_store = MetricStore.fromRuns(runs)
+        self.datasets = set(self.metric_store.labels[0])
+        self.parameter_files = set(self.metric_store.labels[1])
         self.logger.info(
             "Extracted data from %i runs, across %i datasets and %i parameter "
-            "sets.", len(self.files_to_summarize), len(self.datasets),
+            "sets.", self.num_runs, len(self.datasets),
             len(self.parameter_files))
 
+    def _loadFiles(self, num_workers, cache_file):
+        """Returns the loaded and filtered statistics of all files in the
+        order of files_to_summarize, see _loadStatisticsFile(). Files that
+        have an up-to-date entry in the cache are not loaded again."""
+        cache = None
+        if cache_file is not None:
+            cache = SummaryCache(cache_file, self.whitelist, self.blacklist)
+        results = [None] * len(self.files_to_summarize)
+        file_keys = [None] * len(self.files_to_summarize)
+        indices_to_load = []
+        for index, file_to_summarize in enumerate(self.files_to_summarize):
+            if cache is not None:
+                file_keys[index] = SummaryCache.getFileKey(file_to_summarize)
+                results[index] = cache.get(file_to_summarize,
+                                           file_keys[index])
+            if results[index] is None:
+                indices_to_load.append(index)
+
+        loaded_results = self._loadStatisticsFiles(
+            [self.files_to_summarize[index] for index in indices_to_load],
+            num_workers)
+        for index, result in zip(indices_to_load, loaded_results):
+            results[index] = result
+            if cache is not None and result is not None:
+                cache.put(self.files_to_summarize[index], file_keys[index],
+                          result)
+        if cache is not None:
+            self.logger.info("Loaded %i of %i statistics files, the others "
+                             "were cached in %s.", len(indices_to_load),
+                             len(results), cache_file)
+            cache.save()
+        return [result for result in results if result is not None]
+
+    def _loadStatisticsFiles(self, files_to_load, num_workers):
+        """Yields the results of _loadStatisticsFile() for files_to_load."""
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        tasks = [(file_to_summarize, self.whitelist, self.blacklist,
+                  self.skip_missing_files)
+                 for file_to_summarize in files_to_load]
+        if num_workers <= 1 or len(tasks) < MIN_FILES_FOR_PARALLEL_LOADING:
+            for task in tasks:
+                yield _loadStatisticsFile(task)
+            return
+
+        pool = multiprocessing.Pool(num_workers)
+        try:
+            for result in pool.imap(
+                    _loadStatisticsFile,
+                    tasks,
+                    chunksize=max(1, len(tasks) // (4 * num_workers))):
+                yield result
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
     def runSummarization(self):
         metrics = self.summarizeMetricsFromDatasets()
         self.plotter.plot(metrics)
 
-    def createMetricsIndices(self):
-        self.metrics_by_dataset = defaultdict(dict)
-        for dataset in self.datasets:
-            for parameter_file in self.parameter_files:
-                self.metrics_by_dataset[dataset][
-                    parameter_file] = self.metrics[(dataset, parameter_file)]
-
-        self.metrics_by_parameter_file = defaultdict(dict)
-        for parameter_file in self.parameter_files:
-            for dataset in self.datasets:
-                self.metrics_by_parameter_file[parameter_file][
-                    dataset] = self.metrics[(dataset, parameter_file)]
-
     def summarizeMetricsFromDatasets(self, datasets='all'):
-        if datasets == 'all':
-            datasets = self.datasets
+        """Merges the metrics of datasets for every parameter file.
 
-        merged_datasets = self.mergeDatasets(datasets)
-        metrics_dict = defaultdict(lambda: defaultdict(dict))
-        for parameter_file, keys in merged_datasets.items():
-            for key, value in keys.items():
-                metrics_dict[key][parameter_file]["mean"] = value.mean
-                metrics_dict[key][parameter_file]["stddev"] = value.stddev
-                metrics_dict[key][parameter_file]["max"] = value.max
-                metrics_dict[key][parameter_file]["min"] = value.min
-                metrics_dict[key][parameter_file]["count"] = value.count
+        Return value: dictionary {metric name: {parameter file: {'count': ...,
+        'mean': ..., 'stddev': ..., 'min': ..., 'max': ...}}}. Metrics with
+        quantile sketches additionally have the entries of SUMMARY_QUANTILES.
+        """
+        if datasets == 'all':
+            datasets = None
+        elif not set(datasets).issubset(self.datasets):
+            raise Exception("One or more datasets not found.")
 
-        return metrics_dict
+        merged_store = self.metric_store.mergeAxis('dataset', datasets)
+        parameter_files, metric_names = merged_store.labels
+        parameter_file_indices, metric_indices = np.nonzero(
+            merged_store.has_data)
+        counts = merged_store.count[parameter_file_indices,
+                                    metric_indices].tolist()
+        means = merged_store.mean[parameter_file_indices,
+                                  metric_indices].tolist()
+        stddevs = merged_store.stddev()[parameter_file_indices,
+                                        metric_indices].tolist()
+        mins = merged_store.minimum[parameter_file_indices,
+                                    metric_indices].tolist()
+        maxes = merged_store.maximum[parameter_file_indices,
+                                     metric_indices].tolist()
 
-    def mergeDatasets(self, datasets='all'):
-        if not set(datasets).issubset(self.datasets):
-            raise Exception("One or more datasets not found.")
+        metrics_dict = defaultdict(lambda: defaultdict(dict))
+        for i, (parameter_file_index, metric_index) in enumerate(
+                zip(parameter_file_indices.tolist(), metric_indices.tolist())):
+            metrics_dict[metric_names[metric_index]][
+                parameter_files[parameter_file_index]] = {
+                    'mean': means[i],
+                    'stddev': stddevs[i],
+                    'max': maxes[i],
+                    'min': mins[i],
+                    'count': int(counts[i])
+                }
 
-        result_dict = defaultdict(dict)
-        for dataset in datasets:
-            for parameter_file, metrics in self.metrics_by_dataset[
-                    dataset].items():
-                for key, metric in metrics.items():
-                    if key not in result_dict[parameter_file].keys():
-                        result_dict[parameter_file][key] = Metric()
-                    result_dict[parameter_file][key].mergeMetric(metric)
+        quantiles = [q for _, q in SUMMARY_QUANTILES]
+        for parameter_file_index, metric_index in merged_store.sketches:
+            values = metrics_dict[metric_names[metric_index]][
+                parameter_files[parameter_file_index]]
+            for (name, _), value in zip(
+                    SUMMARY_QUANTILES,
+                    merged_store.getQuantiles(
+                        (parameter_file_index, metric_index), quantiles)):
+                values[name] = value
 
-        return result_dict
+        return metrics_dict
 
 
 if __name__ == '__main__':
@@ -382,16 +725,34 @@ if __name__ == '__main__':
         '--results_folder',
         help='folder that contains all job folders',
         default="")
+    parser.add_argument(
+        '--plot_folder',
+        help='render the plots to files in this folder instead of showing '
+        'them')
+    parser.add_argument(
+        '--plot_format',
+        default='png',
+        help='file format of the rendered plots, e.g. png or svg')
+    parser.add_argument(
+        '--report_folder',
+        help='write or update a static HTML report in this folder instead of '
+        'plotting')
     args = parser.parse_args()
 
     if not os.path.isdir(args.results_folder):
         logger.error("Failed to open results folder")
 
-    result_files = [
-        args.results_folder + '/' + run_folder + '/formatted_stats.yaml'
-        for run_folder in os.listdir(args.results_folder)
-    ]
+    result_files = getStatsFilesInFolder(args.results_folder)
 
     # TODO Read whitelist / blacklist from job and pass it here.
-    ev = SimpleSummarization(result_files)
-    ev.runSummarization()
+    ev = SimpleSummarization(
+        result_files,
+        cache_file=os.path.join(args.results_folder, SUMMARY_CACHE_FILENAME),
+        plot_folder=args.plot_folder,
+        plot_format=args.plot_format)
+    if args.report_folder is not None:
+        # Imported here as the report depends on this module.
+        from evaluation_tools.html_report import HtmlReport
+        HtmlReport(args.report_folder).update(ev.metric_store, ev.num_runs)
+    else:
+        ev.runSummarization()
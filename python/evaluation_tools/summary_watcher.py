@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+
+import argparse
+import csv
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import time
+
+import matplotlib.pyplot as plt
+
+from evaluation_tools.binary_stats import getBinaryStatsPath
+from evaluation_tools.simple_summarization import (
+    FORMATTED_STATS_FILENAME, SUMMARY_CACHE_FILENAME, SUMMARY_QUANTILES,
+    Plotter, SimpleSummarization, getStatsFilesInFolder)
+from evaluation_tools.yaml_io import dumpYaml
+
+SUMMARY_FILENAME = 'summary.yaml'
+SUMMARY_TABLE_FILENAME = 'summary.csv'
+SUMMARY_PLOTS_FOLDER = 'summary_plots'
+
+_SUMMARY_TABLE_COLUMNS = ['count', 'mean', 'stddev', 'min', 'max'] + [
+    name for name, _ in SUMMARY_QUANTILES
+]
+
+# See inotify(7).
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_INOTIFY_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _getStatsPaths(job_path):
+    """Returns the paths of the statistics files of a job."""
+    stats_file = os.path.join(job_path, FORMATTED_STATS_FILENAME)
+    return [stats_file, getBinaryStatsPath(stats_file)]
+
+
+class _InotifyChangeDetector(object):
+    """Detects new jobs and new statistics files in a results folder with
+    inotify.
+
+    Raises an OSError if inotify is not available or the watches can't be
+    added, e.g. because the limit of watches is reached.
+    """
+
+    def __init__(self, results_folder):
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError(errno.ENOSYS, 'libc not found')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init'):
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+        self._fd = self._libc.inotify_init()
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init failed')
+        self.results_folder = results_folder
+        self._watched_folders = {}
+        try:
+            self._addWatch(results_folder,
+                           _IN_CREATE | _IN_MOVED_TO | _IN_DELETE)
+            for job_folder in os.listdir(results_folder):
+                job_path = os.path.join(results_folder, job_folder)
+                if os.path.isdir(job_path) and \
+                        job_folder != SUMMARY_PLOTS_FOLDER:
+                    self._addJobWatch(job_path)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _addWatch(self, folder, mask):
+        watch_descriptor = self._libc.inotify_add_watch(
+            self._fd, folder.encode('utf-8'), mask)
+        if watch_descriptor < 0:
+            raise OSError(ctypes.get_errno(),
+                          'inotify_add_watch failed for ' + folder)
+        self._watched_folders[watch_descriptor] = folder
+
+    def _addJobWatch(self, job_path):
+        self._addWatch(job_path, _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_MODIFY)
+
+    def waitForChange(self, timeout_s):
+        """Returns True if a job folder was added or removed or a statistics
+        file was written within timeout_s, otherwise False."""
+        end_time = time.time() + timeout_s
+        changed = False
+        while not changed:
+            remaining_s = end_time - time.time()
+            if remaining_s <= 0:
+                return False
+            readable, _, _ = select.select([self._fd], [], [], remaining_s)
+            if not readable:
+                return False
+            changed = self._readEvents()
+        return True
+
+    def _readEvents(self):
+        data = os.read(self._fd, 65536)
+        changed = False
+        offset = 0
+        while offset + _INOTIFY_EVENT_HEADER.size <= len(data):
+            watch_descriptor, mask, _, name_length = \
+                _INOTIFY_EVENT_HEADER.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b'\0').decode(
+                'utf-8', 'replace')
+            offset += name_length
+            if mask & _IN_Q_OVERFLOW:
+                changed = True
+                continue
+            folder = self._watched_folders.get(watch_descriptor)
+            if folder == self.results_folder:
+                # The plots of the watcher are written to the results folder
+                # by default.
+                if mask & _IN_ISDIR and name != SUMMARY_PLOTS_FOLDER:
+                    job_path = os.path.join(folder, name)
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        try:
+                            self._addJobWatch(job_path)
+                        except OSError:
+                            # E.g. the folder was removed again.
+                            continue
+                        # The statistics might have been written before the
+                        # watch was added.
+                        changed = changed or any(
+                            os.path.isfile(stats_file)
+                            for stats_file in _getStatsPaths(job_path))
+                    else:
+                        changed = True
+            elif name in [
+                    os.path.basename(stats_file)
+                    for stats_file in _getStatsPaths('')
+            ] and mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                changed = True
+        return changed
+
+
+class _PollingChangeDetector(object):
+    """Detects new jobs and new statistics files in a results folder by
+    comparing the folder listing and the file sizes and modification times
+    periodically."""
+
+    def __init__(self, results_folder, poll_period_s=2.):
+        self.results_folder = results_folder
+        self.poll_period_s = poll_period_s
+        self._state = self._getState()
+
+    def close(self):
+        pass
+
+    def _getState(self):
+        state = []
+        for stats_file in getStatsFilesInFolder(self.results_folder):
+            for path in [stats_file, getBinaryStatsPath(stats_file)]:
+                try:
+                    stat = os.stat(path)
+                    state.append((path, stat.st_size, stat.st_mtime))
+                except OSError:
+                    state.append((path, None, None))
+        return state
+
+    def waitForChange(self, timeout_s):
+        end_time = time.time() + timeout_s
+        while True:
+            time.sleep(max(0., min(self.poll_period_s,
+                                   end_time - time.time())))
+            state = self._getState()
+            if state != self._state:
+                self._state = state
+                return True
+            if time.time() >= end_time:
+                return False
+
+
+class SummaryWatcher(object):
+    """Summarizes the jobs of an experiment while it is running.
+
+    Follows the results folder of an experiment (the folder that contains the
+    job folders) and updates the summary whenever the statistics of a job
+    appear or change, at most once every update_period_s seconds. Changes are
+    detected with inotify if available, otherwise by polling.
+
+    Every update writes to output_folder (default: the results folder):
+    - summary.yaml: the summarized metrics of all jobs with statistics, see
+          SimpleSummarization.summarizeMetricsFromDatasets().
+    - summary.csv: the same as a table with one row per metric and parameter
+          file.
+    - summary_plots/: the plots of the summarization as png files. Only the
+          plots whose data changed are rendered again, see Plotter.
+
+    Jobs without statistics are skipped. The statistics are cached in the
+    results folder (see SummaryCache), so an update only loads the files of
+    the jobs that finished since the previous update.
+    """
+
+    def __init__(self,
+                 results_folder,
+                 output_folder=None,
+                 whitelist=None,
+                 blacklist=None,
+                 update_period_s=30.,
+                 use_inotify=True,
+                 write_plots=True):
+        logging.basicConfig(level=logging.DEBUG)
+        self.logger = logging.getLogger(__name__)
+        self.results_folder = results_folder
+        self.output_folder = output_folder or results_folder
+        self.whitelist = whitelist
+        self.blacklist = blacklist
+        self.update_period_s = update_period_s
+        self.write_plots = write_plots
+        self.num_updates = 0
+        self._change_detector = None
+        if use_inotify:
+            try:
+                self._change_detector = _InotifyChangeDetector(results_folder)
+            except OSError as ex:
+                self.logger.warning(
+                    "Can't watch %s with inotify (%s), polling instead.",
+                    results_folder, ex)
+        if self._change_detector is None:
+            self._change_detector = _PollingChangeDetector(results_folder)
+        if write_plots:
+            # The plots are only saved to files.
+            plt.switch_backend('Agg')
+
+    def close(self):
+        self._change_detector.close()
+
+    def run(self, max_updates=None):
+        """Updates the summary whenever the statistics change until
+        max_updates updates were written or forever if it is None."""
+        self.update()
+        while max_updates is None or self.num_updates < max_updates:
+            last_update_time = time.time()
+            while not self._change_detector.waitForChange(
+                    self.update_period_s):
+                pass
+            # Collect the changes of the jobs that finish at the same time.
+            remaining_s = last_update_time + self.update_period_s - \
+                time.time()
+            if remaining_s > 0:
+                time.sleep(remaining_s)
+            self.update()
+
+    def update(self):
+        """Summarizes the jobs that have statistics and writes the summary.
+
+        Return value: the summarized metrics.
+        """
+        if not os.path.isdir(self.results_folder):
+            self.logger.info("Waiting for the results folder %s.",
+                             self.results_folder)
+            return {}
+        summarization = SimpleSummarization(
+            getStatsFilesInFolder(self.results_folder),
+            self.whitelist,
+            self.blacklist,
+            cache_file=os.path.join(self.results_folder,
+                                    SUMMARY_CACHE_FILENAME),
+            skip_missing_files=True)
+        metrics = _toDict(summarization.summarizeMetricsFromDatasets())
+
+        if not os.path.isdir(self.output_folder):
+            os.makedirs(self.output_folder)
+        summary_file = os.path.join(self.output_folder, SUMMARY_FILENAME)
+        dumpYaml({
+            'num_jobs': summarization.num_runs,
+            'metrics': metrics
+        }, summary_file + '.tmp')
+        os.rename(summary_file + '.tmp', summary_file)
+        self._writeTable(metrics)
+        if self.write_plots:
+            Plotter(os.path.join(self.output_folder,
+                                 SUMMARY_PLOTS_FOLDER)).plot(metrics)
+        self.num_updates += 1
+        self.logger.info("Updated the summary of %i jobs in %s.",
+                         summarization.num_runs, self.output_folder)
+        return metrics
+
+    def _writeTable(self, metrics):
+        table_file = os.path.join(self.output_folder, SUMMARY_TABLE_FILENAME)
+        with open(table_file + '.tmp', 'w') as out_file_stream:
+            writer = csv.writer(out_file_stream)
+            writer.writerow(['metric', 'parameter_file'] +
+                            _SUMMARY_TABLE_COLUMNS)
+            for metric in sorted(metrics):
+                for parameter_file in sorted(metrics[metric]):
+                    values = metrics[metric][parameter_file]
+                    # The quantiles are left empty for metrics without
+                    # quantile sketches.
+                    writer.writerow([metric, parameter_file] + [
+                        values.get(column, '')
+                        for column in _SUMMARY_TABLE_COLUMNS
+                    ])
+        os.rename(table_file + '.tmp', table_file)
+
+
+def _toDict(metrics):
+    """Converts the nested defaultdicts of the summarization to dicts."""
+    if isinstance(metrics, dict):
+        return {key: _toDict(value) for key, value in metrics.items()}
+    return metrics
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="""Summarize the jobs of an experiment while it is
+        running.""")
+    parser.add_argument(
+        'results_folder',
+        help='folder of the experiment that contains the job folders')
+    parser.add_argument(
+        '--output_folder',
+        help='folder for the summary files (default: results_folder)')
+    parser.add_argument('--whitelist', nargs='+', help='metrics to summarize')
+    parser.add_argument(
+        '--blacklist', nargs='+', help='metrics to leave out')
+    parser.add_argument(
+        '--update_period',
+        type=float,
+        default=30.,
+        help='minimum time in seconds between two updates of the summary')
+    parser.add_argument(
+        '--poll',
+        action='store_true',
+        help='poll the results folder instead of using inotify')
+    parser.add_argument(
+        '--once',
+        action='store_true',
+        help='write the summary once and exit')
+    args = parser.parse_args()
+
+    watcher = SummaryWatcher(
+        args.results_folder,
+        output_folder=args.output_folder,
+        whitelist=args.whitelist,
+        blacklist=args.blacklist,
+        update_period_s=args.update_period,
+        use_inotify=not args.poll)
+    try:
+        if args.once:
+            watcher.update()
+        else:
+            watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
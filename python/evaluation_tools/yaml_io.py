@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""Reading and writing of the yaml files of the evaluation tools.
+
+The C implementation of the loader and dumper of libyaml is used if PyYAML
+was built with it, which is several times faster than the pure Python
+implementation for large files. Only the safe subset of yaml is supported.
+
+The load*() functions for the known documents (job.yaml, formatted_stats.yaml,
+...) check the shape of the document once when it is loaded and raise a
+YamlFormatError if it is malformed, so that the users of the documents can
+access the required entries directly.
+"""
+
+import yaml
+
+try:
+    SafeLoader = yaml.CSafeLoader
+    SafeDumper = yaml.CSafeDumper
+except AttributeError:
+    SafeLoader = yaml.SafeLoader
+    SafeDumper = yaml.SafeDumper
+
+try:
+    _STRING_TYPES = (str, unicode)
+except NameError:
+    _STRING_TYPES = (str, )
+
+
+class YamlFormatError(ValueError):
+    pass
+
+
+def loadYamlString(text):
+    """Parses a yaml document from a string."""
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def loadYaml(path):
+    """Loads the yaml file under path."""
+    with open(path, 'r') as in_file_stream:
+        return yaml.load(in_file_stream, Loader=SafeLoader)
+
+
+def dumpYaml(data, path=None, stream=None, **kwargs):
+    """Writes data as yaml to the file under path or to stream.
+
+    If neither path nor stream is given, the yaml is returned as a string.
+    The keyword arguments are passed to yaml.dump(), default_flow_style is
+    False by default.
+    """
+    kwargs.setdefault('default_flow_style', False)
+    if path is not None:
+        with open(path, 'w') as out_file_stream:
+            yaml.dump(data, stream=out_file_stream, Dumper=SafeDumper, **kwargs)
+        return None
+    return yaml.dump(data, stream=stream, Dumper=SafeDumper, **kwargs)
+
+
+def _checkMapping(document, required_entries, name):
+    """Checks that document is a dict that contains required_entries, a dict
+    {key: type or tuple of types (or None for any type)}."""
+    if not isinstance(document, dict):
+        raise YamlFormatError('Malformed ' + name + ': expected a mapping.')
+    for key, expected_type in required_entries.items():
+        if key not in document:
+            raise YamlFormatError('Malformed ' + name + ': "' + key +
+                                  '" entry not found.')
+        if expected_type is not None and \
+                not isinstance(document[key], expected_type):
+            raise YamlFormatError('Malformed ' + name + ': "' + key +
+                                  '" entry has the wrong type.')
+
+
+def loadJobInfo(path):
+    """Loads a job.yaml, see Job.createJob()."""
+    job_info = loadYaml(path)
+    name = 'job file ' + path
+    _checkMapping(
+        job_info, {
+            'experiment_name': _STRING_TYPES,
+            'experiment_root_folder': None,
+            'datasets': list,
+            'app_package_name': _STRING_TYPES,
+            'app_executable': _STRING_TYPES,
+            'sensors_file': None,
+            'localization_map': None
+        }, name)
+    for dataset in job_info['datasets']:
+        _checkMapping(dataset, {
+            'name': _STRING_TYPES,
+            'parameters': dict
+        }, name)
+    return job_info
+
+
+def loadConsoleCommands(path):
+    """Loads a console_commands.yaml of the maplab batch runner."""
+    console_commands = loadYaml(path)
+    _checkMapping(console_commands, {
+        'vi_map_folder_paths': list,
+        'commands': list
+    }, 'console commands file ' + path)
+    return console_commands
+
+
+def loadStatistics(path):
+    """Loads a statistics.yaml written by the estimator: a dict with one entry
+    per metric."""
+    statistics = loadYaml(path)
+    if not isinstance(statistics, dict):
+        raise YamlFormatError('Malformed statistics file: ' + path)
+    return statistics
+
+
+def loadFormattedStats(path):
+    """Loads a formatted_stats.yaml, see evaluation/prepare_statistics.py."""
+    formatted_stats = loadYaml(path)
+    _checkMapping(formatted_stats, {
+        'dataset': None,
+        'parameter_file': None,
+        'metrics': dict
+    }, 'statistics file ' + path)
+    return formatted_stats
+
+
+def loadDatasetList(path):
+    """Loads a datasets.yaml: a list with one dict per dataset. The entries
+    are not checked, see dataset_tools.getDatasetList()."""
+    dataset_list = loadYaml(path)
+    if not isinstance(dataset_list, list):
+        raise YamlFormatError('Malformed datasets file: ' + path)
+    return dataset_list
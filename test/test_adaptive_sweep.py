@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+from collections import OrderedDict
+import logging
+import os
+import shutil
+import tempfile
+
+import nose.tools
+
+from evaluation_tools.adaptive_sweep import AdaptiveSweep
+from evaluation_tools.run_experiment import (ADAPTIVE_SWEEPS_FILENAME,
+                                             Experiment)
+from evaluation_tools.yaml_io import loadYaml
+
+
+def test_successive_halving_refines_around_best_value():
+    sweep = AdaptiveSweep({
+        'name': 'x',
+        'min': 0,
+        'max': 64,
+        'step_size': 1,
+        'adaptive': {
+            'metric': 'error',
+            'rounds': 5,
+            'datasets_per_round': [1, 2],
+            'budget_parameter': 'end_s',
+            'budget_values': [10, 20]
+        }
+    })
+    nose.tools.eq_(sweep.values, [0, 8, 16, 24, 32, 40, 48, 56, 64])
+    nose.tools.eq_(sweep.getNumDatasets(4), 1)
+    nose.tools.eq_(sweep.getParameters({'x': 0, 'y': 1}, 8), {
+        'x': 8,
+        'y': 1,
+        'end_s': 10
+    })
+
+    num_evaluated_values = 0
+    while not sweep.isFinished():
+        num_evaluated_values += len(sweep.values)
+        # Values that failed are dropped.
+        sweep.finishRound({
+            value: (value - 37)**2 if value != 36 else None
+            for value in sweep.values
+        })
+    nose.tools.eq_(sweep.getBestValue(), (37, 0))
+    nose.tools.eq_(sweep.getNumDatasets(4), 2)
+    nose.tools.eq_(sweep.getParameters({}, 37)['end_s'], 20)
+    nose.tools.ok_(num_evaluated_values < 65)
+
+
+def _createExperiment(results_folder, summarize_statistics=True):
+    """Returns an Experiment with only the attributes that the adaptive sweeps
+    use, without reading an experiment file."""
+    experiment = Experiment.__new__(Experiment)
+    experiment.logger = logging.getLogger(__name__)
+    experiment.results_folder = results_folder
+    experiment.root_folder = results_folder
+    experiment.experiment_basename = 'experiment'
+    experiment.eval_dict = {}
+    experiment.summarize_statistics = summarize_statistics
+    experiment.job_plans = []
+    experiment._adaptive_sweeps = OrderedDict()
+    experiment._shared_job_info = {}
+    os.makedirs(os.path.join(results_folder, 'experiment'))
+    return experiment
+
+
+def test_experiment_runs_adaptive_sweep_rounds():
+    results_folder = tempfile.mkdtemp()
+    try:
+        params = {
+            'y': 1,
+            'parameter_sweep': {
+                'name': 'x',
+                'min': 0,
+                'max': 64,
+                'step_size': 1,
+                'adaptive': {
+                    'metric': 'error',
+                    'rounds': 3,
+                    'datasets_per_round': [1, 2]
+                }
+            }
+        }
+        with nose.tools.assert_raises(ValueError):
+            _createExperiment(
+                os.path.join(results_folder, 'without_statistics'),
+                summarize_statistics=False)._registerAdaptiveSweep(
+                    'params.yaml', params, [{
+                        'name': 'a'
+                    }], 'experiment/a__params')
+
+        experiment = _createExperiment(results_folder)
+        for dataset in ['a', 'b']:
+            experiment._registerAdaptiveSweep('params.yaml', params, [{
+                'name': dataset
+            }], 'experiment/' + dataset + '__params')
+        jobs = experiment._createAdaptiveSweepJobs()
+        # The first round only uses the first dataset.
+        nose.tools.eq_(len(jobs), 9)
+
+        sweep = experiment._adaptive_sweeps['params.yaml']['sweep']
+        values_by_job_path = {}
+        num_rounds = 0
+        while jobs:
+            num_rounds += 1
+            for job in jobs:
+                values_by_job_path[job.job_path] = job.params['x']
+            # Stubs the scores from the formatted_stats.yaml of the jobs.
+            sweep.getScore = lambda job_paths: (
+                values_by_job_path[job_paths[0]] - 37)**2
+            jobs = experiment._finishAdaptiveSweepRound()
+            if jobs:
+                nose.tools.eq_(
+                    len(jobs), 2 * len(set(job.params['x'] for job in jobs)))
+        nose.tools.eq_(num_rounds, 3)
+        nose.tools.eq_(len(set(job.job_name for job in
+                               experiment.job_plans)),
+                       len(experiment.job_plans))
+
+        sweep_results = loadYaml(
+            os.path.join(results_folder, 'experiment',
+                         ADAPTIVE_SWEEPS_FILENAME))['params.yaml']
+        # The spacing of the last round is 2.
+        nose.tools.ok_(abs(sweep_results['best_value'] - 37) <= 2)
+        nose.tools.eq_(len(sweep_results['rounds']), 3)
+    finally:
+        shutil.rmtree(results_folder)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+
+import nose.tools
+
+from evaluation_tools.binary_stats import (getBinaryStatsPath,
+                                           loadFormattedStatsPreferBinary,
+                                           writeBinaryStats)
+from evaluation_tools.yaml_io import dumpYaml
+
+
+def test_binary_stats_round_trip():
+    stats_folder = tempfile.mkdtemp()
+    try:
+        yaml_path = os.path.join(stats_folder, 'formatted_stats.yaml')
+        binary_path = getBinaryStatsPath(yaml_path)
+        formatted_stats = {
+            'dataset': 'dataset',
+            'parameter_file': 'parameters',
+            'metrics': {
+                'error': {
+                    'samples': 10,
+                    'mean': 0.5,
+                    'stddev': 0.25,
+                    'min': -1.,
+                    'max': 2.
+                },
+                'runtime': {
+                    'samples': 3,
+                    'mean': 1.5,
+                    'stddev': 0.,
+                    'min': 1.5,
+                    'max': 1.5
+                }
+            }
+        }
+        nose.tools.ok_(writeBinaryStats(binary_path, formatted_stats))
+        nose.tools.eq_(
+            loadFormattedStatsPreferBinary(yaml_path), formatted_stats)
+
+        # A newer yaml file is preferred over the binary file.
+        formatted_stats['metrics']['error']['mean'] = 1.
+        dumpYaml(formatted_stats, yaml_path)
+        os.utime(binary_path, (0, 0))
+        nose.tools.eq_(
+            loadFormattedStatsPreferBinary(yaml_path), formatted_stats)
+
+        formatted_stats['metrics']['count'] = 5
+        nose.tools.ok_(not writeBinaryStats(binary_path, formatted_stats))
+    finally:
+        shutil.rmtree(stats_folder)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+import nose.tools
+import yaml
+
+from evaluation_tools import catkin_utils
+
+
+def _git(repository_folder, *args):
+    return subprocess.check_output(
+        ['git', '-C', repository_folder, '-c', 'user.name=test', '-c',
+         'user.email=test@test'] + list(args)).decode('ascii').strip()
+
+
+def test_revision_is_read_from_git_directory():
+    repository_folder = tempfile.mkdtemp()
+    try:
+        _git(repository_folder, 'init', '-q')
+        _git(repository_folder, 'commit', '-q', '--allow-empty', '-m', 'a')
+        sub_folder = os.path.join(repository_folder, 'sub')
+        os.makedirs(sub_folder)
+        # Loose ref.
+        nose.tools.eq_(
+            catkin_utils.getRevString(sub_folder),
+            _git(repository_folder, 'rev-parse', 'HEAD'))
+        # Packed ref.
+        _git(repository_folder, 'commit', '-q', '--allow-empty', '-m', 'b')
+        _git(repository_folder, 'pack-refs', '--all', '--prune')
+        nose.tools.eq_(
+            catkin_utils.getRevString(sub_folder),
+            _git(repository_folder, 'rev-parse', 'HEAD'))
+        # Detached HEAD.
+        _git(repository_folder, 'checkout', '-q', 'HEAD~1')
+        nose.tools.eq_(
+            catkin_utils.getRevString(sub_folder),
+            _git(repository_folder, 'rev-parse', 'HEAD'))
+    finally:
+        shutil.rmtree(repository_folder)
+
+
+def test_catkin_find_cache_file():
+    cache_folder = tempfile.mkdtemp()
+    cache_file = os.path.join(cache_folder, 'catkin_find.yaml')
+    os.environ[catkin_utils.CATKIN_FIND_CACHE_ENV] = cache_file
+    try:
+        catkin_utils.clearCatkinFindCache()
+        folders = catkin_utils.catkinFind('evaluation_tools')
+        with open(cache_file, 'r') as in_file_stream:
+            cache = yaml.safe_load(in_file_stream)
+        nose.tools.eq_(cache['packages']['evaluation_tools'], folders)
+
+        catkin_utils.clearCatkinFindCache()
+        nose.tools.eq_(catkin_utils.catkinFind('evaluation_tools'), folders)
+    finally:
+        del os.environ[catkin_utils.CATKIN_FIND_CACHE_ENV]
+        catkin_utils.clearCatkinFindCache()
+        shutil.rmtree(cache_folder)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import os
+import shutil
+import stat
+import tempfile
+
+import nose.tools
+
+from evaluation_tools.command_runner import (
+    buildCommand, CommandRunnerException, launchCommand, runCommand,
+    TERMINATION_STALLED, TERMINATION_TIMEOUT)
+
+
+def _createScript(folder, content):
+    script_path = os.path.join(folder, 'script.sh')
+    with open(script_path, 'w') as out_file_stream:
+        out_file_stream.write('#!/bin/sh\n' + content + '\n')
+    os.chmod(script_path, os.stat(script_path).st_mode | stat.S_IEXEC)
+    return script_path
+
+
+def test_build_command():
+    nose.tools.eq_(
+        buildCommand('rosrun package app', {'a': 1}),
+        ['rosrun', 'package', 'app', '--a=1'])
+    nose.tools.eq_(
+        buildCommand('rosrun package app', {'a': 'x "y z"'}),
+        ['rosrun', 'package', 'app', '--a', 'x', 'y z'])
+    nose.tools.eq_(
+        buildCommand('rosrun package app', {'a': ['x y', 'z']}),
+        ['rosrun', 'package', 'app', '--a', 'x y', 'z'])
+
+
+def test_run_command_with_log_file():
+    folder = tempfile.mkdtemp()
+    try:
+        script_path = _createScript(folder, 'echo "args: $@"\nexit 3')
+        log_file = os.path.join(folder, 'logs', 'script.log')
+        with nose.tools.assert_raises(CommandRunnerException) as context:
+            runCommand(script_path, {'a': 'b c'}, log_file=log_file)
+        nose.tools.eq_(context.exception.return_value, 3)
+        with open(log_file) as in_file_stream:
+            nose.tools.ok_('args: --a b c' in in_file_stream.read())
+
+        running_command = launchCommand(
+            _createScript(folder, 'kill -9 $$'))
+        result = running_command.wait()
+        nose.tools.eq_(result.signal, 9)
+        nose.tools.eq_(result.exit_code, 128 + 9)
+    finally:
+        shutil.rmtree(folder)
+
+
+def test_timeout_and_stall_kill_the_command():
+    folder = tempfile.mkdtemp()
+    try:
+        log_file = os.path.join(folder, 'script.log')
+        # The child process keeps the command alive if it's not killed too.
+        script_path = _createScript(folder, 'sleep 30 &\nwait')
+        result = launchCommand(script_path, log_file=log_file).wait(
+            timeout_s=0.5)
+        nose.tools.eq_(result.termination_reason, TERMINATION_TIMEOUT)
+        nose.tools.ok_(result.wall_time < 10.)
+
+        script_path = _createScript(
+            folder, 'for i in 1 2 3 4 5 6 7 8; do echo $i; sleep 0.2; done\n'
+            'sleep 30')
+        with nose.tools.assert_raises(CommandRunnerException) as context:
+            runCommand(script_path, log_file=log_file, stall_timeout_s=0.8)
+        nose.tools.eq_(context.exception.getStatus(), TERMINATION_STALLED)
+        nose.tools.ok_(context.exception.result.wall_time > 1.6)
+        nose.tools.ok_(context.exception.result.wall_time < 10.)
+    finally:
+        shutil.rmtree(folder)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+
+import nose.tools
+
+from evaluation_tools.estimator_cache import EstimatorOutputCache
+
+
+def _writeFile(path, content, mtime=None):
+    folder = os.path.dirname(path)
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    with open(path, 'w') as out_file_stream:
+        out_file_stream.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def _readFile(path):
+    with open(path, 'r') as in_file_stream:
+        return in_file_stream.read()
+
+
+def test_compute_key():
+    folder = tempfile.mkdtemp()
+    try:
+        cache = EstimatorOutputCache(os.path.join(folder, 'cache'))
+        dataset = os.path.join(folder, 'dataset.bag')
+        _writeFile(dataset, 'data', mtime=1)
+        key = cache.computeKey('rosrun package app', {'a': 1}, dataset, '')
+        nose.tools.eq_(
+            cache.computeKey('rosrun package app', {'a': 1}, dataset, ''),
+            key)
+        nose.tools.ok_(
+            cache.computeKey('rosrun package app', {'a': 2}, dataset, '') !=
+            key)
+        nose.tools.ok_(
+            cache.computeKey('rosrun package other', {'a': 1}, dataset, '')
+            != key)
+
+        # Only the content of the dataset is part of the key.
+        moved_dataset = os.path.join(folder, 'moved', 'dataset.bag')
+        _writeFile(moved_dataset, 'data', mtime=1)
+        nose.tools.eq_(
+            cache.computeKey('rosrun package app', {'a': 1}, moved_dataset,
+                             ''), key)
+        _writeFile(dataset, 'DATA', mtime=2)
+        nose.tools.ok_(
+            cache.computeKey('rosrun package app', {'a': 1}, dataset, '') !=
+            key)
+    finally:
+        shutil.rmtree(folder)
+
+
+def test_store_and_restore():
+    folder = tempfile.mkdtemp()
+    try:
+        cache = EstimatorOutputCache(os.path.join(folder, 'cache'))
+        output_folder = os.path.join(folder, 'job_a')
+        _writeFile(os.path.join(output_folder, 'poses.csv'), 'poses')
+        _writeFile(os.path.join(output_folder, 'map', 'map.bin'), 'map')
+        _writeFile(
+            os.path.join(output_folder, 'process_samples.bin'), 'samples')
+        cache.store(
+            'key', output_folder, excluded_files=['process_samples.bin'])
+        # Only the finished entry is left in the cache folder.
+        nose.tools.eq_(os.listdir(cache.cache_folder), ['key'])
+
+        restored_folder = os.path.join(folder, 'job_b')
+        nose.tools.ok_(not cache.restore('other_key', restored_folder))
+        nose.tools.ok_(cache.restore('key', restored_folder))
+        nose.tools.eq_(
+            _readFile(os.path.join(restored_folder, 'poses.csv')), 'poses')
+        nose.tools.eq_(
+            _readFile(os.path.join(restored_folder, 'map', 'map.bin')), 'map')
+        nose.tools.ok_(not os.path.exists(
+            os.path.join(restored_folder, 'process_samples.bin')))
+        # Copies don't share their data with the cache.
+        nose.tools.eq_(
+            os.stat(os.path.join(restored_folder, 'poses.csv')).st_nlink, 1)
+    finally:
+        shutil.rmtree(folder)
+
+
+def test_restore_with_hardlinks():
+    folder = tempfile.mkdtemp()
+    try:
+        cache = EstimatorOutputCache(
+            os.path.join(folder, 'cache'), mode='hardlink')
+        output_folder = os.path.join(folder, 'job_a')
+        _writeFile(os.path.join(output_folder, 'poses.csv'), 'poses')
+        cache.store('key', output_folder)
+
+        restored_folder = os.path.join(folder, 'job_b')
+        nose.tools.ok_(cache.restore('key', restored_folder))
+        nose.tools.eq_(
+            os.stat(os.path.join(restored_folder, 'poses.csv')).st_ino,
+            os.stat(
+                os.path.join(cache.cache_folder, 'key',
+                             EstimatorOutputCache.OUTPUT_FOLDER,
+                             'poses.csv')).st_ino)
+    finally:
+        shutil.rmtree(folder)
+
+
+def test_evict_least_recently_used():
+    folder = tempfile.mkdtemp()
+    try:
+        cache = EstimatorOutputCache(
+            os.path.join(folder, 'cache'), max_size_bytes=250)
+        output_folder = os.path.join(folder, 'output')
+        _writeFile(os.path.join(output_folder, 'poses.csv'), 'x' * 100)
+        for last_used, key in enumerate(['a', 'b']):
+            cache.store(key, output_folder)
+            os.utime(
+                os.path.join(cache.cache_folder, key,
+                             EstimatorOutputCache.ENTRY_FILENAME),
+                (last_used, last_used))
+        # Restoring marks a as used after b.
+        nose.tools.ok_(cache.restore('a', os.path.join(folder, 'restored')))
+
+        cache.store('c', output_folder)
+        nose.tools.eq_(sorted(os.listdir(cache.cache_folder)), ['a', 'c'])
+    finally:
+        shutil.rmtree(folder)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+
+import nose.tools
+
+from evaluation_tools.execution_journal import ExecutionJournal
+
+
+def test_journal_is_restored_from_file():
+    journal_folder = tempfile.mkdtemp()
+    try:
+        journal_file = os.path.join(journal_folder, 'journal.yaml')
+        journal = ExecutionJournal(journal_file)
+        journal.record('job_a', 'estimator', {})
+        journal.record('job_a', 'console', {'job_estimator_and_console': 3})
+        journal.record('job_b', 'evaluation', {'eval.py': 0})
+        # Simulate an interrupted write.
+        with open(journal_file, 'a') as out_file_stream:
+            out_file_stream.write('- {job: job_b, stage: stat')
+
+        restored_journal = ExecutionJournal(journal_file)
+        nose.tools.ok_(restored_journal.hasSucceeded('job_a', 'estimator'))
+        nose.tools.ok_(not restored_journal.hasSucceeded('job_a', 'console'))
+        nose.tools.ok_(restored_journal.hasSucceeded('job_b', 'evaluation'))
+        nose.tools.ok_(
+            not restored_journal.hasSucceeded('job_b', 'statistics'))
+        nose.tools.eq_(
+            restored_journal.getResults('job_a', 'console'),
+            {'job_estimator_and_console': 3})
+    finally:
+        shutil.rmtree(journal_folder)
+
+
+def test_entry_after_partial_line_is_kept():
+    journal_folder = tempfile.mkdtemp()
+    try:
+        journal_file = os.path.join(journal_folder, 'journal.yaml')
+        ExecutionJournal(journal_file).record('job_a', 'estimator', {})
+        # Simulate an interrupted write followed by a resumed run.
+        with open(journal_file, 'a') as out_file_stream:
+            out_file_stream.write('- {job: job_b, stage: stat')
+        ExecutionJournal(journal_file).record('job_b', 'estimator', {})
+
+        restored_journal = ExecutionJournal(journal_file)
+        nose.tools.ok_(restored_journal.hasSucceeded('job_a', 'estimator'))
+        nose.tools.ok_(restored_journal.hasSucceeded('job_b', 'estimator'))
+        nose.tools.ok_(
+            not restored_journal.hasSucceeded('job_b', 'statistics'))
+    finally:
+        shutil.rmtree(journal_folder)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shutil
+import tempfile
+
+import nose.tools
+
+from evaluation_tools.html_report import (REPORT_INDEX_FILENAME, HtmlReport,
+                                          getChunkPath)
+from evaluation_tools.metric_store import MetricStore
+
+
+def _createStore(rmse_offset=0., metrics=('rmse', 'runtime')):
+    runs = []
+    for dataset_index in range(2):
+        for parameter_file in ['parameters_a', 'parameters_b']:
+            mean = float(dataset_index)
+            runs.append(('dataset_' + str(dataset_index), parameter_file, {
+                metric: [10, mean + rmse_offset * (metric == 'rmse'), 1.,
+                         mean - 1., mean + 1.]
+                for metric in metrics
+            }))
+    return MetricStore.fromRuns(runs)
+
+
+def _loadWrappedJson(path):
+    """Returns the last argument of the function call in a report file."""
+    with open(path, 'r') as in_file_stream:
+        content = in_file_stream.read()
+    return json.loads('[' + content[content.index('(') + 1:
+                                    content.rindex(')')] + ']')[-1]
+
+
+def test_html_report_update():
+    report_folder = tempfile.mkdtemp()
+    try:
+        report = HtmlReport(report_folder)
+        nose.tools.eq_(report.update(_createStore(), num_jobs=4), 2)
+        index = _loadWrappedJson(
+            os.path.join(report_folder, REPORT_INDEX_FILENAME))
+        nose.tools.eq_(index['num_jobs'], 4)
+        nose.tools.eq_([metric['name'] for metric in index['metrics']],
+                       ['rmse', 'runtime'])
+        nose.tools.ok_(os.path.isfile(os.path.join(report_folder,
+                                                   'index.html')))
+
+        chunk = _loadWrappedJson(
+            os.path.join(report_folder, getChunkPath('rmse')))
+        nose.tools.eq_(chunk['parameter_files'],
+                       ['parameters_a', 'parameters_b'])
+        nose.tools.eq_(chunk['summary']['mean'], [0.5, 0.5])
+        nose.tools.eq_(chunk['summary']['count'], [20, 20])
+        nose.tools.eq_(chunk['per_dataset']['mean'], [[0., 0.], [1., 1.]])
+
+        # Only the chunk of the changed metric is written again.
+        nose.tools.eq_(report.update(_createStore(rmse_offset=1.)), 1)
+        nose.tools.eq_(report.update(_createStore(rmse_offset=1.)), 0)
+        # The chunks of metrics that are gone are removed.
+        report.update(_createStore(metrics=['rmse']))
+        nose.tools.eq_(
+            os.listdir(os.path.join(report_folder, 'metrics')),
+            [os.path.basename(getChunkPath('rmse'))])
+    finally:
+        shutil.rmtree(report_folder)
+
+
+def test_html_report_without_dataset():
+    # prepare_statistics.py writes dataset: null if it isn't given a dataset.
+    report_folder = tempfile.mkdtemp()
+    try:
+        store = MetricStore.fromRuns([(None, 'parameters', {
+            'rmse': [10, 1., 1., 0., 2.]
+        }), ('dataset', 'parameters', {
+            'rmse': [10, 2., 1., 1., 3.]
+        })])
+        nose.tools.eq_(HtmlReport(report_folder).update(store), 1)
+        index = _loadWrappedJson(
+            os.path.join(report_folder, REPORT_INDEX_FILENAME))
+        nose.tools.eq_(index['datasets'], ['None', 'dataset'])
+        chunk = _loadWrappedJson(
+            os.path.join(report_folder, getChunkPath('rmse')))
+        nose.tools.eq_(sorted(chunk['datasets']), ['None', 'dataset'])
+    finally:
+        shutil.rmtree(report_folder)
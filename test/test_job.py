@@ -2,13 +2,22 @@
 
 from __future__ import print_function
 
+import logging
 import os
+import shutil
+import tempfile
+import threading
+import time
 
 import nose.tools
 
 from evaluation_tools.catkin_utils import catkinFindSrc
-from evaluation_tools.job import Job
-from evaluation_tools.run_experiment import Experiment
+from evaluation_tools.command_runner import CommandRunnerException
+from evaluation_tools.job import Job, JobInfo
+from evaluation_tools.run_experiment import (JOB_SUMMARY_FILENAME,
+                                             RESOURCE_SUMMARY_FILENAME,
+                                             Experiment)
+from evaluation_tools.yaml_io import loadYaml
 
 RESULTS_FOLDER = './results'
 AUTOMATIC_DATASET_DOWNLOAD = True
@@ -44,3 +53,192 @@ def test_load_job_from_folder():
         job_from_file = Job()
         job_from_file.loadConfigFromFolder(job.job_path)
         nose.tools.eq_(job, job_from_file)
+
+
+def test_job_info():
+    shared_info = Job.createSharedInfo({'a': {'b': 1}, 'datasets': []}, '/')
+    info = JobInfo(shared_info)
+    info['c'] = 2
+    nose.tools.eq_(
+        dict(info), {
+            'a': {
+                'b': 1
+            },
+            'c': 2,
+            'experiment_root_folder': '/'
+        })
+    del info['a']
+    nose.tools.ok_('a' in shared_info)
+    nose.tools.eq_(len(info), 2)
+
+
+def test_jobs_share_experiment_info():
+    jobs = _create_jobs()
+    # All jobs of the experiment read the same shared entries.
+    # pylint: disable=protected-access
+    nose.tools.ok_(jobs[0].info._shared is jobs[-1].info._shared)
+    nose.tools.ok_(jobs[0].info == jobs[0].info)
+    nose.tools.ok_(jobs[0].info != jobs[-1].info)
+
+
+def test_replace_placeholders():
+    job = Job()
+    job.job_path = '/results/job'
+    job.sensors_file = '/sensors.yaml'
+    job.localization_map = '/map'
+    job._parseDatasetsDict([{
+        'name': '/data/a.bag'
+    }, {
+        'name': '/data/b.bag',
+        'additional_parameters': {
+            'start': 5
+        }
+    }])
+    job._addAdditionalPlaceholders()
+    nose.tools.eq_(
+        job.replacePlaceholdersInString(
+            '<BAG_FILENAME> <DATASET_NAME_0> <BAG_FOLDER_1> <start>',
+            dataset_index=1), '/data/b.bag a /data 5')
+    nose.tools.eq_(
+        job.replacePlaceholdersInString('<OUTPUT_MAP_FOLDER>'),
+        '/results/job/estimator_output_a/a')
+    nose.tools.assert_raises(Exception, job.replacePlaceholdersInString,
+                             '<start>')
+    nose.tools.assert_raises(Exception, job.replacePlaceholdersInString,
+                             '<DATASET_NAME_2>')
+
+
+class _RecordingJob(Job):
+    """Job that records the commands it runs instead of running them."""
+
+    def __init__(self, num_datasets, parallel_estimator_runs):
+        Job.__init__(self)
+        self.job_path = '/results/job'
+        self.dataset_paths = [
+            '/data/dataset_' + str(index) + '.bag'
+            for index in range(num_datasets)
+        ]
+        self.params_dict = [{} for _ in range(num_datasets)]
+        self.info = {'parallel_estimator_runs': parallel_estimator_runs}
+        # Estimator runs on these datasets fail after the given duration.
+        self.failure_durations = {}
+        self.events = []
+        self.max_running = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def runJobCommand(self,
+                      stage,
+                      name,
+                      exec_path,
+                      params_dict=None,
+                      process_samples_file=None,
+                      dataset_index=None):
+        with self._lock:
+            self._running += 1
+            self.max_running = max(self.max_running, self._running)
+            self.events.append(('start', name))
+        duration = self.failure_durations.get(dataset_index, 0.05)
+        time.sleep(duration)
+        with self._lock:
+            self._running -= 1
+            self.events.append(('end', name))
+        if dataset_index in self.failure_durations:
+            raise CommandRunnerException(name, 1)
+
+    def runConsole(self, enable_console_progress_bars=True):
+        self.runJobCommand('console', 'console', 'batch_runner')
+
+
+def test_run_estimator_in_parallel():
+    job = _RecordingJob(num_datasets=5, parallel_estimator_runs=2)
+    job.execute()
+    nose.tools.eq_(job.max_running, 2)
+    nose.tools.eq_(
+        sorted(name for event, name in job.events if event == 'end'),
+        ['console'] + ['estimator_dataset_' + str(index)
+                       for index in range(5)])
+    # The console only starts after all estimator runs finished.
+    nose.tools.eq_(job.events[-2:], [('start', 'console'),
+                                     ('end', 'console')])
+
+
+def test_run_estimator_in_parallel_failure():
+    job = _RecordingJob(num_datasets=4, parallel_estimator_runs=2)
+    # Dataset 3 fails before dataset 1, but dataset 1 is reported.
+    job.failure_durations = {1: 0.3, 3: 0.05}
+    with nose.tools.assert_raises(CommandRunnerException) as context:
+        job.execute()
+    nose.tools.eq_(context.exception.command, 'estimator_dataset_1')
+    # All datasets were run and the console step was not started.
+    nose.tools.eq_(
+        sorted(name for event, name in job.events if event == 'end'),
+        ['estimator_dataset_' + str(index) for index in range(4)])
+
+
+def _createResourceJob(job_path):
+    job = Job()
+    job.job_name = os.path.basename(job_path)
+    job.job_path = job_path
+    job.info = {}
+    job.dataset_additional_parameters = [{}]
+    job.exec_app = 'evaluation_tools'
+    job.exec_name = 'true'
+    job.exec_path = '/bin/true'
+    return job
+
+
+def test_resource_usage_summary():
+    results_folder = tempfile.mkdtemp()
+    try:
+        job_path = os.path.join(results_folder, 'experiment', 'job')
+        job = _createResourceJob(job_path)
+        job.runJobCommand('estimator', 'estimator_dataset', job.exec_path,
+                          dataset_index=0)
+        nose.tools.assert_raises(CommandRunnerException, job.runJobCommand,
+                                 'evaluation', 'evaluation', '/bin/false')
+        nose.tools.eq_(job.resource_usage['estimator_dataset']['stage'],
+                       'estimator')
+        nose.tools.eq_(job.resource_usage['estimator_dataset']['exit_code'],
+                       0)
+        # Failed commands are recorded as well.
+        nose.tools.eq_(job.resource_usage['evaluation']['exit_code'], 1)
+        job.writeSummary(JOB_SUMMARY_FILENAME)
+
+        # A resumed job only runs the evaluation again and keeps the entries
+        # of the other commands.
+        resumed_job = _createResourceJob(job_path)
+        resumed_job.runJobCommand('evaluation', 'evaluation', '/bin/true')
+        resumed_job.writeSummary(JOB_SUMMARY_FILENAME)
+        resources = loadYaml(os.path.join(job_path,
+                                          JOB_SUMMARY_FILENAME))['resources']
+        nose.tools.eq_(sorted(resources.keys()),
+                       ['estimator_dataset', 'evaluation'])
+        nose.tools.eq_(resources['estimator_dataset'],
+                       job.resource_usage['estimator_dataset'])
+        nose.tools.eq_(resources['evaluation']['exit_code'], 0)
+
+        experiment = Experiment.__new__(Experiment)
+        experiment.logger = logging.getLogger(__name__)
+        experiment.results_folder = results_folder
+        experiment.experiment_basename = 'experiment'
+        experiment.job_plans = [resumed_job]
+        experiment.writeResourceSummary()
+        resource_summary = loadYaml(
+            os.path.join(results_folder, 'experiment',
+                         RESOURCE_SUMMARY_FILENAME))
+        nose.tools.eq_(resource_summary['total']['commands'], 2)
+        nose.tools.eq_(resource_summary['jobs']['job']['commands'], 2)
+        nose.tools.eq_(resource_summary['stages']['estimator']['commands'], 1)
+        nose.tools.eq_(resource_summary['stages']['evaluation']['commands'],
+                       1)
+        nose.tools.assert_almost_equal(
+            resource_summary['total']['wall_time_s'],
+            resources['estimator_dataset']['wall_time_s'] +
+            resources['evaluation']['wall_time_s'])
+        nose.tools.eq_(
+            resource_summary['total']['max_rss_kb'],
+            max(resource_usage['max_rss_kb']
+                for resource_usage in resources.values()))
+    finally:
+        shutil.rmtree(results_folder)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import threading
+import time
+
+import nose.tools
+
+from evaluation_tools.job_scheduler import JobScheduler, JobSchedulerException
+
+
+def test_all_jobs_are_run():
+    finished_jobs = []
+    lock = threading.Lock()
+
+    def run_job(job):
+        time.sleep(0.01)
+        with lock:
+            finished_jobs.append(job)
+
+    scheduler = JobScheduler(num_workers=4)
+    scheduler.run(range(20), run_job)
+    nose.tools.eq_(sorted(finished_jobs), list(range(20)))
+
+
+def test_failing_job_does_not_stop_others():
+    finished_jobs = []
+
+    def run_job(job):
+        if job == 3:
+            raise ValueError('job failed')
+        finished_jobs.append(job)
+
+    scheduler = JobScheduler(num_workers=2)
+    nose.tools.assert_raises(JobSchedulerException, scheduler.run, range(6),
+                             run_job)
+    nose.tools.eq_(sorted(finished_jobs), [0, 1, 2, 4, 5])
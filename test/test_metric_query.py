@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+import io
+
+import nose.tools
+import numpy as np
+
+from evaluation_tools.metric_query import MetricQuery
+from evaluation_tools.metric_store import MetricStore
+
+
+def _createQuery():
+    runs = []
+    for dataset_index in range(3):
+        for parameter_file in ['base', 'sweep_SWEEP_1', 'sweep_SWEEP_2']:
+            mean = float(dataset_index)
+            if parameter_file != 'base':
+                mean += float(parameter_file[-1])
+            runs.append(('dataset_' + str(dataset_index), parameter_file, {
+                'rmse': [10, mean, 1., mean - 1., mean + 1.],
+                'runtime': [5, 2. * mean, 1., 0., 10.]
+            }))
+    return MetricQuery(MetricStore.fromRuns(runs))
+
+
+def test_filter_and_group():
+    query = _createQuery()
+    sweep_query = query.filter(base_parameter_file='sweep', metric='rm*')
+    nose.tools.eq_(sweep_query.getLabels('sweep_value'), ['1', '2'])
+    nose.tools.eq_(sweep_query.getLabels('metric'), ['rmse'])
+
+    store = sweep_query.groupBy('sweep_value', 'dataset')
+    nose.tools.eq_(store.axes, ('sweep_value', 'dataset'))
+    nose.tools.eq_(store.labels,
+                   [['1', '2'], ['dataset_0', 'dataset_1', 'dataset_2']])
+    np.testing.assert_array_equal(store.mean, [[1., 2., 3.], [2., 3., 4.]])
+    np.testing.assert_array_equal(store.count, 10.)
+
+    # Merging all datasets gives the same as the store.
+    merged = query.groupBy('parameter_file', 'metric')
+    expected = query.metric_store.mergeAxis('dataset')
+    for axis, labels in zip(expected.axes, merged.labels):
+        expected = expected.take(axis, expected.getIndices(axis, labels))
+    np.testing.assert_allclose(merged.mean, expected.mean)
+    np.testing.assert_allclose(merged.stddev(), expected.stddev())
+
+
+def test_pivot():
+    query = _createQuery()
+    with nose.tools.assert_raises(ValueError):
+        query.pivot('dataset', 'parameter_file')
+    rows, columns, values = query.filter(
+        metric='runtime', dataset=['dataset_0', 'dataset_2']).pivot(
+            'dataset', 'sweep_value', 'max')
+    nose.tools.eq_(rows, ['dataset_0', 'dataset_2'])
+    nose.tools.eq_(columns, ['1', '2', None])
+    np.testing.assert_array_equal(values, 10.)
+
+    output = io.BytesIO() if str is bytes else io.StringIO()
+    query.filter(parameter_file='base').writeCsv(output, ['metric'],
+                                                 ['count', 'mean'])
+    nose.tools.eq_(output.getvalue().splitlines(),
+                   ['metric,count,mean', 'rmse,30,1.0', 'runtime,15,2.0'])
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+import nose.tools
+import numpy as np
+
+from evaluation_tools.metric_store import MetricStore
+from evaluation_tools.quantile_sketch import QuantileSketch
+
+
+def _createSample(values):
+    return [
+        len(values),
+        np.mean(values),
+        np.std(values, ddof=1), np.min(values), np.max(values)
+    ]
+
+
+def test_merge_matches_statistics_of_all_values():
+    rng = np.random.RandomState(0)
+    runs = []
+    values = {}
+    for dataset in ['dataset_0', 'dataset_1']:
+        for parameter_file in ['parameters_0', 'parameters_1']:
+            # Two runs of the same dataset and parameter file are merged.
+            for _ in range(2):
+                run_values = 1e6 + rng.normal(size=rng.randint(2, 50))
+                runs.append((dataset, parameter_file, {
+                    'error': _createSample(run_values)
+                }))
+                values.setdefault(parameter_file, []).extend(run_values)
+    runtime_sketch = QuantileSketch()
+    runtime_sketch.addValues([1., 1., 1.])
+    for dataset in ['dataset_0', 'dataset_1']:
+        runs.append((dataset, 'parameters_1', {
+            'runtime': [3, 1., 0., 1., 1.,
+                        runtime_sketch.toDict()]
+        }))
+
+    store = MetricStore.fromRuns(runs)
+    nose.tools.eq_(store.count.shape, (2, 2, 2))
+    nose.tools.ok_(not store.has_data[0, 0, 1])
+    merged_store = store.mergeAxis('dataset')
+    nose.tools.eq_(merged_store.axes, ('parameter_file', 'metric'))
+
+    error_index = merged_store.getIndices('metric', ['error'])[0]
+    for parameter_file, parameter_file_values in values.items():
+        index = merged_store.getIndices('parameter_file', [parameter_file])[0]
+        nose.tools.eq_(merged_store.count[index, error_index],
+                       len(parameter_file_values))
+        np.testing.assert_allclose(merged_store.mean[index, error_index],
+                                   np.mean(parameter_file_values))
+        np.testing.assert_allclose(
+            merged_store.stddev()[index, error_index],
+            np.std(parameter_file_values, ddof=1),
+            rtol=1e-6)
+        nose.tools.eq_(merged_store.minimum[index, error_index],
+                       np.min(parameter_file_values))
+        nose.tools.eq_(merged_store.maximum[index, error_index],
+                       np.max(parameter_file_values))
+
+    runtime_index = merged_store.getIndices('metric', ['runtime'])[0]
+    parameter_file_index = merged_store.getIndices('parameter_file',
+                                                   ['parameters_1'])[0]
+    runtime_quantiles = merged_store.getQuantiles(
+        (parameter_file_index, runtime_index), [0.5, 0.99])
+    np.testing.assert_allclose(runtime_quantiles, [1., 1.], rtol=0.01)
+    nose.tools.eq_(merged_store.sketches[(parameter_file_index,
+                                          runtime_index)].count, 6)
+
+    # Merging only one dataset keeps its cells.
+    single_store = store.mergeAxis('dataset', ['dataset_0'])
+    np.testing.assert_array_equal(single_store.count, store.count[0])
+    np.testing.assert_array_equal(single_store.has_data, store.has_data[0])
+
+
+def test_merge_ignores_minimum_and_maximum_without_samples():
+    empty = [0, 0., 0., 0., 0.]
+    sample = [3, 5., 1., 4., 6.]
+    # Merged across datasets and within the runs of one cell.
+    for datasets in [('d1', 'd2'), ('d1', 'd1')]:
+        store = MetricStore.fromRuns([(datasets[0], 'p', {
+            'm': empty
+        }), (datasets[1], 'p', {
+            'm': sample
+        })]).mergeAxis('dataset')
+        np.testing.assert_array_equal(store.count, [[3.]])
+        np.testing.assert_array_equal(store.minimum, [[4.]])
+        np.testing.assert_array_equal(store.maximum, [[6.]])
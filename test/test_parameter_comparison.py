@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+import nose.tools
+import numpy as np
+
+from evaluation_tools.metric_store import MetricStore
+from evaluation_tools.parameter_comparison import compareParameterFiles
+
+
+def test_compare_parameter_files():
+    rng = np.random.RandomState(0)
+    runs = []
+    for dataset_index in range(10):
+        dataset = 'dataset_' + str(dataset_index)
+        # The datasets differ a lot, but the paired differences are small.
+        base = 10. * dataset_index
+        for parameter_file, offset in [('fast', 0.), ('slow', 1.),
+                                       ('same', 0.)]:
+            mean = base + offset + 0.1 * rng.normal()
+            runs.append((dataset, parameter_file, {
+                'runtime': [10, mean, 0.1, mean - 1., mean + 1.]
+            }))
+    runs.append(('dataset_0', 'slow', {'rmse': [10, 1., 0.1, 0., 2.]}))
+    store = MetricStore.fromRuns(runs)
+
+    comparisons = compareParameterFiles(store, num_resamples=500)
+    nose.tools.eq_(comparisons, compareParameterFiles(
+        store, num_resamples=500))
+    # The metric of a single parameter file can't be compared.
+    nose.tools.eq_(len(comparisons), 3)
+    by_pair = {(comparison['parameter_file_a'],
+                comparison['parameter_file_b']): comparison
+               for comparison in comparisons}
+    fast_slow = by_pair[('fast', 'slow')]
+    nose.tools.eq_(fast_slow['num_datasets'], 10)
+    nose.tools.ok_(fast_slow['significant'])
+    # The interval lies below 0 and contains the observed mean difference.
+    nose.tools.ok_(fast_slow['ci_high'] < 0.)
+    nose.tools.ok_(fast_slow['ci_low'] <= fast_slow['difference'] <=
+                   fast_slow['ci_high'])
+    np.testing.assert_allclose(fast_slow['difference'],
+                               fast_slow['mean_a'] - fast_slow['mean_b'])
+    nose.tools.eq_(fast_slow['p_value'], 0.)
+    nose.tools.ok_(not by_pair[('fast', 'same')]['significant'])
+    nose.tools.eq_(comparisons[-1]['parameter_file_b'], 'same')
+
+
+def test_compare_parameter_files_with_missing_pairs():
+    rng = np.random.RandomState(1)
+    runs = []
+    for dataset_index in range(8):
+        for parameter_file in ['a', 'b']:
+            # b is missing on the first three datasets.
+            if parameter_file == 'b' and dataset_index < 3:
+                continue
+            mean = dataset_index + rng.normal()
+            runs.append(('dataset_' + str(dataset_index), parameter_file, {
+                'rmse': [10, mean, 0.1, mean - 1., mean + 1.]
+            }))
+    paired_runs = [run for run in runs if run[0] >= 'dataset_3']
+
+    comparison = compareParameterFiles(
+        MetricStore.fromRuns(runs), num_resamples=500)[0]
+    nose.tools.eq_(comparison['num_datasets'], 5)
+    # Only the paired datasets are resampled, so the datasets without a pair
+    # don't change the result.
+    paired_comparison = compareParameterFiles(
+        MetricStore.fromRuns(paired_runs), num_resamples=500)[0]
+    for column in ['ci_low', 'ci_high', 'p_value']:
+        nose.tools.eq_(comparison[column], paired_comparison[column])
+    np.testing.assert_allclose(comparison['difference'],
+                               paired_comparison['difference'])
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import nose.tools
+
+from evaluation_tools.parameter_sweep import getSweepPoints
+
+
+def test_single_parameter_sweep():
+    nose.tools.eq_(
+        list(
+            getSweepPoints({
+                'name': 'a',
+                'min': 2,
+                'max': 4,
+                'step_size': 1
+            })), [{
+                'a': 2
+            }, {
+                'a': 3
+            }, {
+                'a': 4
+            }])
+
+
+def test_multi_parameter_sweeps():
+    parameters = [{
+        'name': 'a',
+        'min': 0,
+        'max': 10,
+        'step_size': 5
+    }, {
+        'name': 'b',
+        'values': ['x', 'y']
+    }]
+    grid_points = list(getSweepPoints({'parameters': parameters}))
+    nose.tools.eq_(len(grid_points), 6)
+    nose.tools.ok_({'a': 10, 'b': 'y'} in grid_points)
+
+    random_points = list(
+        getSweepPoints({
+            'mode': 'random',
+            'samples': 20,
+            'parameters': parameters
+        }))
+    nose.tools.eq_(len(random_points), 20)
+    for point in random_points:
+        nose.tools.ok_(point['a'] in [0, 5, 10])
+        nose.tools.ok_(point['b'] in ['x', 'y'])
+
+    # Each of the 4 strata of every parameter is sampled exactly once.
+    lhs_points = list(
+        getSweepPoints({
+            'mode': 'latin_hypercube',
+            'samples': 4,
+            'seed': 1,
+            'parameters': [{
+                'name': 'c',
+                'min': 0.,
+                'max': 1.
+            }, {
+                'name': 'd',
+                'min': 0.,
+                'max': 4.
+            }]
+        }))
+    nose.tools.eq_(
+        sorted(int(point['c'] * 4) for point in lhs_points), [0, 1, 2, 3])
+    nose.tools.eq_(sorted(int(point['d']) for point in lhs_points),
+                   [0, 1, 2, 3])
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import threading
+
+import nose.tools
+
+from evaluation_tools.pipeline import Pipeline, PipelineStage
+
+
+def test_stage_order_is_kept_for_each_item():
+    processed_stages = {}
+    lock = threading.Lock()
+
+    def makeStageFunction(stage_name):
+        def stageFunction(item):
+            with lock:
+                processed_stages.setdefault(item, []).append(stage_name)
+            # Item 2 stops after the first stage.
+            return item != 2
+
+        return stageFunction
+
+    stages = [
+        PipelineStage(stage_name, makeStageFunction(stage_name), num_workers)
+        for stage_name, num_workers in [('a', 2), ('b', 1), ('c', 3)]
+    ]
+    statistics = Pipeline(stages).run(range(10))
+
+    for item in range(10):
+        expected_stages = ['a'] if item == 2 else ['a', 'b', 'c']
+        nose.tools.eq_(processed_stages[item], expected_stages)
+    nose.tools.eq_(statistics['a']['processed_items'], 10)
+    nose.tools.eq_(statistics['c']['processed_items'], 9)
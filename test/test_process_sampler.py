@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+import nose.tools
+
+from evaluation_tools.process_sampler import (SAMPLE_COLUMNS,
+                                              ProcessSampler,
+                                              loadProcessSamples)
+
+
+def test_samples_are_written_and_loaded():
+    samples_folder = tempfile.mkdtemp()
+    try:
+        samples_file = os.path.join(samples_folder, 'samples.bin')
+        process = subprocess.Popen(['sleep', '0.5'])
+        sampler = ProcessSampler(process.pid, samples_file, 20.).start()
+        process.wait()
+        sampler.stop()
+
+        samples = loadProcessSamples(samples_file)
+        nose.tools.eq_(sorted(samples.keys()), sorted(SAMPLE_COLUMNS))
+        num_samples = len(samples['time_s'])
+        nose.tools.ok_(num_samples > 1)
+        for column in SAMPLE_COLUMNS:
+            nose.tools.eq_(len(samples[column]), num_samples)
+        nose.tools.ok_(samples['rss_kb'].max() > 0)
+        nose.tools.ok_((samples['num_processes'] >= 1).all())
+
+        # A partially written sample at the end is ignored.
+        with open(samples_file, 'ab') as out_file_stream:
+            out_file_stream.write(b'\0' * 12)
+        nose.tools.eq_(
+            len(loadProcessSamples(samples_file)['time_s']), num_samples)
+    finally:
+        shutil.rmtree(samples_folder)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+
+import nose.tools
+import numpy as np
+
+from evaluation_tools.quantile_sketch import (QuantileSketch,
+                                             getSketchFromMetric)
+
+
+def _checkQuantiles(sketch, values):
+    for q in [0., 0.5, 0.95, 0.99, 1.]:
+        expected = sorted(values)[int(q * (len(values) - 1))]
+        nose.tools.ok_(
+            abs(sketch.quantile(q) - expected) <=
+            sketch.relative_accuracy * abs(expected) + 1e-12,
+            (q, sketch.quantile(q), expected))
+
+
+def test_merged_sketch_quantiles():
+    rng = np.random.RandomState(0)
+    all_values = []
+    merged_sketch = QuantileSketch()
+    for _ in range(5):
+        values = rng.lognormal(size=1000) - 0.5
+        sketch = getSketchFromMetric({'values': values.tolist()})
+        # Persisting the sketch keeps all buckets.
+        sketch = QuantileSketch.fromDict(sketch.toDict())
+        merged_sketch.merge(sketch)
+        all_values.extend(values)
+    merged_sketch.add(0., 10)
+    all_values.extend([0.] * 10)
+
+    nose.tools.eq_(merged_sketch.count, len(all_values))
+    _checkQuantiles(merged_sketch, all_values)
+
+
+def test_histogram_sketch():
+    sketch = getSketchFromMetric({
+        'histogram': {
+            'bin_edges': [0., 2., 4., 6.],
+            'counts': [10, 80, 10]
+        }
+    })
+    nose.tools.eq_(sketch.count, 100)
+    _checkQuantiles(sketch, [1.] * 10 + [3.] * 80 + [5.] * 10)
+    nose.tools.eq_(getSketchFromMetric({'mean': 1.}), None)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import tempfile
+
+import nose.tools
+
+import evaluation_tools.simple_summarization as simple_summarization
+from evaluation_tools.simple_summarization import SimpleSummarization
+from evaluation_tools.yaml_io import dumpYaml
+
+
+def _writeStats(stats_file, mean):
+    dumpYaml({
+        'dataset': 'dataset',
+        'parameter_file': 'parameters',
+        'metrics': {
+            'error': {
+                'samples': 10,
+                'mean': mean,
+                'stddev': 0.5,
+                'min': mean - 1.,
+                'max': mean + 1.
+            }
+        }
+    }, stats_file)
+
+
+def test_summary_cache():
+    results_folder = tempfile.mkdtemp()
+    try:
+        stats_files = []
+        for job_index in range(2):
+            job_folder = os.path.join(results_folder, 'job_' + str(job_index))
+            os.makedirs(job_folder)
+            stats_files.append(os.path.join(job_folder, 'formatted_stats.yaml'))
+            _writeStats(stats_files[-1], job_index)
+        cache_file = os.path.join(results_folder, 'summary_cache.json')
+
+        for mean in [1., 2.]:
+            # The cached metrics of the first file are used in the second run.
+            _writeStats(stats_files[1], mean)
+            os.utime(stats_files[1], (mean, mean))
+            cached_metrics = SimpleSummarization(
+                stats_files, num_workers=1,
+                cache_file=cache_file).summarizeMetricsFromDatasets()
+            metrics = SimpleSummarization(
+                stats_files, num_workers=1).summarizeMetricsFromDatasets()
+            nose.tools.eq_(
+                json.dumps(cached_metrics, sort_keys=True),
+                json.dumps(metrics, sort_keys=True))
+            nose.tools.eq_(metrics['error']['parameters']['mean'],
+                           (0. + mean) / 2)
+
+        with open(cache_file, 'r') as in_file_stream:
+            nose.tools.eq_(
+                sorted(json.load(in_file_stream)['files']), stats_files)
+    finally:
+        shutil.rmtree(results_folder)
+
+
+def test_parallel_loading_matches_serial_loading():
+    results_folder = tempfile.mkdtemp()
+    min_files_for_parallel_loading = \
+        simple_summarization.MIN_FILES_FOR_PARALLEL_LOADING
+    try:
+        stats_files = []
+        for job_index in range(6):
+            stats_files.append(
+                os.path.join(results_folder,
+                             'stats_' + str(job_index) + '.yaml'))
+            dumpYaml({
+                'dataset': 'dataset_' + str(job_index % 3),
+                'parameter_file': 'parameters_' + str(job_index // 3),
+                'metrics': {
+                    'error': {
+                        'samples': 3,
+                        'mean': float(job_index),
+                        'stddev': 0.5,
+                        'min': job_index - 1.,
+                        'max': job_index + 1.,
+                        'values': [job_index - 1., job_index, job_index + 1.]
+                    }
+                }
+            }, stats_files[-1])
+
+        serial_metrics = SimpleSummarization(
+            stats_files, num_workers=1).summarizeMetricsFromDatasets()
+        simple_summarization.MIN_FILES_FOR_PARALLEL_LOADING = 2
+        parallel_metrics = SimpleSummarization(
+            stats_files, num_workers=2).summarizeMetricsFromDatasets()
+        nose.tools.eq_(
+            json.dumps(parallel_metrics, sort_keys=True),
+            json.dumps(serial_metrics, sort_keys=True))
+        nose.tools.ok_('p95' in parallel_metrics['error']['parameters_1'])
+    finally:
+        simple_summarization.MIN_FILES_FOR_PARALLEL_LOADING = \
+            min_files_for_parallel_loading
+        shutil.rmtree(results_folder)
+
+
+def test_headless_plots():
+    results_folder = tempfile.mkdtemp()
+    try:
+        stats_file = os.path.join(results_folder, 'formatted_stats.yaml')
+        plot_folder = os.path.join(results_folder, 'plots')
+        plot_file = os.path.join(plot_folder, 'error.svg')
+        for mean, is_rendered in [(1., True), (1., False), (2., True)]:
+            _writeStats(stats_file, mean)
+            if os.path.isfile(plot_file):
+                os.utime(plot_file, (0, 0))
+            SimpleSummarization(
+                [stats_file],
+                num_workers=1,
+                plot_folder=plot_folder,
+                plot_format='svg').runSummarization()
+            # Unchanged figures are not rendered again.
+            nose.tools.eq_(os.path.getmtime(plot_file) != 0, is_rendered)
+        nose.tools.eq_(
+            sorted(os.listdir(plot_folder)), ['error.svg', 'plot_hashes.json'])
+    finally:
+        shutil.rmtree(results_folder)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+
+import nose.tools
+
+from evaluation_tools.summary_watcher import (
+    SUMMARY_PLOTS_FOLDER, SummaryWatcher, _InotifyChangeDetector,
+    _PollingChangeDetector)
+from evaluation_tools.yaml_io import dumpYaml, loadYaml
+
+
+def test_summary_watcher_update():
+    results_folder = tempfile.mkdtemp()
+    try:
+        for job_index in range(3):
+            job_folder = os.path.join(results_folder, 'job_' + str(job_index))
+            os.makedirs(job_folder)
+            dumpYaml({}, os.path.join(job_folder, 'job.yaml'))
+        # The last job is still running and has no statistics yet.
+        for job_index in range(2):
+            dumpYaml({
+                'dataset': 'dataset_' + str(job_index),
+                'parameter_file': 'parameters',
+                'metrics': {
+                    'error': {
+                        'samples': 10,
+                        'mean': float(job_index),
+                        'stddev': 0.5,
+                        'min': -1.,
+                        'max': 2.
+                    }
+                }
+            },
+                     os.path.join(results_folder, 'job_' + str(job_index),
+                                  'formatted_stats.yaml'))
+
+        watcher = SummaryWatcher(
+            results_folder, use_inotify=False, write_plots=False)
+        try:
+            watcher.update()
+        finally:
+            watcher.close()
+
+        summary = loadYaml(os.path.join(results_folder, 'summary.yaml'))
+        nose.tools.eq_(summary['num_jobs'], 2)
+        nose.tools.eq_(summary['metrics']['error']['parameters']['count'], 20)
+        nose.tools.eq_(summary['metrics']['error']['parameters']['mean'], 0.5)
+        with open(os.path.join(results_folder, 'summary.csv'),
+                  'r') as in_file_stream:
+            nose.tools.eq_(len(in_file_stream.readlines()), 2)
+    finally:
+        shutil.rmtree(results_folder)
+
+
+def _writeJob(results_folder, job_folder):
+    job_path = os.path.join(results_folder, job_folder)
+    os.makedirs(job_path)
+    dumpYaml({}, os.path.join(job_path, 'job.yaml'))
+    return job_path
+
+
+def test_polling_change_detector():
+    results_folder = tempfile.mkdtemp()
+    try:
+        job_path = _writeJob(results_folder, 'job')
+        detector = _PollingChangeDetector(results_folder, poll_period_s=0.01)
+        nose.tools.ok_(not detector.waitForChange(0.05))
+        dumpYaml({'metrics': {}},
+                 os.path.join(job_path, 'formatted_stats.yaml'))
+        nose.tools.ok_(detector.waitForChange(1.))
+        nose.tools.ok_(not detector.waitForChange(0.05))
+    finally:
+        shutil.rmtree(results_folder)
+
+
+def test_inotify_change_detector_ignores_plots():
+    results_folder = tempfile.mkdtemp()
+    try:
+        try:
+            detector = _InotifyChangeDetector(results_folder)
+        except OSError:
+            raise nose.SkipTest('inotify is not available')
+        try:
+            os.makedirs(os.path.join(results_folder, SUMMARY_PLOTS_FOLDER))
+            nose.tools.ok_(not detector.waitForChange(0.05))
+            job_path = _writeJob(results_folder, 'job')
+            dumpYaml({'metrics': {}},
+                     os.path.join(job_path, 'formatted_stats.yaml'))
+            nose.tools.ok_(detector.waitForChange(1.))
+        finally:
+            detector.close()
+    finally:
+        shutil.rmtree(results_folder)
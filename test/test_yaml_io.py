@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+
+import nose.tools
+
+from evaluation_tools.yaml_io import (YamlFormatError, dumpYaml,
+                                      loadFormattedStats, loadYamlString)
+
+
+def test_formatted_stats_are_validated():
+    stats_folder = tempfile.mkdtemp()
+    try:
+        stats_file = os.path.join(stats_folder, 'formatted_stats.yaml')
+        formatted_stats = {
+            'dataset': 'dataset',
+            'parameter_file': 'parameters',
+            'metrics': {
+                'error': {
+                    'mean': 0.5
+                }
+            }
+        }
+        dumpYaml(formatted_stats, stats_file)
+        nose.tools.eq_(loadFormattedStats(stats_file), formatted_stats)
+
+        del formatted_stats['metrics']
+        dumpYaml(formatted_stats, stats_file)
+        nose.tools.assert_raises(YamlFormatError, loadFormattedStats,
+                                 stats_file)
+    finally:
+        shutil.rmtree(stats_folder)
+
+
+def test_yaml_string_round_trip():
+    data = [{'a': [1, 2.5, 'text with spaces'], 'b': None}]
+    nose.tools.eq_(loadYamlString(dumpYaml(data)), data)
+    nose.tools.eq_(
+        loadYamlString(dumpYaml(data, default_flow_style=True)), data)